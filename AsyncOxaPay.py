@@ -1,347 +1,410 @@
+import asyncio
+import copy
+from collections import deque
+
 from .clients.AsyncClient import AsyncClient
-from .utils.response_models import PaymentStatus, OrderStatus
+from .clients.endpoints import (
+    async_method, CREATE_INVOICE, GET_SUPPORTED_CURRENCIES, GET_SUPPORTED_NETWORKS, GET_SUPPORTED_FIAT_CURRENCIES,
+    GET_PAYMENT_INFORMATION, CREATE_WHITE_LABEL_PAYMENT, CREATE_STATIC_ADDRESS, REVOKE_STATIC_WALLET,
+    GET_STATIC_ADDRESS_LIST, GET_PAYMENT_HISTORY, GET_ACCEPTED_CURRENCIES, GET_PRICES,
+)
+from .clients.exceptions import OxaPayError
+from .clients.instrumentation import RequestHooks
+from .clients.rate_limit import RateLimiter
+from .clients.retry import RetryPolicy, CircuitBreaker, _is_healthy
+from .clients.timeouts import Timeout
+from .clients.transport import AsyncTransport
+from .clients.constants.api_constants import _GENERAL_API_URL, _REFERENCE_CACHE_TTLS, _REFERENCE_CACHE_STALE_TTL
+from .utils.address_index import AsyncAddressIndex
+from .utils.address_pool import AsyncAddressPool
+from .utils.cache import AsyncTTLCache, CacheStats
+from .utils.history_store import HistoryStore, AsyncHistoryMirror
+from .utils.idempotency import AsyncIdempotency
+from .utils.pagination import _parse_page
+from .utils.payment_watcher import PaymentWatcher
+from .utils.price_feed import AsyncPriceFeed
+from .utils.response_models import PaymentStatus, StaticAddress, BulkResult
+from .utils.validation import AsyncValidator
 
 
 class AsyncOxaPay:
-    def __init__(self, merchant_api_key: str):
+    def __init__(
+            self,
+            merchant_api_key: str,
+            limit: int = 100,
+            limit_per_host: int = 0,
+            keepalive_timeout: float = 30,
+            ttl_dns_cache: int = 300,
+            base_url: str = _GENERAL_API_URL,
+            retry_policy: RetryPolicy = None,
+            circuit_breaker: CircuitBreaker = None,
+            rate_limiter: RateLimiter = None,
+            timeout: Timeout = None,
+            cache_ttls: dict = None,
+            cache_stale_ttl: float = _REFERENCE_CACHE_STALE_TTL,
+            serializer=None,
+            hooks: RequestHooks = None,
+            idempotency_store=None,
+            validate: bool = False,
+            transport: AsyncTransport = None,
+            http2: bool = False,
+    ):
         """
         :param merchant_api_key: The merchant's API key for authentication
+        :param limit: Total number of simultaneous connections in the pool. 0 means no limit.
+        :param limit_per_host: Number of simultaneous connections to the same host. 0 means no limit.
+        :param keepalive_timeout: Seconds an idle connection is kept open for reuse.
+        :param ttl_dns_cache: Seconds resolved addresses are cached. None caches forever.
+        :param base_url: Root URL of the API, overridable for local stub servers
+        :param retry_policy: Backoff settings for transient failures. Defaults to ``RetryPolicy()``; idempotent calls only.
+        :param circuit_breaker: Optional breaker that fails fast while the API is unhealthy. ``get_api_status`` results feed into it.
+        :param rate_limiter: Optional token-bucket limiter; share one instance (or a ``FileBackend``) between clients using the same key.
+        :param timeout: Connect, read and total timeouts applied to every call. Defaults to ``Timeout()``.
+        :param cache_ttls: Per-endpoint TTLs in seconds for reference data, merged over the defaults. A TTL of 0 disables caching for that endpoint.
+        :param cache_stale_ttl: Seconds an expired reference value is still served while it is refreshed in the background.
+        :param serializer: JSON backend: 'orjson', 'msgspec', 'json' or an object with ``dumps``/``loads``. Defaults to the fastest installed.
+        :param hooks: Optional ``RequestHooks`` (or a list of them), e.g. ``PrometheusHooks`` or ``OpenTelemetryHooks``, told about every call.
+        :param idempotency_store: Optional ``MemoryIdempotencyStore`` or ``SQLiteIdempotencyStore``. When set, invoices and white-label
+            payments with an ``order_id`` are created at most once per order id; see ``AsyncIdempotency``.
+        :param validate: Check invoices, white-label payments and static addresses against the cached reference data
+            (currencies, networks, minimums) before sending them, raising ``ValidationError`` without a round-trip.
+        :param transport: The ``AsyncTransport`` sending the requests. Pass a ``AsyncMockTransport`` to run against an in-process
+            ``MockAPI`` without network access; the pool options are then ignored.
+        :param http2: Multiplex the calls over a few HTTP/2 connections instead of one HTTP/1.1 connection per
+            in-flight call; needs ``httpx[http2]``. See ``HttpxTransport``.
         """
         self.merchant_api_key = merchant_api_key
-        self._client = AsyncClient(self.merchant_api_key)
+        self._client = AsyncClient(
+            self.merchant_api_key,
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache,
+            base_url=base_url,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            rate_limiter=rate_limiter,
+            timeout=timeout,
+            serializer=serializer,
+            hooks=hooks,
+            transport=transport,
+            http2=http2,
+        )
+        self._idempotency = AsyncIdempotency(idempotency_store) if idempotency_store is not None else None
+        self._validator = AsyncValidator() if validate else None
+        self._models = {}
+        self._cache = AsyncTTLCache({**_REFERENCE_CACHE_TTLS, **(cache_ttls or {})}, stale_ttl=cache_stale_ttl)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Closes the underlying HTTP session and its connection pool
+        """
+        await self._client.close()
+
+    def with_options(self, timeout: Timeout = None, deadline=None) -> 'AsyncOxaPay':
+        """
+        Returns a view of this client with other timeouts or a deadline for the calls made through it,
+        e.g. ``client.with_options(deadline=2.5).create_invoice(...)``. The view shares connections,
+        caches and limits with this client.
+
+        :param timeout: Timeouts replacing the client's own.
+        :param deadline: A ``Deadline`` or seconds from now by which every call must finish. It is absolute, so create a new view per operation.
+        :return: A new ``AsyncOxaPay`` instance.
+        """
+        view = copy.copy(self)
+        view._client = self._client.with_options(timeout=timeout, deadline=deadline)
+        return view
+
+    def for_merchant(self, merchant_api_key: str, rate_limiter: RateLimiter = None) -> 'AsyncOxaPay':
+        """
+        Returns a client for another merchant key that reuses this client's connections. Retry policy,
+        circuit breaker, timeouts and serializer are shared too; the reference data cache and the
+        rate limiter are the new key's own. Closing either client closes the shared pool.
+
+        :param merchant_api_key: The other merchant's API key.
+        :param rate_limiter: The limiter pacing this key's requests. None disables client-side limiting.
+        :return: A new ``AsyncOxaPay`` instance.
+        """
+        client = copy.copy(self)
+        client.merchant_api_key = merchant_api_key
+        client._client = self._client.with_merchant(merchant_api_key, rate_limiter)
+        client._models = {}
+        client._cache = self._cache.empty_copy()
+        if self._validator is not None:
+            client._validator = AsyncValidator()
+        return client
+
+    def invalidate_cache(self, endpoint: str = None):
+        """
+        Drops cached reference data so the next call fetches it again.
+
+        :param endpoint: Endpoint path to invalidate (e.g. 'common/currencies'). Defaults to all endpoints.
+        """
+        self._cache.invalidate(endpoint)
+
+    def cache_stats(self, endpoint: str = None) -> CacheStats:
+        """
+        :param endpoint: Endpoint path to report on. Defaults to the totals over all endpoints.
+        :return: Hit, stale hit, miss, refresh and error counters of the reference data cache.
+        """
+        return self._cache.stats(endpoint)
+
+    def _cached_model(self, endpoint: str, response_data: dict, build):
+        # Reference data is cached raw; its models are rebuilt only when the cached response changes.
+        memo = self._models.get(endpoint)
+        if memo is None or memo[0] is not response_data:
+            memo = self._models[endpoint] = (response_data, build(response_data['data']))
+        return memo[1]
 
     async def get_api_status(self):
         """
         Get the current status of the OxaPay API
         :return: The API status information
         """
+        breaker = self._client.circuit_breaker
         try:
-            return await self._client.request('GET', 'common/monitor')
-        except Exception:
-            raise Exception
+            status = await self._client.request('GET', 'common/monitor')
+        except OxaPayError:
+            if breaker is not None:
+                breaker.record_health(False)
+            raise
+        if breaker is not None:
+            breaker.record_health(_is_healthy(status))
+        return status
+
+    create_invoice = async_method(CREATE_INVOICE)
 
-    async def create_invoice(
+    async def create_invoices_bulk(
             self,
-            amount: float,
-            currency: str = None,
-            lifetime: int = 60,
-            fee_paid_by_payer: float = None,
-            under_paid_coverage: float = None,
-            to_currency: str = "USDT",
-            auto_withdrawal: bool = False,
-            mixed_payment: bool = None,
-            callback_url: str = None,
-            return_url: str = None,
-            email: str = None,
-            order_id: str = None,
-            thanks_message: str = None,
-            description: str = None,
-            sandbox: bool = False,
-            raw_response: bool = False
+            invoices,
+            concurrency: int = 10,
+            ordered: bool = False,
+            raw_response: bool = False,
+            deadline=None
     ):
         """
+        Creates many invoices with at most ``concurrency`` requests in flight.
 
-        :param amount:
-        :param currency:
-        :param lifetime:
-        :param fee_paid_by_payer:
-        :param under_paid_coverage:
-        :param to_currency:
-        :param auto_withdrawal:
-        :param mixed_payment:
-        :param callback_url:
-        :param return_url:
-        :param email:
-        :param order_id:
-        :param thanks_message:
-        :param description:
-        :param sandbox:
-        :param raw_response:
-        :return:
-        """
-        invoice_data = {
-            'amount': amount,
-            'lifetime': lifetime,
-            'auto_withdrawal': auto_withdrawal,
-        }
-
-        if currency is not None:
-            invoice_data['currency'] = currency
-        if fee_paid_by_payer is not None:
-            invoice_data['fee_paid_by_payer'] = fee_paid_by_payer
-        if under_paid_coverage is not None:
-            invoice_data['under_paid_coverage'] = under_paid_coverage
-        if to_currency is not None:
-            invoice_data['to_currency'] = to_currency
-        if mixed_payment is not None:
-            invoice_data['mixed_payment'] = mixed_payment
-        if callback_url is not None:
-            invoice_data['callback_url'] = callback_url
-        if return_url is not None:
-            invoice_data['return_url'] = return_url
-        if email is not None:
-            invoice_data['email'] = email
-        if order_id is not None:
-            invoice_data['order_id'] = order_id
-        if thanks_message is not None:
-            invoice_data['thanks_message'] = thanks_message
-        if description is not None:
-            invoice_data['description'] = description
-        if sandbox is not None:
-            invoice_data['sandbox'] = sandbox
+        Results are streamed back as an async iterator of ``BulkResult`` objects. A failed
+        invoice is reported through ``BulkResult.error`` and does not stop the rest of the batch.
+        ``invoices`` is consumed lazily, so it may be a generator of any length.
 
-        try:
-            response_data = await self._client.request('POST', 'payment/invoice', json_data=invoice_data)
-            if raw_response:
-                return response_data
-            else:
-                return OrderStatus(**response_data["data"])
-        except Exception:
-            raise Exception
-
-    async def get_supported_currencies(self):
+        :param invoices: An iterable of dicts with ``create_invoice`` keyword arguments.
+        :param concurrency: Maximum number of simultaneous requests.
+        :param ordered: If True, results are yielded in input order instead of completion order.
+        :param raw_response: Passed through to ``create_invoice``.
+        :param deadline: A ``Deadline`` or seconds from now shared by the whole batch; invoices not created in time fail with ``DeadlineExceededError``.
+        :return: An async iterator of ``BulkResult``.
         """
-        Retrieves a list of supported currencies and their network details.
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1.')
+        client = self.with_options(deadline=deadline) if deadline is not None else self
 
-        :return: A list of supported currencies with their details.
-        """
+        async def create(index, spec):
+            try:
+                return BulkResult(index, spec, await client.create_invoice(**spec, raw_response=raw_response))
+            except Exception as e:
+                return BulkResult(index, spec, error=e)
+
+        items = enumerate(invoices)
+        exhausted = False
+        tasks = set()
+        # Completed results held back in ordered mode; bounded so a slow head item cannot buffer the whole input.
+        buffered = {}
+        next_index = 0
         try:
-            return await self._client.request('GET', 'common/currencies')
-        except Exception:
-            raise Exception
+            while True:
+                while not exhausted and len(tasks) < concurrency and len(tasks) + len(buffered) < 2 * concurrency:
+                    try:
+                        index, spec = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    tasks.add(asyncio.ensure_future(create(index, spec)))
+                if not tasks:
+                    return
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if ordered:
+                        buffered[result.index] = result
+                    else:
+                        yield result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            for task in tasks:
+                task.cancel()
 
-    async def get_supported_networks(self):
-        """
-        Retrieves a list of supported blockchain networks for cryptocurrency transactions.
+    get_supported_currencies = async_method(GET_SUPPORTED_CURRENCIES)
+    get_supported_networks = async_method(GET_SUPPORTED_NETWORKS)
+    get_supported_fiat_currencies = async_method(GET_SUPPORTED_FIAT_CURRENCIES)
+    get_payment_information = async_method(GET_PAYMENT_INFORMATION)
+    create_white_label_payment = async_method(CREATE_WHITE_LABEL_PAYMENT)
+    create_static_address = async_method(CREATE_STATIC_ADDRESS)
+    revoke_static_wallet = async_method(REVOKE_STATIC_WALLET)
+    get_static_address_list = async_method(GET_STATIC_ADDRESS_LIST)
+    get_payment_history = async_method(GET_PAYMENT_HISTORY)
 
-        :return: A list of supported blockchain networks.
+    def iter_payment_history(self, prefetch: int = 2, size: int = 200, deadline=None, raw_response: bool = False, **filters):
         """
-        try:
-            return await self._client.request('GET', 'common/networks')
-        except Exception:
-            raise Exception
+        Iterates over every payment matching the filters, one record at a time.
+
+        Pages are requested on demand; while the current page is being consumed the next
+        ``prefetch`` pages are already being fetched concurrently. Records created while
+        iterating may shift pages when sorting by newest first, so pin ``to_date`` or use
+        ``sort_type='asc'`` for a stable scan.
 
-    async def get_supported_fiat_currencies(self):
+        :param prefetch: Number of pages fetched ahead while the current one is consumed. At most ``prefetch + 1`` pages are held in memory.
+        :param size: Number of records per request. Possible values: from 1 to 200. Default: 200.
+        :param deadline: A ``Deadline`` or seconds from now shared by all page requests.
+        :param raw_response: Yield the records as raw dicts instead of ``PaymentStatus`` models.
+        :param filters: Any ``get_payment_history`` filter except ``page``.
+        :return: An async iterator of payment records.
         """
-        Retrieves a list of supported fiat currencies and their details.
+        return self._iter_pages('get_payment_history', PaymentStatus.from_dict, prefetch, size, deadline, raw_response, filters)
 
-        :return: A list of supported fiat currencies with their details.
+    def iter_static_addresses(self, prefetch: int = 2, size: int = 200, deadline=None, raw_response: bool = False, **filters):
         """
-        try:
-            return await self._client.request('GET', 'common/fiats')
-        except Exception:
-            raise Exception
+        Iterates over every static address matching the filters, fetching up to ``prefetch`` pages ahead.
 
-    async def get_payment_information(self, track_id: int, raw_response: bool = False):
+        :param prefetch: Number of pages fetched ahead while the current one is consumed.
+        :param size: Number of records per request. Possible values: from 1 to 200. Default: 200.
+        :param deadline: A ``Deadline`` or seconds from now shared by all page requests.
+        :param raw_response: Yield the records as raw dicts instead of ``StaticAddress`` models.
+        :param filters: Any ``get_static_address_list`` filter except ``page``.
+        :return: An async iterator of static addresses.
         """
+        return self._iter_pages('get_static_address_list', StaticAddress.from_dict, prefetch, size, deadline, raw_response, filters)
 
-        :param track_id: 
-        :param raw_response: 
-        :return: 
+    async def _iter_pages(self, method: str, model, prefetch: int, size: int, deadline, raw_response: bool, filters: dict):
         """
-        try:
-            response_data = await self._client.request('GET', f'payment/{track_id}')
-            if raw_response:
-                return response_data
-            else:
-                return PaymentStatus(**response_data["data"])
-        except Exception:
-            raise Exception
-
-    async def create_white_label_payment(
-            self,
-            amount: float,
-            pay_currency: str,
-            callback_url: str = None,
-            currency: str = None,
-            network: str = None,
-            lifetime: int = 60,
-            fee_paid_by_payer: float = None,
-            under_paid_coverage: float = None,
-            to_currency: str = None,
-            auto_withdrawal: bool = False,
-            email: str = None,
-            order_id: str = None,
-            description: str = None,
-            sandbox: bool = False
-    ):
+        Pages through a paginated endpoint; see ``iter_payment_history``.
         """
+        if prefetch < 0:
+            raise ValueError('prefetch must not be negative.')
+        client = self.with_options(deadline=deadline) if deadline is not None else self
+        fetch_page = getattr(client, method)
+
+        def fetch(page):
+            return asyncio.ensure_future(fetch_page(page=page, size=size, raw_response=True, **filters))
 
-        :param amount: 
-        :param pay_currency: 
-        :param callback_url: 
-        :param currency: 
-        :param network: 
-        :param lifetime: 
-        :param fee_paid_by_payer: 
-        :param under_paid_coverage: 
-        :param to_currency: 
-        :param auto_withdrawal: 
-        :param email: 
-        :param order_id: 
-        :param description: 
-        :param sandbox: 
-        :return: 
-        """
-        payment_data = {
-            'amount': amount,
-            'pay_currency': pay_currency,
-            'callback_url': callback_url,
-            'currency': currency,
-            'network': network,
-            'lifetime': lifetime,
-            'fee_paid_by_payer': fee_paid_by_payer,
-            'under_paid_coverage': under_paid_coverage,
-            'to_currency': to_currency,
-            'auto_withdrawal': auto_withdrawal,
-            'email': email,
-            'order_id': order_id,
-            'description': description,
-            'sandbox': sandbox,
-        }
+        records, last_page = _parse_page(await fetch_page(page=1, size=size, raw_response=True, **filters), 1, size)
+        pending = deque()
+        next_page = 2
         try:
-            return await self._client.request('POST', 'payment/white-label', json_data=payment_data)
-        except Exception:
-            raise Exception
+            while True:
+                while next_page <= last_page and len(pending) < prefetch:
+                    pending.append((next_page, fetch(next_page)))
+                    next_page += 1
+                if not raw_response:
+                    records = [model(record) for record in records]
+                for record in records:
+                    yield record
+                if not pending:
+                    if next_page > last_page:
+                        return
+                    pending.append((next_page, fetch(next_page)))
+                    next_page += 1
+                page, task = pending.popleft()
+                records, page_last = _parse_page(await task, page, size)
+                if not records:
+                    return
+                last_page = max(last_page, page_last)
+        finally:
+            for _, task in pending:
+                task.cancel()
 
-    async def create_static_address(
-            self,
-            network: str,
-            to_currency: str = None,
-            auto_withdrawal: bool = False,
-            callback_url: str = None,
-            email: str = None,
-            order_id: str = None,
-            description: str = None,
-    ):
+    get_accepted_currencies = async_method(GET_ACCEPTED_CURRENCIES)
+    get_prices = async_method(GET_PRICES)
+
+    def history_mirror(self, path: str = ':memory:', rescan_window: float = 86400.0) -> AsyncHistoryMirror:
         """
+        Creates a local SQLite mirror of the payment history. Call ``await mirror.sync()`` periodically
+        to pull new payments and status changes, and ``mirror.query(...)`` to read it with
+        ``get_payment_history``'s filters without touching the API.
 
-        :param network:
-        :param to_currency:
-        :param auto_withdrawal:
-        :param callback_url:
-        :param email:
-        :param order_id:
-        :param description: 
-        :return:
-        """
-        static_address_data = {
-            'network': network,
-        }
-
-        if to_currency is not None:
-            static_address_data['to_currency'] = to_currency
-        if auto_withdrawal is not None:
-            static_address_data['auto_withdrawal'] = auto_withdrawal
-        if callback_url is not None:
-            static_address_data['callback_url'] = callback_url
-        if email is not None:
-            static_address_data['email'] = email
-        if order_id is not None:
-            static_address_data['order_id'] = order_id
-        if description is not None:
-            static_address_data['description'] = description
+        :param path: SQLite database file; reopening the same file resumes from its last sync. Defaults to an in-memory database.
+        :param rescan_window: Seconds back from now within which open payments are re-checked by rescanning the history.
+        :return: An ``AsyncHistoryMirror``.
+        """
+        return AsyncHistoryMirror(self, HistoryStore(path), rescan_window=rescan_window)
 
-        try:
-            return await self._client.request('POST', 'payment/static-address', json_data=static_address_data)
-        except Exception:
-            raise Exception
+    def address_index(self, page_size: int = 200, **filters) -> AsyncAddressIndex:
+        """
+        Creates an in-memory index of the merchant's static addresses for O(1) membership tests and
+        lookups by address or order id. Call ``await index.sync()`` to update it; each sync returns an
+        ``AddressDiff`` of the addresses added and revoked since the previous one, and usually costs
+        a single request.
 
-    async def revoke_static_wallet(self, address: str):
+        :param page_size: Number of addresses per request. Possible values: from 1 to 200.
+        :param filters: ``get_static_address_list`` filters limiting the indexed set, e.g. ``network``.
+        :return: An empty ``AsyncAddressIndex``.
         """
-        Revokes a static wallet by disabling further transactions to the specified address.
+        return AsyncAddressIndex(self, page_size=page_size, **filters)
 
-        :param address: The address of the static wallet to revoke.
-        :return: The result of the revocation process.
+    def address_pool(
+            self,
+            reserve: dict,
+            lease_ttl: float = 86400.0,
+            sweep_interval: float = 60.0,
+            concurrency: int = 4,
+            **address_options
+    ) -> AsyncAddressPool:
         """
-        data = {
-            'address': address
-        }
-        try:
-            return await self._client.request('POST', 'payment/static-address/revoke', json_data=data)
-        except Exception:
-            raise Exception
+        Creates a pool that keeps pre-created static addresses ready per network, so handing one to a
+        customer takes no request. Use it as ``async with client.address_pool(...) as pool`` and lease addresses with ``pool.lease(network, order_id)``.
 
-    async def get_static_address_list(self):
+        :param reserve: Number of unleased addresses kept ready per network, e.g. ``{'TRC20': 20}``.
+        :param lease_ttl: Default seconds a lease lasts before its address is revoked. None keeps leases until released.
+        :param sweep_interval: Seconds between background sweeps revoking expired leases.
+        :param concurrency: Maximum number of simultaneous create or revoke requests.
+        :param address_options: ``create_static_address`` arguments used for every address, e.g. ``callback_url``.
+        :return: A not yet started ``AsyncAddressPool``.
         """
+        return AsyncAddressPool(
+            self, reserve, lease_ttl=lease_ttl, sweep_interval=sweep_interval, concurrency=concurrency, **address_options
+        )
 
-        :return:
+    def price_feed(self, interval: float = 10.0, stale_after: float = None) -> AsyncPriceFeed:
         """
-        try:
-            return await self._client.request('GET', 'payment/static-address')
-        except Exception:
-            raise Exception
+        Creates a price feed that polls ``get_prices`` in the background.
+        Use it as ``async with client.price_feed() as feed`` or call ``start()``/``await stop()``.
 
-    async def get_payment_history(
-            self,
-            track_id: int = None,
-            type_: str = None,
-            status: str = None,
-            pay_currency: str = None,
-            currency: str = None,
-            network: str = None,
-            address: str = None,
-            from_date: int = None,
-            to_date: int = None,
-            from_amount: float = None,
-            to_amount: float = None,
-            sort_by: str = 'create_date',
-            sort_type: str = 'desc',
-            page: int = 1,
-            size: int = 10,
-    ):
+        :param interval: Seconds between polls.
+        :param stale_after: Age in seconds after which the snapshot counts as stale. Defaults to three intervals.
+        :return: A not yet started ``AsyncPriceFeed``.
         """
-        Retrieves the payment history based on specified filters.
-
-        :param track_id: Filter payments by a specific invoice ID. Defaults to None.
-        :param type_: Filter payments by type (e.g., 'Invoice', 'White-Label', 'Static Wallet'). Defaults to None.
-        :param status: Filter payments by status (e.g., 'Paid', 'Confirming'). Defaults to None.
-        :param pay_currency: Filter payments by a specific crypto currency symbol in which the pay amount is specified. Defaults to None.
-        :param currency: Filter payments by a specific currency symbol. Defaults to None.
-        :param network: Filter payments by the expected blockchain network for the specified crypto currency. Defaults to None.
-        :param address: Filter payments by the expected address. It’s better to filter static addresses. Defaults to None.
-        :param from_date: The start of the date window to query for payments in Unix format. Defaults to None.
-        :param to_date: The end of the date window to query for payments in Unix format. Defaults to None.
-        :param from_amount: Filter payments with amounts greater than or equal to the specified value. Defaults to None.
-        :param to_amount: Filter payments with amounts less than or equal to the specified value. Defaults to None.
-        :param sort_by: Sort the received list by a parameter. Possible values: 'create_date', 'pay_date', 'amount'. Default: 'create_date'.
-        :param sort_type: Display the list in ascending or descending order. Possible values: 'asc', 'desc'. Default: 'desc'.
-        :param page: The page number of the results to retrieve. Possible values: from 1 to the total number of pages. Default: 1.
-        :param size: Number of records to display per page. Possible values: from 1 to 200. Default: 10.
-        :return: The payment history.
-        """
-        data = {
-            'track_id': track_id,
-            'type': type_,
-            'status': status,
-            'pay_currency': pay_currency,
-            'currency': currency,
-            'network': network,
-            'address': address,
-            'from_date': from_date,
-            'to_date': to_date,
-            'from_amount': from_amount,
-            'to_amount': to_amount,
-            'sort_by': sort_by,
-            'sort_type': sort_type,
-            'page': page,
-            'size': size,
-        }
-
-        query_params = {k: v for k, v in data.items() if v is not None}
-        try:
-            return await self._client.request('GET', 'payment', query_params=query_params)
-        except Exception:
-            raise Exception
+        return AsyncPriceFeed(self, interval=interval, stale_after=stale_after)
 
-    async def get_accepted_currencies(self):
-        try:
-            return await self._client.request('GET', 'payment/accepted-currencies')
-        except Exception:
-            raise Exception
+    def watch_payments(
+            self,
+            min_interval: float = 5.0,
+            max_interval: float = 300.0,
+            coalesce_threshold: int = 10,
+            on_change=None,
+    ) -> PaymentWatcher:
+        """
+        Creates a watcher that tracks many payments from one scheduler and reports status changes.
+        Use it as ``async with client.watch_payments() as watcher`` and add payments with ``watcher.watch(track_id)``.
 
-    async def get_prices(self):
-        try:
-            return await self._client.request('GET', 'common/prices')
-        except Exception:
-            raise Exception
+        :param min_interval: Shortest delay in seconds between two checks of one payment.
+        :param max_interval: Longest delay in seconds between two checks of one payment.
+        :param coalesce_threshold: Number of due payments from which history pages are scanned instead of individual lookups.
+        :param on_change: Optional callable (plain or async) invoked with each ``StatusChange``.
+        :return: A not yet started ``PaymentWatcher``.
+        """
+        return PaymentWatcher(
+            self,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            coalesce_threshold=coalesce_threshold,
+            on_change=on_change,
+        )
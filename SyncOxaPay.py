@@ -1,346 +1,383 @@
+import copy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 from .clients.SyncClient import SyncClient
-from .utils.response_models import PaymentStatus, OrderStatus
+from .clients.endpoints import (
+    sync_method, CREATE_INVOICE, GET_SUPPORTED_CURRENCIES, GET_SUPPORTED_NETWORKS, GET_SUPPORTED_FIAT_CURRENCIES,
+    GET_PAYMENT_INFORMATION, CREATE_WHITE_LABEL_PAYMENT, CREATE_STATIC_ADDRESS, REVOKE_STATIC_WALLET,
+    GET_STATIC_ADDRESS_LIST, GET_PAYMENT_HISTORY, GET_ACCEPTED_CURRENCIES, GET_PRICES,
+)
+from .clients.exceptions import OxaPayError
+from .clients.instrumentation import RequestHooks
+from .clients.rate_limit import RateLimiter
+from .clients.retry import RetryPolicy, CircuitBreaker, _is_healthy
+from .clients.timeouts import Timeout
+from .clients.transport import Transport
+from .clients.constants.api_constants import _GENERAL_API_URL, _REFERENCE_CACHE_TTLS, _REFERENCE_CACHE_STALE_TTL
+from .utils.address_index import SyncAddressIndex
+from .utils.address_pool import SyncAddressPool
+from .utils.cache import SyncTTLCache, CacheStats
+from .utils.history_store import HistoryStore, SyncHistoryMirror
+from .utils.idempotency import SyncIdempotency
+from .utils.pagination import _parse_page
+from .utils.price_feed import SyncPriceFeed
+from .utils.response_models import PaymentStatus, StaticAddress, BulkResult
+from .utils.validation import SyncValidator
 
 class SyncOxaPay:
-    def __init__(self, merchant_api_key: str):
+    def __init__(
+            self,
+            merchant_api_key: str,
+            pool_connections: int = 10,
+            pool_maxsize: int = 10,
+            pool_block: bool = False,
+            base_url: str = _GENERAL_API_URL,
+            retry_policy: RetryPolicy = None,
+            circuit_breaker: CircuitBreaker = None,
+            rate_limiter: RateLimiter = None,
+            timeout: Timeout = None,
+            cache_ttls: dict = None,
+            cache_stale_ttl: float = _REFERENCE_CACHE_STALE_TTL,
+            serializer=None,
+            hooks: RequestHooks = None,
+            idempotency_store=None,
+            validate: bool = False,
+            transport: Transport = None,
+    ):
         """
+        A single instance can be shared between threads; see ``SyncClient`` for details.
+
         :param merchant_api_key: The merchant's API key for authentication
+        :param pool_connections: Number of per-host connection pools to cache.
+        :param pool_maxsize: Maximum number of connections kept open per host. Set it to at least the number of worker threads.
+        :param pool_block: If True, threads wait for a free connection instead of opening extra, non-pooled ones.
+        :param base_url: Root URL of the API, overridable for local stub servers
+        :param retry_policy: Backoff settings for transient failures. Defaults to ``RetryPolicy()``; idempotent calls only.
+        :param circuit_breaker: Optional breaker that fails fast while the API is unhealthy. ``get_api_status`` results feed into it.
+        :param rate_limiter: Optional token-bucket limiter; share one instance (or a ``FileBackend``) between clients using the same key.
+        :param timeout: Connect, read and total timeouts applied to every call. Defaults to ``Timeout()``.
+        :param cache_ttls: Per-endpoint TTLs in seconds for reference data, merged over the defaults. A TTL of 0 disables caching for that endpoint.
+        :param cache_stale_ttl: Seconds an expired reference value is still served while it is refreshed in the background.
+        :param serializer: JSON backend: 'orjson', 'msgspec', 'json' or an object with ``dumps``/``loads``. Defaults to the fastest installed.
+        :param hooks: Optional ``RequestHooks`` (or a list of them), e.g. ``PrometheusHooks`` or ``OpenTelemetryHooks``, told about every call.
+        :param idempotency_store: Optional ``MemoryIdempotencyStore`` or ``SQLiteIdempotencyStore``. When set, invoices and white-label
+            payments with an ``order_id`` are created at most once per order id; see ``SyncIdempotency``.
+        :param validate: Check invoices, white-label payments and static addresses against the cached reference data
+            (currencies, networks, minimums) before sending them, raising ``ValidationError`` without a round-trip.
+        :param transport: The ``Transport`` sending the requests. Pass a ``MockTransport`` to run against an in-process
+            ``MockAPI`` without network access; the pool options are then ignored.
         """
         self.merchant_api_key = merchant_api_key
-        self._client = SyncClient(self.merchant_api_key)
+        self._client = SyncClient(
+            self.merchant_api_key,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            base_url=base_url,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            rate_limiter=rate_limiter,
+            timeout=timeout,
+            serializer=serializer,
+            hooks=hooks,
+            transport=transport,
+        )
+        self._idempotency = SyncIdempotency(idempotency_store) if idempotency_store is not None else None
+        self._validator = SyncValidator() if validate else None
+        self._models = {}
+        self._cache = SyncTTLCache({**_REFERENCE_CACHE_TTLS, **(cache_ttls or {})}, stale_ttl=cache_stale_ttl)
 
-    def get_api_status(self):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
         """
-        Get the current status of the OxaPay API
-        :return: The API status information
+        Closes the underlying HTTP session and its connection pool
         """
-        try:
-            return self._client.request('GET', 'common/monitor')
-        except Exception:
-            raise Exception
+        self._client.close()
 
-    def create_invoice(
-            self,
-            amount: float,
-            currency: str = None,
-            lifetime: int = 60,
-            fee_paid_by_payer: float = None,
-            under_paid_coverage: float = None,
-            to_currency: str = "USDT",
-            auto_withdrawal: bool = False,
-            mixed_payment: bool = None,
-            callback_url: str = None,
-            return_url: str = None,
-            email: str = None,
-            order_id: str = None,
-            thanks_message: str = None,
-            description: str = None,
-            sandbox: bool = False,
-            raw_response: bool = False
-    ):
+    def with_options(self, timeout: Timeout = None, deadline=None) -> 'SyncOxaPay':
         """
+        Returns a view of this client with other timeouts or a deadline for the calls made through it,
+        e.g. ``client.with_options(deadline=2.5).create_invoice(...)``. The view shares connections,
+        caches and limits with this client.
 
-        :param amount:
-        :param currency:
-        :param lifetime:
-        :param fee_paid_by_payer:
-        :param under_paid_coverage:
-        :param to_currency:
-        :param auto_withdrawal:
-        :param mixed_payment:
-        :param callback_url:
-        :param return_url:
-        :param email:
-        :param order_id:
-        :param thanks_message:
-        :param description:
-        :param sandbox:
-        :param raw_response:
-        :return:
+        :param timeout: Timeouts replacing the client's own.
+        :param deadline: A ``Deadline`` or seconds from now by which every call must finish. It is absolute, so create a new view per operation.
+        :return: A new ``SyncOxaPay`` instance.
         """
-        invoice_data = {
-            'amount': amount,
-            'lifetime': lifetime,
-            'auto_withdrawal': auto_withdrawal,
-        }
-
-        if currency is not None:
-            invoice_data['currency'] = currency
-        if fee_paid_by_payer is not None:
-            invoice_data['fee_paid_by_payer'] = fee_paid_by_payer
-        if under_paid_coverage is not None:
-            invoice_data['under_paid_coverage'] = under_paid_coverage
-        if to_currency is not None:
-            invoice_data['to_currency'] = to_currency
-        if mixed_payment is not None:
-            invoice_data['mixed_payment'] = mixed_payment
-        if callback_url is not None:
-            invoice_data['callback_url'] = callback_url
-        if return_url is not None:
-            invoice_data['return_url'] = return_url
-        if email is not None:
-            invoice_data['email'] = email
-        if order_id is not None:
-            invoice_data['order_id'] = order_id
-        if thanks_message is not None:
-            invoice_data['thanks_message'] = thanks_message
-        if description is not None:
-            invoice_data['description'] = description
-        if sandbox is not None:
-            invoice_data['sandbox'] = sandbox
+        view = copy.copy(self)
+        view._client = self._client.with_options(timeout=timeout, deadline=deadline)
+        return view
 
-        try:
-            response_data = self._client.request('POST', 'payment/invoice', json_data=invoice_data)
-            if raw_response:
-                return response_data
-            else:
-                return OrderStatus(**response_data["data"])
-        except Exception as e:
-            raise Exception(f"Error creating invoice: {e}")
-
-    def get_supported_currencies(self):
+    def for_merchant(self, merchant_api_key: str, rate_limiter: RateLimiter = None) -> 'SyncOxaPay':
         """
-        Retrieves a list of supported currencies and their network details.
+        Returns a client for another merchant key that reuses this client's connections. Retry policy,
+        circuit breaker, timeouts and serializer are shared too; the reference data cache and the
+        rate limiter are the new key's own. Closing either client closes the shared pool.
 
-        :return: A list of supported currencies with their details.
+        :param merchant_api_key: The other merchant's API key.
+        :param rate_limiter: The limiter pacing this key's requests. None disables client-side limiting.
+        :return: A new ``SyncOxaPay`` instance.
         """
-        try:
-            return self._client.request('GET', 'common/currencies')
-        except Exception:
-            raise Exception
+        client = copy.copy(self)
+        client.merchant_api_key = merchant_api_key
+        client._client = self._client.with_merchant(merchant_api_key, rate_limiter)
+        client._models = {}
+        client._cache = self._cache.empty_copy()
+        if self._validator is not None:
+            client._validator = SyncValidator()
+        return client
 
-    def get_supported_networks(self):
+    def invalidate_cache(self, endpoint: str = None):
         """
-        Retrieves a list of supported blockchain networks for cryptocurrency transactions.
+        Drops cached reference data so the next call fetches it again.
 
-        :return: A list of supported blockchain networks.
+        :param endpoint: Endpoint path to invalidate (e.g. 'common/currencies'). Defaults to all endpoints.
         """
-        try:
-            return self._client.request('GET', 'common/networks')
-        except Exception:
-            raise Exception
+        self._cache.invalidate(endpoint)
 
-    def get_supported_fiat_currencies(self):
+    def cache_stats(self, endpoint: str = None) -> CacheStats:
         """
-        Retrieves a list of supported fiat currencies and their details.
-
-        :return: A list of supported fiat currencies with their details.
+        :param endpoint: Endpoint path to report on. Defaults to the totals over all endpoints.
+        :return: Hit, stale hit, miss, refresh and error counters of the reference data cache.
         """
-        try:
-            return self._client.request('GET', 'common/fiats')
-        except Exception:
-            raise Exception
+        return self._cache.stats(endpoint)
 
-    def get_payment_information(self, track_id: int, raw_response: bool = False):
-        """
+    def _cached_model(self, endpoint: str, response_data: dict, build):
+        # Reference data is cached raw; its models are rebuilt only when the cached response changes.
+        memo = self._models.get(endpoint)
+        if memo is None or memo[0] is not response_data:
+            memo = self._models[endpoint] = (response_data, build(response_data['data']))
+        return memo[1]
 
-        :param track_id:
-        :param raw_response:
-        :return:
+    def get_api_status(self):
         """
+        Get the current status of the OxaPay API
+        :return: The API status information
+        """
+        breaker = self._client.circuit_breaker
         try:
-            response_data = self._client.request('GET', f'payment/{track_id}')
-            if raw_response:
-                return response_data
-            else:
-                return PaymentStatus(**response_data["data"])
-        except Exception:
-            raise Exception
-
-    def create_white_label_payment(
+            status = self._client.request('GET', 'common/monitor')
+        except OxaPayError:
+            if breaker is not None:
+                breaker.record_health(False)
+            raise
+        if breaker is not None:
+            breaker.record_health(_is_healthy(status))
+        return status
+
+    create_invoice = sync_method(CREATE_INVOICE)
+
+    def create_invoices_bulk(
             self,
-            amount: float,
-            pay_currency: str,
-            callback_url: str = None,
-            currency: str = None,
-            network: str = None,
-            lifetime: int = 60,
-            fee_paid_by_payer: float = None,
-            under_paid_coverage: float = None,
-            to_currency: str = None,
-            auto_withdrawal: bool = False,
-            email: str = None,
-            order_id: str = None,
-            description: str = None,
-            sandbox: bool = False
+            invoices,
+            concurrency: int = 10,
+            ordered: bool = False,
+            raw_response: bool = False,
+            deadline=None
     ):
         """
+        Creates many invoices on a thread pool with at most ``concurrency`` requests in flight.
+
+        Results are streamed back as an iterator of ``BulkResult`` objects. A failed invoice
+        is reported through ``BulkResult.error`` and does not stop the rest of the batch.
+        ``invoices`` is consumed lazily, so it may be a generator of any length.
 
-        :param amount:
-        :param pay_currency:
-        :param callback_url:
-        :param currency:
-        :param network:
-        :param lifetime:
-        :param fee_paid_by_payer:
-        :param under_paid_coverage:
-        :param to_currency:
-        :param auto_withdrawal:
-        :param email:
-        :param order_id:
-        :param description:
-        :param sandbox:
-        :return:
+        :param invoices: An iterable of dicts with ``create_invoice`` keyword arguments.
+        :param concurrency: Maximum number of simultaneous requests (worker threads).
+        :param ordered: If True, results are yielded in input order instead of completion order.
+        :param raw_response: Passed through to ``create_invoice``.
+        :param deadline: A ``Deadline`` or seconds from now shared by the whole batch; invoices not created in time fail with ``DeadlineExceededError``.
+        :return: An iterator of ``BulkResult``.
         """
-        payment_data = {
-            'amount': amount,
-            'pay_currency': pay_currency,
-            'callback_url': callback_url,
-            'currency': currency,
-            'network': network,
-            'lifetime': lifetime,
-            'fee_paid_by_payer': fee_paid_by_payer,
-            'under_paid_coverage': under_paid_coverage,
-            'to_currency': to_currency,
-            'auto_withdrawal': auto_withdrawal,
-            'email': email,
-            'order_id': order_id,
-            'description': description,
-            'sandbox': sandbox,
-        }
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1.')
+        client = self.with_options(deadline=deadline) if deadline is not None else self
+
+        def create(index, spec):
+            try:
+                return BulkResult(index, spec, client.create_invoice(**spec, raw_response=raw_response))
+            except Exception as e:
+                return BulkResult(index, spec, error=e)
+
+        items = enumerate(invoices)
+        exhausted = False
+        futures = set()
+        # Completed results held back in ordered mode; bounded so a slow head item cannot buffer the whole input.
+        buffered = {}
+        next_index = 0
+        executor = ThreadPoolExecutor(max_workers=concurrency)
         try:
-            return self._client.request('POST', 'payment/white-label', json_data=payment_data)
-        except Exception:
-            raise Exception
+            while True:
+                while not exhausted and len(futures) < concurrency and len(futures) + len(buffered) < 2 * concurrency:
+                    try:
+                        index, spec = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    futures.add(executor.submit(create, index, spec))
+                if not futures:
+                    return
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if ordered:
+                        buffered[result.index] = result
+                    else:
+                        yield result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-    def create_static_address(
-            self,
-            network: str,
-            to_currency: str = None,
-            auto_withdrawal: bool = False,
-            callback_url: str = None,
-            email: str = None,
-            order_id: str = None,
-            description: str = None,
-    ):
+    get_supported_currencies = sync_method(GET_SUPPORTED_CURRENCIES)
+    get_supported_networks = sync_method(GET_SUPPORTED_NETWORKS)
+    get_supported_fiat_currencies = sync_method(GET_SUPPORTED_FIAT_CURRENCIES)
+    get_payment_information = sync_method(GET_PAYMENT_INFORMATION)
+    create_white_label_payment = sync_method(CREATE_WHITE_LABEL_PAYMENT)
+    create_static_address = sync_method(CREATE_STATIC_ADDRESS)
+    revoke_static_wallet = sync_method(REVOKE_STATIC_WALLET)
+    get_static_address_list = sync_method(GET_STATIC_ADDRESS_LIST)
+    get_payment_history = sync_method(GET_PAYMENT_HISTORY)
+
+    def iter_payment_history(self, prefetch: int = 2, size: int = 200, deadline=None, raw_response: bool = False, **filters):
         """
+        Iterates over every payment matching the filters, one record at a time.
+
+        Pages are requested on demand; while the current page is being consumed the next
+        ``prefetch`` pages are already being fetched on background threads. Records created
+        while iterating may shift pages when sorting by newest first, so pin ``to_date`` or
+        use ``sort_type='asc'`` for a stable scan.
 
-        :param network:
-        :param to_currency:
-        :param auto_withdrawal:
-        :param callback_url:
-        :param email:
-        :param order_id:
-        :param description:
-        :return:
+        :param prefetch: Number of pages fetched ahead while the current one is consumed. At most ``prefetch + 1`` pages are held in memory.
+        :param size: Number of records per request. Possible values: from 1 to 200. Default: 200.
+        :param deadline: A ``Deadline`` or seconds from now shared by all page requests.
+        :param raw_response: Yield the records as raw dicts instead of ``PaymentStatus`` models.
+        :param filters: Any ``get_payment_history`` filter except ``page``.
+        :return: An iterator of payment records.
         """
-        static_address_data = {
-            'network': network,
-        }
-
-        if to_currency is not None:
-            static_address_data['to_currency'] = to_currency
-        if auto_withdrawal is not None:
-            static_address_data['auto_withdrawal'] = auto_withdrawal
-        if callback_url is not None:
-            static_address_data['callback_url'] = callback_url
-        if email is not None:
-            static_address_data['email'] = email
-        if order_id is not None:
-            static_address_data['order_id'] = order_id
-        if description is not None:
-            static_address_data['description'] = description
+        return self._iter_pages('get_payment_history', PaymentStatus.from_dict, prefetch, size, deadline, raw_response, filters)
 
-        try:
-            return self._client.request('POST', 'payment/static-address', json_data=static_address_data)
-        except Exception:
-            raise Exception
+    def iter_static_addresses(self, prefetch: int = 2, size: int = 200, deadline=None, raw_response: bool = False, **filters):
+        """
+        Iterates over every static address matching the filters, fetching up to ``prefetch`` pages ahead.
 
-    def revoke_static_wallet(self, address: str):
+        :param prefetch: Number of pages fetched ahead while the current one is consumed.
+        :param size: Number of records per request. Possible values: from 1 to 200. Default: 200.
+        :param deadline: A ``Deadline`` or seconds from now shared by all page requests.
+        :param raw_response: Yield the records as raw dicts instead of ``StaticAddress`` models.
+        :param filters: Any ``get_static_address_list`` filter except ``page``.
+        :return: An iterator of static addresses.
         """
-        Revokes a static wallet by disabling further transactions to the specified address.
+        return self._iter_pages('get_static_address_list', StaticAddress.from_dict, prefetch, size, deadline, raw_response, filters)
 
-        :param address: The address of the static wallet to revoke.
-        :return: The result of the revocation process.
+    def _iter_pages(self, method: str, model, prefetch: int, size: int, deadline, raw_response: bool, filters: dict):
+        """
+        Pages through a paginated endpoint; see ``iter_payment_history``.
         """
-        data = {
-            'address': address
-        }
+        if prefetch < 0:
+            raise ValueError('prefetch must not be negative.')
+        client = self.with_options(deadline=deadline) if deadline is not None else self
+
+        fetch_page = getattr(client, method)
+        executor = ThreadPoolExecutor(max_workers=max(prefetch, 1))
+
+        def fetch(page):
+            return executor.submit(fetch_page, page=page, size=size, raw_response=True, **filters)
+
+        pending = deque()
         try:
-            return self._client.request('POST', 'payment/static-address/revoke', json_data=data)
-        except Exception:
-            raise Exception
+            records, last_page = _parse_page(fetch_page(page=1, size=size, raw_response=True, **filters), 1, size)
+            next_page = 2
+            while True:
+                while next_page <= last_page and len(pending) < prefetch:
+                    pending.append((next_page, fetch(next_page)))
+                    next_page += 1
+                if not raw_response:
+                    records = [model(record) for record in records]
+                for record in records:
+                    yield record
+                if not pending:
+                    if next_page > last_page:
+                        return
+                    pending.append((next_page, fetch(next_page)))
+                    next_page += 1
+                page, future = pending.popleft()
+                records, page_last = _parse_page(future.result(), page, size)
+                if not records:
+                    return
+                last_page = max(last_page, page_last)
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    get_accepted_currencies = sync_method(GET_ACCEPTED_CURRENCIES)
+    get_prices = sync_method(GET_PRICES)
 
-    def get_static_address_list(self):
+    def history_mirror(self, path: str = ':memory:', rescan_window: float = 86400.0) -> SyncHistoryMirror:
         """
+        Creates a local SQLite mirror of the payment history. Call ``mirror.sync()`` periodically
+        to pull new payments and status changes, and ``mirror.query(...)`` to read it with
+        ``get_payment_history``'s filters without touching the API.
 
-        :return:
+        :param path: SQLite database file; reopening the same file resumes from its last sync. Defaults to an in-memory database.
+        :param rescan_window: Seconds back from now within which open payments are re-checked by rescanning the history.
+        :return: A ``SyncHistoryMirror``.
         """
-        try:
-            return self._client.request('GET', 'payment/static-address')
-        except Exception:
-            raise Exception
+        return SyncHistoryMirror(self, HistoryStore(path), rescan_window=rescan_window)
+
+    def address_index(self, page_size: int = 200, **filters) -> SyncAddressIndex:
+        """
+        Creates an in-memory index of the merchant's static addresses for O(1) membership tests and
+        lookups by address or order id. Call ``index.sync()`` to update it; each sync returns an
+        ``AddressDiff`` of the addresses added and revoked since the previous one, and usually costs
+        a single request.
 
-    def get_payment_history(
+        :param page_size: Number of addresses per request. Possible values: from 1 to 200.
+        :param filters: ``get_static_address_list`` filters limiting the indexed set, e.g. ``network``.
+        :return: An empty ``SyncAddressIndex``.
+        """
+        return SyncAddressIndex(self, page_size=page_size, **filters)
+
+    def address_pool(
             self,
-            track_id: int = None,
-            type_: str = None,
-            status: str = None,
-            pay_currency: str = None,
-            currency: str = None,
-            network: str = None,
-            address: str = None,
-            from_date: int = None,
-            to_date: int = None,
-            from_amount: float = None,
-            to_amount: float = None,
-            sort_by: str = 'create_date',
-            sort_type: str = 'desc',
-            page: int = 1,
-            size: int = 10,
-    ):
+            reserve: dict,
+            lease_ttl: float = 86400.0,
+            sweep_interval: float = 60.0,
+            concurrency: int = 4,
+            **address_options
+    ) -> SyncAddressPool:
         """
-        Retrieves the payment history based on specified filters.
-
-        :param track_id: Filter payments by a specific invoice ID. Defaults to None.
-        :param type_: Filter payments by type (e.g., 'Invoice', 'White-Label', 'Static Wallet'). Defaults to None.
-        :param status: Filter payments by status (e.g., 'Paid', 'Confirming'). Defaults to None.
-        :param pay_currency: Filter payments by a specific crypto currency symbol in which the pay amount is specified. Defaults to None.
-        :param currency: Filter payments by a specific currency symbol. Defaults to None.
-        :param network: Filter payments by the expected blockchain network for the specified crypto currency. Defaults to None.
-        :param address: Filter payments by the expected address. It’s better to filter static addresses. Defaults to None.
-        :param from_date: The start of the date window to query for payments in Unix format. Defaults to None.
-        :param to_date: The end of the date window to query for payments in Unix format. Defaults to None.
-        :param from_amount: Filter payments with amounts greater than or equal to the specified value. Defaults to None.
-        :param to_amount: Filter payments with amounts less than or equal to the specified value. Defaults to None.
-        :param sort_by: Sort the received list by a parameter. Possible values: 'create_date', 'pay_date', 'amount'. Default: 'create_date'.
-        :param sort_type: Display the list in ascending or descending order. Possible values: 'asc', 'desc'. Default: 'desc'.
-        :param page: The page number of the results to retrieve. Possible values: from 1 to the total number of pages. Default: 1.
-        :param size: Number of records to display per page. Possible values: from 1 to 200. Default: 10.
-        :return: The payment history.
+        Creates a pool that keeps pre-created static addresses ready per network, so handing one to a
+        customer takes no request. Use it as ``with client.address_pool(...) as pool`` and lease addresses with ``pool.lease(network, order_id)``.
+
+        :param reserve: Number of unleased addresses kept ready per network, e.g. ``{'TRC20': 20}``.
+        :param lease_ttl: Default seconds a lease lasts before its address is revoked. None keeps leases until released.
+        :param sweep_interval: Seconds between background sweeps revoking expired leases.
+        :param concurrency: Maximum number of simultaneous create or revoke requests.
+        :param address_options: ``create_static_address`` arguments used for every address, e.g. ``callback_url``.
+        :return: A not yet started ``SyncAddressPool``.
         """
-        data = {
-            'track_id': track_id,
-            'type': type_,
-            'status': status,
-            'pay_currency': pay_currency,
-            'currency': currency,
-            'network': network,
-            'address': address,
-            'from_date': from_date,
-            'to_date': to_date,
-            'from_amount': from_amount,
-            'to_amount': to_amount,
-            'sort_by': sort_by,
-            'sort_type': sort_type,
-            'page': page,
-            'size': size,
-        }
-
-        query_params = {k: v for k, v in data.items() if v is not None}
-        try:
-            return self._client.request('GET', 'payment', query_params=query_params)
-        except Exception:
-            raise Exception
+        return SyncAddressPool(
+            self, reserve, lease_ttl=lease_ttl, sweep_interval=sweep_interval, concurrency=concurrency, **address_options
+        )
 
-    def get_accepted_currencies(self):
-        try:
-            return self._client.request('GET', 'payment/accepted-currencies')
-        except Exception:
-            raise Exception
+    def price_feed(self, interval: float = 10.0, stale_after: float = None) -> SyncPriceFeed:
+        """
+        Creates a price feed that polls ``get_prices`` in the background.
+        Use it as ``with client.price_feed() as feed`` or call ``start()``/``stop()``.
 
-    def get_prices(self):
-        try:
-            return self._client.request('GET', 'common/prices')
-        except Exception:
-            raise Exception
+        :param interval: Seconds between polls.
+        :param stale_after: Age in seconds after which the snapshot counts as stale. Defaults to three intervals.
+        :return: A not yet started ``SyncPriceFeed``.
+        """
+        return SyncPriceFeed(self, interval=interval, stale_after=stale_after)
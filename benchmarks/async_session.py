@@ -0,0 +1,62 @@
+"""
+Compares a session per request (the old ``AsyncClient`` behaviour) with the pooled session.
+
+    python -m oxapay_api.benchmarks.async_session --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+from ..AsyncOxaPay import AsyncOxaPay
+from .stub_server import start_server
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run(call, total: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return total / elapsed, _percentile(latencies, 50) * 1000, _percentile(latencies, 99) * 1000
+
+
+async def main(total: int, concurrency: int):
+    runner, base_url = await start_server()
+    headers = {'merchant_api_key': 'bench', 'Content-Type': 'application/json'}
+    payload = {'amount': 10, 'lifetime': 60, 'auto_withdrawal': False}
+
+    async def per_request_session():
+        async with aiohttp.ClientSession(headers=headers) as session:
+            async with session.post(f'{base_url}/payment/invoice', json=payload) as response:
+                await response.json()
+
+    try:
+        async with AsyncOxaPay('bench', base_url=base_url) as client:
+            pooled = lambda: client.create_invoice(amount=10, raw_response=True)  # noqa: E731
+            for name, call in (('session per request', per_request_session), ('pooled session', pooled)):
+                rps, p50, p99 = await _run(call, total, concurrency)
+                print(f'{name:<22} {rps:>9.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
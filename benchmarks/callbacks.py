@@ -0,0 +1,56 @@
+"""
+Measures callback signature verification plus parsing throughput.
+
+    python -m oxapay_api.benchmarks.callbacks --callbacks 50000
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import time
+
+from ..utils.callbacks import CallbackHandler, CallbackVerifier
+
+_SECRET = 'bench-merchant-key'
+
+
+def _payloads(count: int):
+    for i in range(count):
+        body = json.dumps({
+            'track_id': str(300000000 + i),
+            'status': 'Paid',
+            'type': 'invoice',
+            'amount': 25.5,
+            'currency': 'USDT',
+            'order_id': f'ORD-{i}',
+            'email': 'customer@example.com',
+            'description': 'Subscription renewal',
+            'date': 1700000000 + i,
+            'txs': [{'tx_hash': f'0x{i:064x}', 'amount': 25.5, 'currency': 'USDT', 'network': 'TRON', 'status': 'confirmed'}],
+        }).encode()
+        yield body, hmac.new(_SECRET.encode(), body, hashlib.sha512).hexdigest()
+
+
+def main(count: int):
+    payloads = list(_payloads(count))
+    verifier = CallbackVerifier(_SECRET)
+
+    started = time.perf_counter()
+    for body, signature in payloads:
+        verifier.parse(body, signature)
+    elapsed = time.perf_counter() - started
+    print(f'verify + parse        {count / elapsed:>10.0f} callbacks/s   {elapsed / count * 1e6:6.1f} us each')
+
+    events = []
+    handler = CallbackHandler(_SECRET, on_event=events.append)
+    started = time.perf_counter()
+    for body, signature in payloads:
+        handler.handle(body, signature)
+    elapsed = time.perf_counter() - started
+    print(f'full handler + dedup  {count / elapsed:>10.0f} callbacks/s   {elapsed / count * 1e6:6.1f} us each')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--callbacks', type=int, default=50000)
+    main(parser.parse_args().callbacks)
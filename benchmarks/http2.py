@@ -0,0 +1,101 @@
+"""
+Compares the async client over HTTP/1.1 (aiohttp, one connection per in-flight call) with HTTP/2
+(httpx, calls multiplexed over few connections) at high concurrency, against the stub server
+served by hypercorn in a child process.
+
+Reports throughput, p50/p99/p99.9 latency of the individual API calls and the number of
+connections the server saw. Needs ``httpx[http2]`` and ``hypercorn``. Run from the directory
+containing the package::
+
+    python -m oxapay_api.benchmarks.http2 --requests 5000 --concurrency 300 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..clients.AsyncClient import HttpxTransport
+from ..clients.instrumentation import RequestHooks
+from .stub_server import start_server_process
+
+
+class _Latencies(RequestHooks):
+    def __init__(self):
+        self.samples = []
+        self.errors = 0
+
+    def after_request(self, event):
+        self.samples.append(event.elapsed)
+        self.errors += event.error is not None
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _connections(base_url: str) -> dict:
+    root = base_url.rsplit('/v1', 1)[0]
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f'{root}/_stub/connections') as response:
+            return await response.json()
+
+
+async def _checkout(client: AsyncOxaPay, i: int):
+    # Half the calls create invoices, half look them up, as on a checkout node.
+    order = await client.create_invoice(amount=10, currency='USD', order_id=f'bench-{i}')
+    await client.get_payment_information(int(order.track_id))
+
+
+async def _scenario(name: str, base_url: str, total: int, concurrency: int, limit: int, **options):
+    latencies = _Latencies()
+    before = await _connections(base_url)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncOxaPay('bench', base_url=base_url, limit=limit, hooks=latencies, **options) as client:
+
+        async def one(i):
+            async with semaphore:
+                await _checkout(client, i)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total // 2)), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    after = await _connections(base_url)
+    samples = latencies.samples
+    versions = {version: count - before['requests'].get(version, 0) for version, count in after['requests'].items()}
+    print(
+        f'{name:<10} {len(samples) / elapsed:>7.0f} req/s   {latencies.errors:>4} failed   '
+        f'p50 {_percentile(samples, 50) * 1000:7.2f} ms   p99 {_percentile(samples, 99) * 1000:7.2f} ms   '
+        f'p99.9 {_percentile(samples, 99.9) * 1000:7.2f} ms   '
+        f'{after["connections"] - before["connections"]:>4} connections   '
+        f'{", ".join(f"HTTP/{v}: {n}" for v, n in sorted(versions.items()) if n)}'
+    )
+
+
+def main(total: int, concurrency: int, limit: int, port: int, **server_options):
+    process, base_url = start_server_process(port=port, http2=True, **server_options)
+    try:
+        async def run():
+            await _scenario('HTTP/1.1', base_url, total, concurrency, limit)
+            # The stub has no TLS to negotiate HTTP/2 with, so it is spoken directly.
+            await _scenario('HTTP/2', base_url, total, concurrency, limit,
+                            transport=HttpxTransport(limit=limit, http1=False))
+        asyncio.run(run())
+    finally:
+        process.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=300)
+    parser.add_argument('--limit', type=int, default=0, help='Connection limit of the clients; 0 means no limit.')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency, args.limit, args.port, latency=args.latency,
+         error_rate=args.error_rate, throttle_rate=args.throttle_rate)
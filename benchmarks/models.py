@@ -0,0 +1,70 @@
+"""
+Compares parsing a large synthetic payment history into plain dataclasses (the previous
+models) and into the slotted response models, for throughput and retained memory.
+
+The dataclasses take the JSON values as they are and fail on any field they do not know; the
+slotted models check and convert every field's type and ignore unknown fields, which costs
+some throughput. Amounts are converted to ``Decimal`` only when read.
+
+    python -m oxapay_api.benchmarks.models --records 200000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from ..utils.response_models import PaymentStatus
+from .stub_server import _synthetic_payment
+
+
+@dataclass
+class _DataclassPaymentStatus:
+    track_id: str
+    type: str
+    amount: int
+    currency: str
+    status: str
+    mixed_payment: bool
+    fee_paid_by_payer: int
+    under_paid_coverage: float
+    lifetime: int
+    callback_url: str
+    return_url: str
+    email: str
+    order_id: str
+    description: str
+    thanks_message: str
+    expired_at: int
+    date: int
+    txs: list
+    address: str
+
+
+def _measure(name: str, parse, records: list):
+    gc.collect()
+    started = time.perf_counter()
+    parsed = [parse(record) for record in records]
+    elapsed = time.perf_counter() - started
+    del parsed
+    gc.collect()
+
+    tracemalloc.start()
+    parsed = [parse(record) for record in records]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    print(f'{name:<24} {len(records) / elapsed:>10.0f} records/s   {retained / len(records):7.0f} bytes/record')
+
+
+def main(count: int):
+    now = int(time.time())
+    records = [_synthetic_payment(i, now) for i in range(count)]
+    _measure('dataclass(**record)', lambda record: _DataclassPaymentStatus(**record), records)
+    _measure('PaymentStatus.from_dict', PaymentStatus.from_dict, records)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=200000)
+    main(parser.parse_args().records)
@@ -0,0 +1,69 @@
+"""
+Checkout flows per second against the in-process ``MockAPI``: no server and no sockets, so it
+measures the clients' own overhead. Each flow creates a sandbox invoice, fast-forwards the
+simulated clock and polls the payment until it is paid.
+
+    python -m oxapay_api.benchmarks.offline --flows 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+
+
+def _sync_flow(client: SyncOxaPay, api: MockAPI, i: int):
+    order = client.create_invoice(amount=10, currency='USD', order_id=f'flow-{i}', sandbox=True)
+    api.advance(api.sandbox_pay_after + api.confirm_after)
+    assert client.get_payment_information(int(order.track_id)).status == 'paid'
+
+
+async def _async_flow(client: AsyncOxaPay, api: MockAPI, i: int):
+    order = await client.create_invoice(amount=10, currency='USD', order_id=f'flow-{i}', sandbox=True)
+    api.advance(api.sandbox_pay_after + api.confirm_after)
+    assert (await client.get_payment_information(int(order.track_id))).status == 'paid'
+
+
+def _report(name: str, flows: int, elapsed: float, api: MockAPI):
+    print(f'{name:<16} {flows / elapsed:>9.0f} flows/s   {sum(api.requests.values()) / elapsed:>9.0f} req/s')
+
+
+def main(flows: int, concurrency: int):
+    api = MockAPI()
+    with SyncOxaPay('bench', transport=MockTransport(api)) as client:
+        started = time.perf_counter()
+        for i in range(flows):
+            _sync_flow(client, api, i)
+        _report('sync', flows, time.perf_counter() - started, api)
+
+    api = MockAPI()
+    with SyncOxaPay('bench', transport=MockTransport(api)) as client, ThreadPoolExecutor(concurrency) as executor:
+        started = time.perf_counter()
+        list(executor.map(lambda i: _sync_flow(client, api, i), range(flows)))
+        _report('sync threaded', flows, time.perf_counter() - started, api)
+
+    async def run_async():
+        api = MockAPI()
+        async with AsyncOxaPay('bench', transport=AsyncMockTransport(api)) as client:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(i):
+                async with semaphore:
+                    await _async_flow(client, api, i)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(flows)))
+            _report('async', flows, time.perf_counter() - started, api)
+
+    asyncio.run(run_async())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--flows', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+    main(args.flows, args.concurrency)
@@ -0,0 +1,52 @@
+"""
+Compares the installed JSON backends on the two hottest payloads: a 200-record payment history
+page and a full price table. Decoding is measured alone and followed by model parsing.
+
+    python -m oxapay_api.benchmarks.serializers --iterations 2000
+"""
+import argparse
+import time
+
+from ..clients.serializers import StdlibSerializer, OrjsonSerializer, MsgspecSerializer
+from ..utils.response_models import PaymentHistory, _parse_prices
+from .stub_server import _synthetic_payment
+
+
+def _available():
+    for backend in (StdlibSerializer, OrjsonSerializer, MsgspecSerializer):
+        try:
+            yield backend()
+        except ImportError:
+            print(f'{backend.name:<8} not installed, skipped')
+
+
+def _rate(call, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return iterations / (time.perf_counter() - started)
+
+
+def main(iterations: int):
+    now = int(time.time())
+    history = {'data': {'list': [_synthetic_payment(i, now) for i in range(200)],
+                        'meta': {'page': 1, 'last_page': 50, 'total': 10000}}, 'status': 200}
+    prices = {'data': {f'C{i:03d}': 1000 / (i + 1) for i in range(400)}, 'status': 200}
+    reference = StdlibSerializer()
+    history_bytes, prices_bytes = reference.dumps(history), reference.dumps(prices)
+
+    print(f'{"backend":<8} {"history decode":>16} {"history models":>16} {"prices decode":>15} {"prices parsed":>15} {"history encode":>16}')
+    for serializer in _available():
+        loads = serializer.loads
+        print(f'{serializer.name:<8}'
+              f' {_rate(lambda: loads(history_bytes), iterations):>11.0f} op/s'
+              f' {_rate(lambda: PaymentHistory.from_dict(loads(history_bytes)["data"]), iterations):>11.0f} op/s'
+              f' {_rate(lambda: loads(prices_bytes), iterations):>10.0f} op/s'
+              f' {_rate(lambda: _parse_prices(loads(prices_bytes)), iterations):>10.0f} op/s'
+              f' {_rate(lambda: serializer.dumps(history), iterations):>11.0f} op/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    main(parser.parse_args().iterations)
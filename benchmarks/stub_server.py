@@ -0,0 +1,218 @@
+"""
+Local stand-in for the OxaPay API used by the benchmarks.
+
+Serves a ``MockAPI`` over HTTP, with configurable latency, server errors and 429s.
+Run from the directory containing the package::
+
+    python -m oxapay_api.benchmarks.stub_server --port 8089 --latency 0.05 --error-rate 0.01 --throttle-rate 0.02
+
+``--http2`` serves it with hypercorn instead of aiohttp, speaking HTTP/1.1 and HTTP/2 (without TLS)
+on the same port, and counts the client connections at ``/_stub/connections``.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import socket
+import time
+from collections import Counter
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+try:
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config as HypercornConfig
+except ImportError:  # pragma: no cover - optional dependency
+    hypercorn_serve = None
+
+from ..clients.mock_transport import MockAPI, _synthetic_payment  # noqa: F401 - re-exported for the benchmarks
+
+
+def _handler(api: MockAPI):
+    async def handle(request):
+        body = await request.json() if request.method == 'POST' and request.can_read_body else None
+        path = request.path[len('/v1/'):]
+        status, payload, headers = api.handle(request.method, path, dict(request.query), body, request.headers)
+        return web.json_response(payload, status=status, headers=headers)
+    return handle
+
+
+def build_app(
+        latency: float = 0.0,
+        history_size: int = 1000,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = None,
+        lost_response_rate: float = 0.0,
+) -> web.Application:
+    """
+    :param latency: Seconds every response is delayed by, to emulate a remote API.
+    :param history_size: Number of synthetic payments served by the payment history endpoint.
+    :param error_rate: Fraction of requests answered with a 500.
+    :param throttle_rate: Fraction of requests answered with a 429 and a ``Retry-After`` header.
+    :param retry_after: Seconds sent in ``Retry-After`` with the 429s.
+    :param seed: Seed of the random error injection, for repeatable runs.
+    :param lost_response_rate: Fraction of payment creations that are carried out but answered with a 504,
+        as when a gateway times out after the API committed the payment.
+    """
+    api = MockAPI(history_size, error_rate=error_rate, throttle_rate=throttle_rate, retry_after=retry_after,
+                  lost_response_rate=lost_response_rate, seed=seed)
+    requests = Counter()
+
+    @web.middleware
+    async def emulate(request, handler):
+        requests[request.path] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        return await handler(request)
+
+    app = web.Application(middlewares=[emulate])
+    app['requests'] = requests
+    app['api'] = api
+    app.router.add_route('*', '/v1/{path:.*}', _handler(api))
+    return app
+
+
+def build_asgi_app(
+        latency: float = 0.0,
+        history_size: int = 1000,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = None,
+        lost_response_rate: float = 0.0,
+):
+    """
+    The stub as an ASGI application, for servers that speak HTTP/2. ``GET /_stub/connections``
+    reports the number of client connections seen and the requests per HTTP version.
+
+    The parameters are those of ``build_app``.
+    """
+    api = MockAPI(history_size, error_rate=error_rate, throttle_rate=throttle_rate, retry_after=retry_after,
+                  lost_response_rate=lost_response_rate, seed=seed)
+    # The client address and port identify the connection a request came on.
+    peers = set()
+    versions = Counter()
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        path = scope['path']
+        if path == '/_stub/connections':
+            status, payload, headers = 200, {'connections': len(peers), 'requests': dict(versions)}, {}
+        else:
+            peers.add(tuple(scope['client'] or ()))
+            versions[scope['http_version']] += 1
+            if latency:
+                await asyncio.sleep(latency)
+            query = dict(parse_qsl(scope['query_string'].decode()))
+            request_headers = {name.decode(): value.decode() for name, value in scope['headers']}
+            status, payload, headers = api.handle(scope['method'], path[len('/v1/'):], query,
+                                                  json.loads(body) if body else None, request_headers)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json')] + [(name.lower().encode(), str(value).encode())
+                                                                   for name, value in headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': json.dumps(payload).encode()})
+
+    return app
+
+
+async def start_server(host: str = '127.0.0.1', port: int = 0, **options):
+    """
+    Starts the stub server in the running loop.
+
+    :param options: Any ``build_app`` argument.
+    :return: The ``AppRunner`` (call ``cleanup()`` to stop) and the base URL to point clients at.
+    """
+    runner = web.AppRunner(build_app(**options), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://{host}:{bound_port}/v1'
+
+
+def _serve(host: str, port: int, options: dict):
+    web.run_app(build_app(**options), host=host, port=port, access_log=None, print=None)
+
+
+def _serve_http2(host: str, port: int, options: dict):
+    config = HypercornConfig()
+    config.bind = [f'{host}:{port}']
+    config.accesslog = None
+    asyncio.run(hypercorn_serve(build_asgi_app(**options), config))
+
+
+def start_server_process(host: str = '127.0.0.1', port: int = 8089, http2: bool = False, **options):
+    """
+    Starts the stub server in a child process, so it does not compete with the client for the GIL.
+
+    :param http2: Serve with hypercorn, which also speaks HTTP/2; needs the hypercorn package.
+    :param options: Any ``build_app`` argument.
+    :return: The ``multiprocessing.Process`` (call ``terminate()`` to stop) and the base URL.
+    """
+    if http2 and hypercorn_serve is None:
+        raise ImportError('The HTTP/2 stub server requires the hypercorn package.')
+    target = _serve_http2 if http2 else _serve
+    process = multiprocessing.Process(target=target, args=(host, port, options), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline or not process.is_alive():
+                process.terminate()
+                raise RuntimeError(f'Stub server did not start on {host}:{port}.')
+            time.sleep(0.05)
+    return process, f'http://{host}:{port}/v1'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--history-size', type=int, default=1000)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--lost-response-rate', type=float, default=0.0)
+    parser.add_argument('--http2', action='store_true')
+    args = parser.parse_args()
+    if args.http2:
+        if hypercorn_serve is None:
+            parser.error('--http2 requires the hypercorn package.')
+        _serve_http2(args.host, args.port, {
+            'latency': args.latency, 'history_size': args.history_size, 'error_rate': args.error_rate,
+            'throttle_rate': args.throttle_rate, 'retry_after': args.retry_after, 'seed': args.seed,
+            'lost_response_rate': args.lost_response_rate,
+        })
+    else:
+        web.run_app(
+            build_app(args.latency, args.history_size, args.error_rate, args.throttle_rate, args.retry_after,
+                      args.seed, args.lost_response_rate),
+            host=args.host, port=args.port, access_log=None,
+        )
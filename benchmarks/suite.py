@@ -0,0 +1,164 @@
+"""
+Benchmark suite: sync vs async clients, single vs bulk invoice creation, and cached vs uncached
+reference data, against the stub server running in a child process.
+
+Reports throughput, p50/p99 latency of the individual API calls and the peak traced memory
+of each scenario. Run from the directory containing the package::
+
+    python -m oxapay_api.benchmarks.suite --requests 1000 --concurrency 20 --latency 0.01
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.exceptions import OxaPayError
+from ..clients.instrumentation import RequestHooks
+from .stub_server import start_server_process
+
+
+class _Latencies(RequestHooks):
+    def __init__(self):
+        self.samples = []
+        self.errors = 0
+
+    def after_request(self, event):
+        self.samples.append(event.elapsed)
+        self.errors += event.error is not None
+
+
+def _invoices(total: int) -> list:
+    return [{'amount': 10, 'currency': 'USD', 'lifetime': 60, 'order_id': f'bench-{i}'} for i in range(total)]
+
+
+def _ignore_api_errors(call, *args, **kwargs):
+    try:
+        return call(*args, **kwargs)
+    except OxaPayError:
+        return None
+
+
+async def _ignore_api_errors_async(awaitable):
+    try:
+        return await awaitable
+    except OxaPayError:
+        return None
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _sync_scenarios(total: int, concurrency: int):
+    invoices = _invoices(total)
+
+    def single(client):
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(lambda invoice: _ignore_api_errors(client.create_invoice, raw_response=True, **invoice), invoices))
+
+    def bulk(client):
+        for _ in client.create_invoices_bulk(invoices, concurrency=concurrency, raw_response=True):
+            pass
+
+    def reference(client):
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(lambda _: _ignore_api_errors(client.get_supported_currencies), range(total)))
+
+    return [
+        ('sync single invoices', {}, single),
+        ('sync bulk invoices', {}, bulk),
+        ('sync currencies uncached', {'cache_ttls': {'common/currencies': 0}}, reference),
+        ('sync currencies cached', {}, reference),
+    ]
+
+
+def _async_scenarios(total: int, concurrency: int):
+    invoices = _invoices(total)
+
+    async def gather_limited(make, items):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(item):
+            async with semaphore:
+                await _ignore_api_errors_async(make(item))
+        await asyncio.gather(*(one(item) for item in items))
+
+    async def single(client):
+        await gather_limited(lambda invoice: client.create_invoice(raw_response=True, **invoice), invoices)
+
+    async def bulk(client):
+        async for _ in client.create_invoices_bulk(invoices, concurrency=concurrency, raw_response=True):
+            pass
+
+    async def reference(client):
+        await gather_limited(lambda _: client.get_supported_currencies(), range(total))
+
+    return [
+        ('async single invoices', {}, single),
+        ('async bulk invoices', {}, bulk),
+        ('async currencies uncached', {'cache_ttls': {'common/currencies': 0}}, reference),
+        ('async currencies cached', {}, reference),
+    ]
+
+
+def _run_sync(base_url: str, options: dict, scenario, concurrency: int):
+    latencies = _Latencies()
+    with SyncOxaPay('bench', base_url=base_url, pool_maxsize=concurrency, hooks=latencies, **options) as client:
+        started = time.perf_counter()
+        scenario(client)
+        return time.perf_counter() - started, latencies
+
+
+def _run_async(base_url: str, options: dict, scenario, concurrency: int):
+    async def run():
+        latencies = _Latencies()
+        async with AsyncOxaPay('bench', base_url=base_url, limit=concurrency, hooks=latencies, **options) as client:
+            started = time.perf_counter()
+            await scenario(client)
+            return time.perf_counter() - started, latencies
+    return asyncio.run(run())
+
+
+def _report(name: str, total: int, elapsed: float, latencies: _Latencies, peak: int):
+    samples = latencies.samples
+    print(f'{name:<28} {total / elapsed:>9.0f} ops/s   {len(samples):>6} calls {latencies.errors:>5} failed'
+          f'   p50 {_percentile(samples, 50) * 1000:7.2f} ms   p99 {_percentile(samples, 99) * 1000:7.2f} ms'
+          f'   peak {peak / 1024:8.0f} KiB')
+
+
+def main(total: int, concurrency: int, port: int, **server_options):
+    process, base_url = start_server_process(port=port, **server_options)
+    try:
+        runs = [(name, options, scenario, _run_sync) for name, options, scenario in _sync_scenarios(total, concurrency)]
+        runs += [(name, options, scenario, _run_async) for name, options, scenario in _async_scenarios(total, concurrency)]
+        for name, options, scenario, run in runs:
+            elapsed, latencies = run(base_url, options, scenario, concurrency)
+            # Memory is measured in a second run: tracing allocations would distort the timings.
+            tracemalloc.start()
+            run(base_url, options, scenario, concurrency)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _report(name, total, elapsed, latencies, peak)
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.05)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency, args.port, latency=args.latency, error_rate=args.error_rate,
+         throttle_rate=args.throttle_rate, retry_after=args.retry_after)
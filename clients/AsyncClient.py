@@ -1,39 +1,446 @@
+import asyncio
+import copy
+import time
+
 import aiohttp
-from .constants.api_constants import _GENERAL_API_URL, _METHODS
+from .constants.api_constants import _GENERAL_API_URL, _METHODS, _HEALTH_ENDPOINT
+from .exceptions import (
+    TransportError, RequestTimeoutError, InvalidResponseError, CircuitOpenError, _error_for_status, _parse_error_body,
+)
+from .instrumentation import RequestEvent, RequestHooks, _chain
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy, CircuitBreaker, _parse_retry_after
+from .serializers import get_serializer
+from .timeouts import Timeout, Deadline, DeadlineExceededError, _call_deadline, _cap
+from .transport import AsyncTransport, TransportResponse
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+try:
+    import h2
+except ImportError:  # pragma: no cover - optional dependency
+    h2 = None
+
+
+def _trace_event(trace_config_ctx) -> RequestEvent:
+    return trace_config_ctx.trace_request_ctx
+
+
+async def _on_request_start(session, trace_config_ctx, params):
+    trace_config_ctx.request_started = time.monotonic()
+
+
+async def _on_request_end(session, trace_config_ctx, params):
+    event = _trace_event(trace_config_ctx)
+    if event is not None:
+        event._add_timing('ttfb', time.monotonic() - trace_config_ctx.request_started)
+
+
+def _phase_callbacks(phase: str):
+    async def on_start(session, trace_config_ctx, params):
+        setattr(trace_config_ctx, phase, time.monotonic())
+
+    async def on_end(session, trace_config_ctx, params):
+        event = _trace_event(trace_config_ctx)
+        if event is not None:
+            event._add_timing(phase, time.monotonic() - getattr(trace_config_ctx, phase))
+    return on_start, on_end
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    """
+    Feeds the timings aiohttp reports into the ``RequestEvent`` passed as ``trace_request_ctx``.
+    aiohttp reports TLS as part of the connection phase.
+    """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    for phase, start, end in (
+            ('pool_wait', trace_config.on_connection_queued_start, trace_config.on_connection_queued_end),
+            ('dns', trace_config.on_dns_resolvehost_start, trace_config.on_dns_resolvehost_end),
+            ('connect', trace_config.on_connection_create_start, trace_config.on_connection_create_end),
+    ):
+        on_start, on_end = _phase_callbacks(phase)
+        start.append(on_start)
+        end.append(on_end)
+    return trace_config
+
+
+class AiohttpTransport(AsyncTransport):
+    """
+    The default transport of ``AsyncClient``: a lazily created ``aiohttp.ClientSession``, shared by
+    a client and its ``with_options``/``with_merchant`` copies.
+    """
+    errors = (aiohttp.ClientError, asyncio.TimeoutError)
+    timeout_errors = (asyncio.TimeoutError,)
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 0, keepalive_timeout: float = 30,
+                 ttl_dns_cache: int = 300, trace: bool = False):
+        """
+        :param limit: Total number of simultaneous connections in the pool. 0 means no limit.
+        :param limit_per_host: Number of simultaneous connections to the same host. 0 means no limit.
+        :param keepalive_timeout: Seconds an idle connection is kept open for reuse.
+        :param ttl_dns_cache: Seconds resolved addresses are cached. None caches forever.
+        :param trace: Report aiohttp's connection timings to the ``RequestEvent`` passed to ``send``.
+        """
+        self._connector_options = {
+            'limit': limit,
+            'limit_per_host': limit_per_host,
+            'keepalive_timeout': keepalive_timeout,
+            'ttl_dns_cache': ttl_dns_cache,
+        }
+        self._session_options = {'trace_configs': [_trace_config()]} if trace else {}
+        self._session = None
+        self._loop = None
+
+    async def _get(self) -> aiohttp.ClientSession:
+        """
+        Returns the pooled session, creating it on first use.
+
+        The session is bound to the event loop it was created in, so a new one is
+        opened if the client is reused from a different loop (e.g. a second ``asyncio.run``).
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            stale, stale_loop = self._session, self._loop
+            connector = aiohttp.TCPConnector(**self._connector_options)
+            self._session = aiohttp.ClientSession(connector=connector, **self._session_options)
+            self._loop = loop
+            if stale is not None and not stale.closed:
+                await self._close_stale(stale, stale_loop)
+        return self._session
+
+    @staticmethod
+    async def _close_stale(session: aiohttp.ClientSession, loop):
+        """
+        Closes the session of a previous event loop. While that loop runs in another thread the close
+        is scheduled there; once it has stopped, the session is closed from the current loop.
+        """
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            await session.close()
+
+    async def send(self, method: str, url: str, headers: dict, query_params: dict = None, body: bytes = None,
+                   timeout: tuple = None, trace=None) -> TransportResponse:
+        connect, read, total = timeout if timeout is not None else (None, None, None)
+        async with (await self._get()).request(
+                method=method, url=url, headers=headers, params=query_params, data=body, trace_request_ctx=trace,
+                timeout=aiohttp.ClientTimeout(total=total, connect=connect, sock_read=read),
+        ) as response:
+            content = await response.read()
+            return TransportResponse(response.status, response.reason, response.headers, content, response.content_type)
+
+    async def close(self):
+        session, self._session, self._loop = self._session, None, None
+        if session is not None and not session.closed:
+            await session.close()
+
+
+class HttpxTransport(AsyncTransport):
+    """
+    An ``httpx.AsyncClient`` transport for ``AsyncClient``, for HTTP/2.
+
+    Over HTTP/1.1 every in-flight request holds its own connection. Over HTTP/2 concurrent requests
+    are multiplexed as streams over one connection, so hundreds of calls in flight need a few
+    connections (and TLS handshakes) instead of hundreds. HTTP/2 is negotiated with ALPN on https
+    URLs; a plain http URL needs ``http1=False`` to speak HTTP/2 directly. Shared by a client and
+    its ``with_options``/``with_merchant`` copies.
+
+    Experimental: its tests only run where httpx, h2 and hypercorn are installed, so prefer the
+    default ``AiohttpTransport`` unless HTTP/2 is measured to help.
+    """
+    errors = (httpx.TransportError, asyncio.TimeoutError) if httpx is not None else ()
+    timeout_errors = (httpx.TimeoutException, asyncio.TimeoutError) if httpx is not None else ()
+
+    def __init__(self, limit: int = 100, keepalive_timeout: float = 30, http2: bool = True, http1: bool = True):
+        """
+        :param limit: Total number of simultaneous connections. 0 means no limit. Over HTTP/2 a new connection
+            is only opened when the others carry as many streams as the server allows.
+        :param keepalive_timeout: Seconds an idle connection is kept open for reuse.
+        :param http2: Offer HTTP/2; needs the h2 package (``pip install httpx[http2]``).
+        :param http1: Offer HTTP/1.1. False speaks HTTP/2 without negotiation, e.g. to a local stub server.
+        """
+        if httpx is None:
+            raise ImportError('HttpxTransport requires the httpx package.')
+        if http2 and h2 is None:
+            raise ImportError('HttpxTransport with http2=True requires the h2 package (pip install httpx[http2]).')
+        self._client_options = {
+            'limits': httpx.Limits(max_connections=limit or None, max_keepalive_connections=limit or None,
+                                   keepalive_expiry=keepalive_timeout),
+            'http1': http1,
+            'http2': http2,
+        }
+        self._client = None
+        self._loop = None
+
+    async def _get(self) -> 'httpx.AsyncClient':
+        """
+        Returns the pooled client, creating it on first use, or again if used from another event
+        loop; the client of the previous loop is then closed as in ``AiohttpTransport``.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            stale, stale_loop = self._client, self._loop
+            self._client = httpx.AsyncClient(**self._client_options)
+            self._loop = loop
+            if stale is not None and not stale.is_closed:
+                if stale_loop.is_running():
+                    asyncio.run_coroutine_threadsafe(stale.aclose(), stale_loop)
+                else:
+                    await stale.aclose()
+        return self._client
+
+    async def send(self, method: str, url: str, headers: dict, query_params: dict = None, body: bytes = None,
+                   timeout: tuple = None, trace=None) -> TransportResponse:
+        connect, read, total = timeout if timeout is not None else (None, None, None)
+        request = (await self._get()).request(
+            method, url, headers=headers, params=query_params, content=body,
+            # The pool timeout covers waiting for a connection or a free stream.
+            timeout=httpx.Timeout(connect=connect, read=read, write=read, pool=connect),
+        )
+        # httpx has no total timeout.
+        response = await (asyncio.wait_for(request, total) if total is not None else request)
+        content_type = response.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+        return TransportResponse(response.status_code, response.reason_phrase, response.headers, response.content,
+                                 content_type, response.elapsed.total_seconds())
+
+    async def close(self):
+        client, self._client, self._loop = self._client, None, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
 
 class AsyncClient:
-    def __init__(self, merchant_api_key: str):
+    def __init__(
+            self,
+            merchant_api_key: str,
+            limit: int = 100,
+            limit_per_host: int = 0,
+            keepalive_timeout: float = 30,
+            ttl_dns_cache: int = 300,
+            base_url: str = _GENERAL_API_URL,
+            retry_policy: RetryPolicy = None,
+            circuit_breaker: CircuitBreaker = None,
+            rate_limiter: RateLimiter = None,
+            timeout: Timeout = None,
+            serializer=None,
+            hooks: RequestHooks = None,
+            transport: AsyncTransport = None,
+            http2: bool = False,
+    ):
+        """
+        :param merchant_api_key: The merchant's API key for authentication
+        :param limit: Total number of simultaneous connections in the pool. 0 means no limit.
+        :param limit_per_host: Number of simultaneous connections to the same host. 0 means no limit.
+        :param keepalive_timeout: Seconds an idle connection is kept open for reuse.
+        :param ttl_dns_cache: Seconds resolved addresses are cached. None caches forever.
+        :param base_url: Root URL of the API, overridable for local stub servers
+        :param retry_policy: Backoff settings for transient failures. Defaults to ``RetryPolicy()``.
+        :param circuit_breaker: Optional breaker that fails fast while the API is unhealthy.
+        :param rate_limiter: Optional token-bucket limiter that paces every request attempt.
+        :param timeout: Connect, read and total timeouts. Defaults to ``Timeout()``.
+        :param serializer: JSON backend: 'orjson', 'msgspec', 'json' or an object with ``dumps``/``loads``. Defaults to the fastest installed.
+        :param hooks: Optional ``RequestHooks`` (or a list of them) told about every call, with aiohttp's connection timings.
+        :param transport: The ``AsyncTransport`` sending the requests, e.g. an ``AsyncMockTransport``. Defaults to an
+            ``AiohttpTransport`` built from the pool options, which are ignored when a transport is given.
+        :param http2: Send the requests over HTTP/2 with an ``HttpxTransport`` built from ``limit`` and
+            ``keepalive_timeout``, multiplexing concurrent calls over few connections. Needs ``httpx[http2]``.
+        """
+        self._base_url = base_url.rstrip('/')
         self._headers = {
             "merchant_api_key": merchant_api_key,
             "Content-Type": "application/json"
         }
+        if transport is None and http2:
+            transport = HttpxTransport(limit, keepalive_timeout)
+        if transport is None:
+            transport = AiohttpTransport(limit, limit_per_host, keepalive_timeout, ttl_dns_cache, trace=bool(hooks))
+        self.transport = transport
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout if timeout is not None else Timeout()
+        self.serializer = get_serializer(serializer)
+        self.hooks = _chain(hooks)
+        self.deadline = None
+
+    def with_options(self, timeout: Timeout = None, deadline=None) -> 'AsyncClient':
+        """
+        Returns a copy of the client with other timeouts or a deadline. The copy shares the
+        connection pool, retry policy, circuit breaker and rate limiter with this client.
+
+        :param timeout: Timeouts replacing the client's own.
+        :param deadline: A ``Deadline`` or seconds from now; it is absolute, so create a new copy per operation.
+        """
+        client = copy.copy(self)
+        if timeout is not None:
+            client.timeout = timeout
+        if deadline is not None:
+            client.deadline = Deadline.coerce(deadline).earliest(self.deadline)
+        return client
 
-    async def request(self, method: str, endpoint: str, query_params=None, json_data=None):
+    async def close(self):
+        """
+        Closes the transport and releases all open connections.
+        """
+        await self.transport.close()
+
+    def with_merchant(self, merchant_api_key: str, rate_limiter: RateLimiter = None) -> 'AsyncClient':
+        """
+        Returns a client for another merchant key. It shares the connection pool, retry policy,
+        circuit breaker, timeouts and serializer with this client but has its own rate limiter.
+
+        :param merchant_api_key: The other merchant's API key.
+        :param rate_limiter: The limiter pacing this key's requests. None disables client-side limiting.
+        """
+        client = copy.copy(self)
+        client._headers = {**self._headers, "merchant_api_key": merchant_api_key}
+        client.rate_limiter = rate_limiter
+        return client
+
+    async def request(self, method: str, endpoint: str, query_params=None, json_data=None, idempotent: bool = None,
+                route: str = None):
+        """
+        :param idempotent: Whether the call may be retried. Defaults to ``RetryPolicy.is_idempotent``.
+        :param route: The path template ``endpoint`` was formatted from, e.g. 'payment/{track_id}', reported to the hooks.
+            Defaults to ``endpoint``.
+        """
         if method not in _METHODS:
             raise ValueError(f'Unsupported method "{method}".')
+        hooks = self.hooks
+        if hooks is None:
+            return await self._request(method, endpoint, query_params, json_data, idempotent)
 
-        url = f'{_GENERAL_API_URL}/{endpoint}'
-
-        async with aiohttp.ClientSession(headers=self._headers) as session:
-            if method == 'GET' and query_params:
-                async with session.request(method=method, url=url, params=query_params) as response:
-                    if response.status == 200:
-                        if response.content_type == 'application/json':
-                            return await response.json()
-                        else:
-                            return await response.text()
-                    elif response.status == 400:
-                        raise ValueError(await response.json())
-                    else:
-                        raise Exception(f'Failed to make request: {response.status} - {response.reason}')
+        event = RequestEvent(method, endpoint, route or endpoint)
+        hooks.before_request(event)
+        try:
+            return await self._request(method, endpoint, query_params, json_data, idempotent, event)
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.elapsed = time.monotonic() - event.started
+            hooks.after_request(event)
+
+    async def _request(self, method: str, endpoint: str, query_params, json_data, idempotent: bool, event: RequestEvent = None):
+        url = f'{self._base_url}/{endpoint}'
+        policy = self.retry_policy
+        breaker = self.circuit_breaker if endpoint != _HEALTH_ENDPOINT else None
+        if idempotent is None:
+            idempotent = policy.is_idempotent(method, json_data)
+
+        if method == 'GET' and query_params:
+            body = None
+        else:
+            # Serialized once, not per attempt.
+            body = self.serializer.dumps(json_data) if json_data is not None else None
+            query_params = None
+        if event is not None and body is not None:
+            event.request_bytes = len(body)
+
+        started = time.monotonic()
+        timeout = self.timeout
+        deadline = _call_deadline(timeout, self.deadline)
+        transport = self.transport
+        attempt = 0
+        last_response = last_error = None
+        while True:
+            attempt += 1
+            can_retry = idempotent and attempt < policy.max_attempts
+            limiter = self.rate_limiter
+            if limiter is not None:
+                delay = await asyncio.to_thread(limiter.reserve, endpoint) if limiter.blocking else limiter.reserve(endpoint)
+                if delay:
+                    self._check_deadline(deadline, delay, method, endpoint, started)
+                    await asyncio.sleep(delay)
+                    if event is not None:
+                        event._add_timing('rate_limit_wait', delay)
+            self._check_deadline(deadline, 0, method, endpoint, started)
+            try:
+                probe = breaker.before_request() if breaker is not None else False
+            except CircuitOpenError:
+                # Opened by this call's own failed attempts: report what the API did instead.
+                if last_response is not None:
+                    return self._handle_response(last_response, method, endpoint, started)
+                if last_error is not None:
+                    raise self._transport_error(last_error, transport, method, endpoint, started) from last_error
+                raise
+            attempt_timeout = (
+                _cap(timeout.connect, deadline),
+                _cap(timeout.read, deadline),
+                deadline.remaining() if deadline is not None else None,
+            )
+            if event is not None:
+                event.attempts = attempt
+            try:
+                response = await transport.send(method, url, self._headers, query_params, body, attempt_timeout, event)
+            except transport.errors as e:
+                if breaker is not None:
+                    breaker.record_failure()
+                delay = policy.delay(attempt)
+                if not can_retry or (deadline is not None and delay >= deadline.remaining()):
+                    raise self._transport_error(e, transport, method, endpoint, started) from e
+                last_response, last_error = None, e
+            except BaseException:
+                # Cancelled, or failed in a way that says nothing about the API's health.
+                if probe:
+                    breaker.release_probe()
+                raise
             else:
-                async with session.request(method=method, url=url, json=json_data) as response:
-                    if response.status == 200:
-                        if response.content_type == 'application/json':
-                            return await response.json()
-                        else:
-                            return await response.text()
-                    elif response.status == 400:
-                        raise ValueError(await response.json())
+                if event is not None:
+                    event.status = response.status
+                    event.response_bytes = len(response.content)
+                    # aiohttp reports its timings through the trace configs instead.
+                    if response.elapsed is not None:
+                        event._add_timing('ttfb', response.elapsed)
+                if breaker is not None:
+                    if response.status >= 500:
+                        breaker.record_failure()
                     else:
-                        raise Exception(f'Failed to make request: {response.status} - {response.reason}.')
+                        breaker.record_success()
+                delay = None
+                if can_retry and response.status in policy.retry_statuses:
+                    delay = policy.delay(attempt, response.headers.get('Retry-After'))
+                if delay is None or (deadline is not None and delay >= deadline.remaining()):
+                    return self._handle_response(response, method, endpoint, started)
+                last_response, last_error = response, None
+            await asyncio.sleep(delay)
+            if event is not None:
+                event._add_timing('backoff', delay)
+
+    @staticmethod
+    def _transport_error(error: Exception, transport, method: str, endpoint: str, started: float) -> TransportError:
+        error_class = RequestTimeoutError if isinstance(error, transport.timeout_errors) else TransportError
+        return error_class(
+            f'{method} {endpoint} failed: {type(error).__name__}: {error}',
+            endpoint=endpoint, method=method, elapsed=time.monotonic() - started,
+        )
+
+    @staticmethod
+    def _check_deadline(deadline: Deadline, needed: float, method: str, endpoint: str, started: float):
+        if deadline is not None and deadline.remaining() <= needed:
+            raise DeadlineExceededError(
+                f'{method} {endpoint} failed: deadline exceeded',
+                endpoint=endpoint, method=method, elapsed=time.monotonic() - started,
+            )
+
+    def _handle_response(self, response: TransportResponse, method: str, endpoint: str, started: float):
+        if response.status == 200:
+            if response.content_type == 'application/json':
+                try:
+                    return self.serializer.loads(response.content)
+                except ValueError as e:
+                    raise InvalidResponseError(
+                        f'{method} {endpoint} failed: invalid JSON response: {e}', status=response.status,
+                        endpoint=endpoint, method=method, elapsed=time.monotonic() - started, body=response.text,
+                    ) from e
+            else:
+                return response.text
+        raise _error_for_status(
+            response.status, response.reason, _parse_error_body(response.text), method, endpoint,
+            time.monotonic() - started, _parse_retry_after(response.headers.get('Retry-After', '')),
+        )
@@ -1,30 +1,302 @@
+import copy
+import threading
+import time
+
 import requests
-from .constants.api_constants import _GENERAL_API_URL, _METHODS
+from requests.adapters import HTTPAdapter
+from .constants.api_constants import _GENERAL_API_URL, _METHODS, _HEALTH_ENDPOINT
+from .exceptions import (
+    TransportError, RequestTimeoutError, InvalidResponseError, CircuitOpenError, _error_for_status, _parse_error_body,
+)
+from .instrumentation import RequestEvent, RequestHooks, _chain
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy, CircuitBreaker, _parse_retry_after
+from .serializers import get_serializer
+from .timeouts import Timeout, Deadline, DeadlineExceededError, _call_deadline, _cap
+from .transport import Transport, TransportResponse
+
+
+class RequestsTransport(Transport):
+    """
+    The default transport of ``SyncClient``: a lazily created ``requests.Session``, shared by a
+    client and its ``with_options``/``with_merchant`` copies.
+    """
+    errors = (requests.RequestException,)
+    timeout_errors = (requests.Timeout,)
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False):
+        """
+        :param pool_connections: Number of per-host connection pools to cache.
+        :param pool_maxsize: Maximum number of connections kept open per host.
+        :param pool_block: If True, threads wait for a free connection instead of opening extra, non-pooled ones.
+        """
+        self._adapter_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'pool_block': pool_block,
+        }
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> requests.Session:
+        session = self._session
+        if session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(**self._adapter_options)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                session = self._session
+        return session
+
+    def send(self, method: str, url: str, headers: dict, query_params: dict = None, body: bytes = None,
+             timeout: tuple = None) -> TransportResponse:
+        # requests has no total timeout; the client enforces it between attempts.
+        response = self._get().request(method, url, headers=headers, params=query_params, data=body,
+                                       timeout=timeout[:2] if timeout is not None else None)
+        content_type = response.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+        # requests measures from sending the request until the headers are parsed.
+        return TransportResponse(response.status_code, response.reason, response.headers, response.content,
+                                 content_type, response.elapsed.total_seconds())
+
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
 
 class SyncClient:
-    def __init__(self, merchant_api_key: str):
+    """
+    Thread-safe: one instance may be shared by any number of worker threads.
+
+    By default all threads share a single ``requests.Session`` whose connection pool is managed
+    by urllib3, which hands each in-flight request its own connection. The session is never
+    mutated after it is built: headers are passed per request and cookies are not used
+    by the API, so no per-request state leaks between threads. Any other ``Transport`` passed
+    in must be thread-safe as well.
+    """
+    def __init__(
+            self,
+            merchant_api_key: str,
+            pool_connections: int = 10,
+            pool_maxsize: int = 10,
+            pool_block: bool = False,
+            base_url: str = _GENERAL_API_URL,
+            retry_policy: RetryPolicy = None,
+            circuit_breaker: CircuitBreaker = None,
+            rate_limiter: RateLimiter = None,
+            timeout: Timeout = None,
+            serializer=None,
+            hooks: RequestHooks = None,
+            transport: Transport = None,
+    ):
+        """
+        :param merchant_api_key: The merchant's API key for authentication
+        :param pool_connections: Number of per-host connection pools to cache.
+        :param pool_maxsize: Maximum number of connections kept open per host. Set it to at least the number of worker threads.
+        :param pool_block: If True, threads wait for a free connection instead of opening extra, non-pooled ones.
+        :param base_url: Root URL of the API, overridable for local stub servers
+        :param retry_policy: Backoff settings for transient failures. Defaults to ``RetryPolicy()``.
+        :param circuit_breaker: Optional breaker that fails fast while the API is unhealthy.
+        :param rate_limiter: Optional token-bucket limiter that paces every request attempt.
+        :param timeout: Connect, read and total timeouts. Defaults to ``Timeout()``.
+        :param serializer: JSON backend: 'orjson', 'msgspec', 'json' or an object with ``dumps``/``loads``. Defaults to the fastest installed.
+        :param hooks: Optional ``RequestHooks`` (or a list of them) told about every call.
+        :param transport: The ``Transport`` sending the requests, e.g. a ``MockTransport``. Defaults to a
+            ``RequestsTransport`` built from the pool options, which are ignored when a transport is given.
+        """
+        self._base_url = base_url.rstrip('/')
         self._headers = {
             "merchant_api_key": merchant_api_key,
             "Content-Type": "application/json"
         }
+        self.transport = transport if transport is not None else RequestsTransport(pool_connections, pool_maxsize, pool_block)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout if timeout is not None else Timeout()
+        self.serializer = get_serializer(serializer)
+        self.hooks = _chain(hooks)
+        self.deadline = None
 
-    def request(self, method: str, endpoint: str, query_params=None, json_data=None):
+    def with_options(self, timeout: Timeout = None, deadline=None) -> 'SyncClient':
+        """
+        Returns a copy of the client with other timeouts or a deadline. The copy shares the
+        connection pool, retry policy, circuit breaker and rate limiter with this client.
+
+        :param timeout: Timeouts replacing the client's own.
+        :param deadline: A ``Deadline`` or seconds from now; it is absolute, so create a new copy per operation.
+        """
+        client = copy.copy(self)
+        if timeout is not None:
+            client.timeout = timeout
+        if deadline is not None:
+            client.deadline = Deadline.coerce(deadline).earliest(self.deadline)
+        return client
+
+    def close(self):
+        """
+        Closes the transport and releases all pooled connections.
+        """
+        self.transport.close()
+
+    def with_merchant(self, merchant_api_key: str, rate_limiter: RateLimiter = None) -> 'SyncClient':
+        """
+        Returns a client for another merchant key. It shares the connection pool, retry policy,
+        circuit breaker, timeouts and serializer with this client but has its own rate limiter.
+
+        :param merchant_api_key: The other merchant's API key.
+        :param rate_limiter: The limiter pacing this key's requests. None disables client-side limiting.
+        """
+        client = copy.copy(self)
+        client._headers = {**self._headers, "merchant_api_key": merchant_api_key}
+        client.rate_limiter = rate_limiter
+        return client
+
+    def request(self, method: str, endpoint: str, query_params=None, json_data=None, idempotent: bool = None,
+                route: str = None):
+        """
+        :param idempotent: Whether the call may be retried. Defaults to ``RetryPolicy.is_idempotent``.
+        :param route: The path template ``endpoint`` was formatted from, e.g. 'payment/{track_id}', reported to the hooks.
+            Defaults to ``endpoint``.
+        """
         if method not in _METHODS:
             raise ValueError(f'Unsupported method "{method}".')
+        hooks = self.hooks
+        if hooks is None:
+            return self._request(method, endpoint, query_params, json_data, idempotent)
 
-        url = f'{_GENERAL_API_URL}/{endpoint}'
+        event = RequestEvent(method, endpoint, route or endpoint)
+        hooks.before_request(event)
+        try:
+            return self._request(method, endpoint, query_params, json_data, idempotent, event)
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.elapsed = time.monotonic() - event.started
+            hooks.after_request(event)
 
+    def _request(self, method: str, endpoint: str, query_params, json_data, idempotent: bool, event: RequestEvent = None):
+        url = f'{self._base_url}/{endpoint}'
         if method == 'GET' and query_params:
-            response = requests.request(headers=self._headers, method=method, url=url, params=query_params)
+            body = None
         else:
-            response = requests.request(headers=self._headers, method=method, url=url, json=json_data)
+            # Serialized once, not per attempt.
+            body = self.serializer.dumps(json_data) if json_data is not None else None
+            query_params = None
+        policy = self.retry_policy
+        breaker = self.circuit_breaker if endpoint != _HEALTH_ENDPOINT else None
+        if idempotent is None:
+            idempotent = policy.is_idempotent(method, json_data)
 
-        if response.status_code == 200:
-            if response.headers.get('content-type') == 'application/json':
-                return response.json()
+        started = time.monotonic()
+        timeout = self.timeout
+        deadline = _call_deadline(timeout, self.deadline)
+        transport = self.transport
+        attempt = 0
+        last_response = last_error = None
+        if event is not None and body is not None:
+            event.request_bytes = len(body)
+        while True:
+            attempt += 1
+            can_retry = idempotent and attempt < policy.max_attempts
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(endpoint)
+                if delay:
+                    self._check_deadline(deadline, delay, method, endpoint, started)
+                    time.sleep(delay)
+                    if event is not None:
+                        event._add_timing('rate_limit_wait', delay)
+            self._check_deadline(deadline, 0, method, endpoint, started)
+            try:
+                probe = breaker.before_request() if breaker is not None else False
+            except CircuitOpenError:
+                # Opened by this call's own failed attempts: report what the API did instead.
+                if last_response is not None:
+                    return self._handle_response(last_response, method, endpoint, started)
+                if last_error is not None:
+                    raise self._transport_error(last_error, transport, method, endpoint, started) from last_error
+                raise
+            attempt_timeout = (
+                _cap(timeout.connect, deadline),
+                _cap(timeout.read, deadline),
+                deadline.remaining() if deadline is not None else None,
+            )
+            if event is not None:
+                event.attempts = attempt
+            try:
+                response = transport.send(method, url, self._headers, query_params, body, attempt_timeout)
+            except transport.errors as e:
+                if breaker is not None:
+                    breaker.record_failure()
+                delay = policy.delay(attempt)
+                if can_retry and (deadline is None or delay < deadline.remaining()):
+                    time.sleep(delay)
+                    if event is not None:
+                        event._add_timing('backoff', delay)
+                    last_response, last_error = None, e
+                    continue
+                raise self._transport_error(e, transport, method, endpoint, started) from e
+            except BaseException:
+                # Cancelled, or failed in a way that says nothing about the API's health.
+                if probe:
+                    breaker.release_probe()
+                raise
+
+            if event is not None:
+                event.status = response.status
+                event.response_bytes = len(response.content)
+                # urllib3 does not report DNS, connect or pool wait times separately.
+                if response.elapsed is not None:
+                    event._add_timing('ttfb', response.elapsed)
+            if breaker is not None:
+                if response.status >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if can_retry and response.status in policy.retry_statuses:
+                delay = policy.delay(attempt, response.headers.get('Retry-After'))
+                if deadline is None or delay < deadline.remaining():
+                    time.sleep(delay)
+                    if event is not None:
+                        event._add_timing('backoff', delay)
+                    last_response, last_error = response, None
+                    continue
+            return self._handle_response(response, method, endpoint, started)
+
+    @staticmethod
+    def _transport_error(error: Exception, transport, method: str, endpoint: str, started: float) -> TransportError:
+        error_class = RequestTimeoutError if isinstance(error, transport.timeout_errors) else TransportError
+        return error_class(
+            f'{method} {endpoint} failed: {error}',
+            endpoint=endpoint, method=method, elapsed=time.monotonic() - started,
+        )
+
+    @staticmethod
+    def _check_deadline(deadline: Deadline, needed: float, method: str, endpoint: str, started: float):
+        if deadline is not None and deadline.remaining() <= needed:
+            raise DeadlineExceededError(
+                f'{method} {endpoint} failed: deadline exceeded',
+                endpoint=endpoint, method=method, elapsed=time.monotonic() - started,
+            )
+
+    def _handle_response(self, response: TransportResponse, method: str, endpoint: str, started: float):
+        if response.status == 200:
+            if response.content_type == 'application/json':
+                try:
+                    return self.serializer.loads(response.content)
+                except ValueError as e:
+                    raise InvalidResponseError(
+                        f'{method} {endpoint} failed: invalid JSON response: {e}', status=response.status,
+                        endpoint=endpoint, method=method, elapsed=time.monotonic() - started, body=response.text,
+                    ) from e
             else:
                 return response.text
-        elif response.status_code == 400:
-            raise ValueError(response.json())
-        else:
-            raise Exception(f'Failed to make request: {response.status_code} - {response.reason}')
\ No newline at end of file
+        raise _error_for_status(
+            response.status, response.reason, _parse_error_body(response.text), method, endpoint,
+            time.monotonic() - started, _parse_retry_after(response.headers.get('Retry-After', '')),
+        )
@@ -1,2 +1,16 @@
 _GENERAL_API_URL = 'https://api.oxapay.com/v1'
-_METHODS = ['POST', 'GET']
\ No newline at end of file
+_METHODS = ['POST', 'GET']
+# Health check endpoint; never blocked by the circuit breaker so it can report recovery.
+_HEALTH_ENDPOINT = 'common/monitor'
+# Payment page of an invoice, as returned by 'payment/invoice'.
+_PAYMENT_URL = 'https://pay.oxapay.com/{track_id}'
+
+# Seconds reference data stays fresh in the client-side cache, per endpoint.
+_REFERENCE_CACHE_TTLS = {
+    'common/currencies': 3600,
+    'common/networks': 3600,
+    'common/fiats': 3600,
+    'payment/accepted-currencies': 300,
+}
+# Seconds an expired reference value may still be served while it is refreshed.
+_REFERENCE_CACHE_STALE_TTL = 600
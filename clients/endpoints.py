@@ -0,0 +1,375 @@
+from dataclasses import dataclass
+from functools import partial
+
+from ..utils.response_models import (
+    PaymentStatus, OrderStatus, WhiteLabelPayment, StaticAddress, StaticAddressList, PaymentHistory,
+    Currency, FiatCurrency, _by_symbol, _parse_prices,
+)
+
+_REQUIRED = object()
+
+
+@dataclass(frozen=True)
+class Param:
+    """
+    :ivar name: The Python argument name.
+    :ivar annotation: The argument's type, shown in the generated signature.
+    :ivar default: The argument's default; required when left out.
+    :ivar wire: The name sent to the API, if it differs from ``name``.
+    :ivar always: Sent even when None; other arguments are left out of the payload when None.
+    :ivar in_path: Substituted into the endpoint path instead of the payload.
+    :ivar doc: The ``:param:`` description.
+    """
+    name: str
+    annotation: object = None
+    default: object = _REQUIRED
+    wire: str = None
+    always: bool = False
+    in_path: bool = False
+    doc: str = ''
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """
+    One API operation, described once and turned into a method of both ``SyncOxaPay`` and ``AsyncOxaPay``.
+
+    This is also the sans-I/O core of the clients: ``prepare`` turns arguments into
+    ``(method, path, query_params, json_data)`` and ``parse`` turns the decoded response into
+    models, so any transport can drive the API with them.
+
+    :ivar name: The client method name.
+    :ivar method: 'GET' or 'POST'. GET payloads are sent as query parameters, POST payloads as JSON.
+    :ivar path: The path below the API root; ``{name}`` placeholders are filled from ``in_path`` params.
+    :ivar params: The method's arguments, in signature order.
+    :ivar model: Builds the result from the response's ``data``; None returns the response as is, without a ``raw_response`` argument.
+    :ivar cached: Served from the client's reference data cache, keyed by ``path``.
+    :ivar send_none: Send every argument, None or not, instead of leaving out the None ones.
+    :ivar preflight: Checked against the cached reference data before sending when the client validates payloads.
+    :ivar idempotency_key: The param that makes a call idempotent; when the client has an idempotency store
+        and the param is set, the call goes through it instead of straight to the transport.
+    :ivar doc: The method's summary line(s).
+    :ivar returns: The ``:return:`` description.
+    """
+    name: str
+    method: str
+    path: str
+    params: tuple = ()
+    model: object = None
+    cached: bool = False
+    send_none: bool = False
+    preflight: bool = False
+    idempotency_key: str = None
+    doc: str = ''
+    returns: str = ''
+
+    def __post_init__(self):
+        object.__setattr__(self, 'build', _compile_builder(self))
+
+    def prepare(self, *args, **kwargs) -> tuple:
+        """
+        :return: ``(method, path, query_params, json_data)`` for a call with these arguments.
+        """
+        path, query_params, json_data = self.build(*args, **kwargs)
+        return self.method, path, query_params, json_data
+
+    def parse(self, response_data, raw_response: bool = False):
+        """
+        Turns a decoded response into the method's result.
+        """
+        if raw_response or self.model is None:
+            return response_data
+        return self.model(response_data['data'])
+
+
+def _compile_builder(endpoint: Endpoint):
+    """
+    Generates ``build(<params>) -> (path, query_params, json_data)`` for an endpoint, so a call
+    costs one dict literal plus one ``is not None`` test per optional argument.
+    """
+    env = {'_defaults': {param.name: param.default for param in endpoint.params}}
+    signature = []
+    fixed = []
+    optional = []
+    for param in endpoint.params:
+        signature.append(param.name if param.default is _REQUIRED else f'{param.name}=_defaults[{param.name!r}]')
+        if param.in_path:
+            continue
+        wire = param.wire or param.name
+        value = param.name
+        if endpoint.method == 'GET' and param.annotation is bool:
+            # Query strings carry text; aiohttp rejects bools and requests would send 'True'.
+            value = f"('true' if {param.name} else 'false')"
+        if param.always or endpoint.send_none:
+            fixed.append(f'{wire!r}: {value}')
+        else:
+            optional.append(f'    if {param.name} is not None:\n        payload[{wire!r}] = {value}\n')
+    payload = 'payload' if endpoint.method == 'GET' else 'None'
+    json_data = 'None' if endpoint.method == 'GET' else 'payload'
+    source = (
+        f'def build({", ".join(signature)}):\n'
+        f'    payload = {{{", ".join(fixed)}}}\n'
+        + ''.join(optional) +
+        f'    return f{endpoint.path!r}, {payload} or None, {json_data}\n'
+    )
+    exec(source, env)
+    return env['build']
+
+
+def _docstring(endpoint: Endpoint) -> str:
+    lines = [endpoint.doc, '']
+    lines += [f':param {param.name}: {param.doc}'.rstrip() for param in endpoint.params]
+    if endpoint.model is not None:
+        lines.append(':param raw_response: Return the API response as is instead of models.')
+    if endpoint.returns:
+        lines.append(f':return: {endpoint.returns}')
+    return '\n'.join(lines)
+
+
+def _client_method(endpoint: Endpoint, asynchronous: bool):
+    """
+    Generates the ``SyncOxaPay`` (or, with ``asynchronous``, ``AsyncOxaPay``) method of an endpoint.
+    """
+    env = {'_endpoint': endpoint, '_build': endpoint.build, '_model': endpoint.model,
+           '_defaults': {param.name: param.default for param in endpoint.params}}
+    signature = ['self'] + [
+        param.name if param.default is _REQUIRED else f'{param.name}=_defaults[{param.name!r}]'
+        for param in endpoint.params
+    ]
+    arguments = ', '.join(param.name for param in endpoint.params)
+    if endpoint.model is not None:
+        signature.append('raw_response=False')
+    define = 'async def' if asynchronous else 'def'
+    wait = 'await ' if asynchronous else ''
+
+    if endpoint.cached:
+        body = (
+            f'    response_data = {wait}self._cache.get({endpoint.path!r}, '
+            f'lambda: self._client.request({endpoint.method!r}, {endpoint.path!r}))\n'
+        )
+        result = f'self._cached_model({endpoint.path!r}, response_data, _model)'
+    else:
+        # Templated paths also pass the template, so instrumentation does not label by track id.
+        route = f', route={endpoint.path!r}' if '{' in endpoint.path else ''
+        send = f'{wait}self._client.request({endpoint.method!r}, path, query_params=query_params, json_data=json_data{route})'
+        body = f'    path, query_params, json_data = _build({arguments})\n'
+        if endpoint.preflight:
+            body += f'    if self._validator is not None:\n        {wait}self._validator.check(self, _endpoint, json_data)\n'
+        if endpoint.idempotency_key is not None:
+            key = endpoint.idempotency_key
+            body += (
+                f'    if {key} is not None and self._idempotency is not None:\n'
+                f'        response_data = {wait}self._idempotency.create(self, _endpoint, {key}, path, json_data)\n'
+                f'    else:\n'
+                f'        response_data = {send}\n'
+            )
+        else:
+            body += f'    response_data = {send}\n'
+        result = "_model(response_data['data'])"
+    if endpoint.model is not None:
+        body += f'    if raw_response:\n        return response_data\n    return {result}\n'
+    else:
+        body += '    return response_data\n'
+
+    exec(f'{define} {endpoint.name}({", ".join(signature)}):\n{body}', env)
+    method = env[endpoint.name]
+    method.__doc__ = _docstring(endpoint)
+    method.__annotations__ = {param.name: param.annotation for param in endpoint.params if param.annotation is not None}
+    method._endpoint = endpoint
+    return method
+
+
+def sync_method(endpoint: Endpoint):
+    return _client_method(endpoint, asynchronous=False)
+
+
+def async_method(endpoint: Endpoint):
+    return _client_method(endpoint, asynchronous=True)
+
+
+_CALLBACK_URL = Param('callback_url', str, None, doc='URL OxaPay posts payment status updates to.')
+_EMAIL = Param('email', str, None, doc="The payer's email, for reports.")
+_ORDER_ID = Param('order_id', str, None, doc='Your unique order id. With an ``idempotency_store``, payments are created at most once per order id.')
+_DESCRIPTION = Param('description', str, None, doc='Free text shown in reports.')
+_SANDBOX = Param('sandbox', bool, False, doc='Create a test payment.')
+_LIFETIME = Param('lifetime', int, 60, doc='Minutes the payment stays payable.')
+_FEE_PAID_BY_PAYER = Param('fee_paid_by_payer', float, None, doc='Share of the fee paid by the payer, from 0 to 1.')
+_UNDER_PAID_COVERAGE = Param('under_paid_coverage', float, None, doc='Tolerated underpayment in percent.')
+
+CREATE_INVOICE = Endpoint(
+    'create_invoice', 'POST', 'payment/invoice',
+    params=(
+        Param('amount', float, always=True, doc='The amount to charge, in ``currency``.'),
+        Param('currency', str, None, doc='Currency of the amount; a crypto or fiat symbol.'),
+        Param('lifetime', int, 60, always=True, doc=_LIFETIME.doc),
+        _FEE_PAID_BY_PAYER,
+        _UNDER_PAID_COVERAGE,
+        Param('to_currency', str, 'USDT', doc='Currency the received payment is converted to.'),
+        Param('auto_withdrawal', bool, False, always=True, doc='Forward the payment to your withdrawal address.'),
+        Param('mixed_payment', bool, None, doc='Let the payer settle an underpayment in another currency.'),
+        _CALLBACK_URL,
+        Param('return_url', str, None, doc='URL the payer is sent to after paying.'),
+        _EMAIL,
+        _ORDER_ID,
+        Param('thanks_message', str, None, doc='Message shown to the payer after paying.'),
+        _DESCRIPTION,
+        _SANDBOX,
+    ),
+    model=OrderStatus.from_dict,
+    idempotency_key='order_id',
+    preflight=True,
+    doc='Creates a payment link (invoice).',
+    returns='An ``OrderStatus`` with the track id and payment URL.',
+)
+
+GET_SUPPORTED_CURRENCIES = Endpoint(
+    'get_supported_currencies', 'GET', 'common/currencies',
+    model=partial(_by_symbol, Currency),
+    cached=True,
+    doc='Retrieves a list of supported currencies and their network details.',
+    returns='A ``{symbol: Currency}`` dict of supported currencies with their details. It is cached and must not be modified.',
+)
+
+GET_SUPPORTED_NETWORKS = Endpoint(
+    'get_supported_networks', 'GET', 'common/networks',
+    cached=True,
+    doc='Retrieves a list of supported blockchain networks for cryptocurrency transactions.',
+    returns='A list of supported blockchain networks.',
+)
+
+GET_SUPPORTED_FIAT_CURRENCIES = Endpoint(
+    'get_supported_fiat_currencies', 'GET', 'common/fiats',
+    model=partial(_by_symbol, FiatCurrency),
+    cached=True,
+    doc='Retrieves a list of supported fiat currencies and their details.',
+    returns='A ``{symbol: FiatCurrency}`` dict of supported fiat currencies. It is cached and must not be modified.',
+)
+
+GET_PAYMENT_INFORMATION = Endpoint(
+    'get_payment_information', 'GET', 'payment/{track_id}',
+    params=(Param('track_id', int, in_path=True, doc='The track id of the payment.'),),
+    model=PaymentStatus.from_dict,
+    doc='Retrieves the current state of one payment.',
+    returns='A ``PaymentStatus``.',
+)
+
+CREATE_WHITE_LABEL_PAYMENT = Endpoint(
+    'create_white_label_payment', 'POST', 'payment/white-label',
+    params=(
+        Param('amount', float, doc='The amount to charge, in ``currency``.'),
+        Param('pay_currency', str, doc='The crypto currency the payer pays in.'),
+        _CALLBACK_URL,
+        Param('currency', str, None, doc='Currency of the amount. Defaults to ``pay_currency``.'),
+        Param('network', str, None, doc='Blockchain network of ``pay_currency``.'),
+        _LIFETIME,
+        _FEE_PAID_BY_PAYER,
+        _UNDER_PAID_COVERAGE,
+        Param('to_currency', str, None, doc='Currency the received payment is converted to.'),
+        Param('auto_withdrawal', bool, False, doc='Forward the payment to your withdrawal address.'),
+        _EMAIL,
+        _ORDER_ID,
+        _DESCRIPTION,
+        _SANDBOX,
+    ),
+    model=WhiteLabelPayment.from_dict,
+    send_none=True,
+    idempotency_key='order_id',
+    preflight=True,
+    doc='Creates a payment whose address and amount you show in your own checkout.',
+    returns='A ``WhiteLabelPayment`` with the address and amount to pay.',
+)
+
+CREATE_STATIC_ADDRESS = Endpoint(
+    'create_static_address', 'POST', 'payment/static-address',
+    params=(
+        Param('network', str, always=True, doc='Blockchain network of the address.'),
+        Param('to_currency', str, None, doc='Currency received payments are converted to.'),
+        Param('auto_withdrawal', bool, False, doc='Forward payments to your withdrawal address.'),
+        _CALLBACK_URL,
+        _EMAIL,
+        _ORDER_ID,
+        _DESCRIPTION,
+    ),
+    model=StaticAddress.from_dict,
+    preflight=True,
+    doc='Creates a permanent deposit address.',
+    returns='A ``StaticAddress``.',
+)
+
+REVOKE_STATIC_WALLET = Endpoint(
+    'revoke_static_wallet', 'POST', 'payment/static-address/revoke',
+    params=(Param('address', str, always=True, doc='The address of the static wallet to revoke.'),),
+    doc='Revokes a static wallet by disabling further transactions to the specified address.',
+    returns='The result of the revocation process.',
+)
+
+GET_STATIC_ADDRESS_LIST = Endpoint(
+    'get_static_address_list', 'GET', 'payment/static-address',
+    params=(
+        Param('track_id', int, None, doc='Filter by the track id of a static address. Defaults to None.'),
+        Param('network', str, None, doc='Filter by blockchain network. Defaults to None.'),
+        Param('currency', str, None, doc='Filter by currency. Defaults to None.'),
+        Param('address', str, None, doc='Filter by address. Defaults to None.'),
+        Param('have_tx', bool, None, doc='Only addresses that have (True) or have not (False) received a transaction. Defaults to None.'),
+        Param('order_id', str, None, doc='Filter by the order id given at creation. Defaults to None.'),
+        Param('email', str, None, doc='Filter by the email given at creation. Defaults to None.'),
+        Param('page', int, 1, doc='The page number of the results to retrieve. Default: 1.'),
+        Param('size', int, 10, doc='Number of records per page. Possible values: from 1 to 200. Default: 10.'),
+    ),
+    model=StaticAddressList.from_dict,
+    doc='Retrieves one page of the static addresses of the merchant.',
+    returns='A ``StaticAddressList``.',
+)
+
+GET_PAYMENT_HISTORY = Endpoint(
+    'get_payment_history', 'GET', 'payment',
+    params=(
+        Param('track_id', int, None, doc='Filter payments by a specific invoice ID. Defaults to None.'),
+        Param('type_', str, None, wire='type', doc="Filter payments by type (e.g., 'Invoice', 'White-Label', 'Static Wallet'). Defaults to None."),
+        Param('status', str, None, doc="Filter payments by status (e.g., 'Paid', 'Confirming'). Defaults to None."),
+        Param('pay_currency', str, None, doc='Filter payments by a specific crypto currency symbol in which the pay amount is specified. Defaults to None.'),
+        Param('currency', str, None, doc='Filter payments by a specific currency symbol. Defaults to None.'),
+        Param('network', str, None, doc='Filter payments by the expected blockchain network for the specified crypto currency. Defaults to None.'),
+        Param('address', str, None, doc='Filter payments by the expected address. It’s better to filter static addresses. Defaults to None.'),
+        Param('from_date', int, None, doc='The start of the date window to query for payments in Unix format. Defaults to None.'),
+        Param('to_date', int, None, doc='The end of the date window to query for payments in Unix format. Defaults to None.'),
+        Param('from_amount', float, None, doc='Filter payments with amounts greater than or equal to the specified value. Defaults to None.'),
+        Param('to_amount', float, None, doc='Filter payments with amounts less than or equal to the specified value. Defaults to None.'),
+        Param('sort_by', str, 'create_date', doc="Sort the received list by a parameter. Possible values: 'create_date', 'pay_date', 'amount'. Default: 'create_date'."),
+        Param('sort_type', str, 'desc', doc="Display the list in ascending or descending order. Possible values: 'asc', 'desc'. Default: 'desc'."),
+        Param('page', int, 1, doc='The page number of the results to retrieve. Possible values: from 1 to the total number of pages. Default: 1.'),
+        Param('size', int, 10, doc='Number of records to display per page. Possible values: from 1 to 200. Default: 10.'),
+    ),
+    model=PaymentHistory.from_dict,
+    doc='Retrieves the payment history based on specified filters.',
+    returns='The payment history as a ``PaymentHistory``.',
+)
+
+GET_ACCEPTED_CURRENCIES = Endpoint(
+    'get_accepted_currencies', 'GET', 'payment/accepted-currencies',
+    cached=True,
+    doc='Retrieves the currencies enabled for the merchant.',
+    returns='The accepted currency symbols.',
+)
+
+GET_PRICES = Endpoint(
+    'get_prices', 'GET', 'common/prices',
+    model=_parse_prices,
+    doc='Retrieves the current prices of the supported currencies.',
+    returns='A ``{symbol: Decimal}`` dict of current prices.',
+)
+
+ENDPOINTS = (
+    CREATE_INVOICE,
+    GET_SUPPORTED_CURRENCIES,
+    GET_SUPPORTED_NETWORKS,
+    GET_SUPPORTED_FIAT_CURRENCIES,
+    GET_PAYMENT_INFORMATION,
+    CREATE_WHITE_LABEL_PAYMENT,
+    CREATE_STATIC_ADDRESS,
+    REVOKE_STATIC_WALLET,
+    GET_STATIC_ADDRESS_LIST,
+    GET_PAYMENT_HISTORY,
+    GET_ACCEPTED_CURRENCIES,
+    GET_PRICES,
+)
@@ -0,0 +1,116 @@
+import json
+
+
+class OxaPayError(Exception):
+    """
+    Base class of every error raised by the clients.
+
+    :ivar status: HTTP status of the failed response, or None if no response was received.
+    :ivar endpoint: The API endpoint that was called, e.g. 'payment/invoice'.
+    :ivar method: The HTTP method used.
+    :ivar elapsed: Seconds spent on the call, including retries.
+    :ivar body: The parsed error body (dict when it was JSON, else text), or None.
+    """
+    def __init__(self, message: str, status: int = None, endpoint: str = None, method: str = None,
+                 elapsed: float = None, body=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.endpoint = endpoint
+        self.method = method
+        self.elapsed = elapsed
+        self.body = body
+
+    @property
+    def error(self) -> dict:
+        """
+        The ``error`` object of an OxaPay error response, or an empty dict.
+        """
+        if isinstance(self.body, dict) and isinstance(self.body.get('error'), dict):
+            return self.body['error']
+        return {}
+
+
+class TransportError(OxaPayError):
+    """
+    No response was received (DNS, connection or TLS failure).
+    """
+
+
+class RequestTimeoutError(TransportError):
+    """
+    The request did not complete within its timeout.
+    """
+
+
+class CircuitOpenError(OxaPayError):
+    """
+    The circuit breaker is open; the request was not sent.
+    """
+
+
+class APIError(OxaPayError):
+    """
+    The API answered with an unexpected status.
+    """
+
+
+class InvalidResponseError(APIError):
+    """
+    The API answered 200 with a JSON body that could not be decoded, e.g. cut short. The call may
+    still have taken effect.
+    """
+
+
+class ValidationError(APIError, ValueError):
+    """
+    The API rejected the request parameters (HTTP 400).
+    Also a ``ValueError`` for compatibility with earlier versions.
+    """
+
+
+class AuthenticationError(APIError):
+    """
+    The merchant API key is missing, invalid or not allowed to call the endpoint (HTTP 401/403).
+    """
+
+
+class RateLimitedError(APIError):
+    """
+    The API is rate limiting the merchant key (HTTP 429).
+
+    :ivar retry_after: Seconds to wait as advertised by the ``Retry-After`` header, or None.
+    """
+    def __init__(self, *args, retry_after: float = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
+class ServerError(APIError):
+    """
+    The API failed to process the request (HTTP 5xx).
+    """
+
+
+def _parse_error_body(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text or None
+
+
+def _error_for_status(status: int, reason: str, body, method: str, endpoint: str, elapsed: float,
+                      retry_after: float = None) -> APIError:
+    message = f'{method} {endpoint} failed: {status} - {reason}'
+    if isinstance(body, dict) and body.get('message'):
+        message = f'{message}: {body["message"]}'
+    kwargs = {'status': status, 'endpoint': endpoint, 'method': method, 'elapsed': elapsed, 'body': body}
+    if status == 400:
+        return ValidationError(message, **kwargs)
+    if status in (401, 403):
+        return AuthenticationError(message, **kwargs)
+    if status == 429:
+        return RateLimitedError(message, retry_after=retry_after, **kwargs)
+    if status >= 500:
+        return ServerError(message, **kwargs)
+    return APIError(message, **kwargs)
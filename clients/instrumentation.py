@@ -0,0 +1,181 @@
+import time
+from dataclasses import dataclass, field
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None
+
+
+@dataclass
+class RequestEvent:
+    """
+    What happened during one ``request`` call, retries included.
+
+    :ivar endpoint: The path called, e.g. 'payment/12345'.
+    :ivar route: The path template it was formatted from, e.g. 'payment/{track_id}'. Unlike ``endpoint``
+        it takes few values, so metrics are labelled and spans named with it.
+    :ivar attempts: Number of attempts sent; ``retries`` is one less.
+    :ivar status: HTTP status of the last response, or None if none was received.
+    :ivar error: The exception the call raised, if any.
+    :ivar request_bytes: Size of the request body.
+    :ivar response_bytes: Size of the last response body.
+    :ivar elapsed: Seconds the whole call took.
+    :ivar timings: Seconds spent per phase, summed over attempts: ``rate_limit_wait``, ``backoff``, ``pool_wait``,
+        ``dns``, ``connect`` (TLS included) and ``ttfb``. Phases the transport does not report are absent.
+    :ivar context: Free space for hooks to carry state from ``before_request`` to ``after_request``.
+    """
+    method: str
+    endpoint: str
+    route: str = None
+    started: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    status: int = None
+    error: Exception = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    elapsed: float = 0.0
+    timings: dict = field(default_factory=dict)
+    context: dict = field(default_factory=dict)
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def _add_timing(self, phase: str, seconds: float):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+
+class RequestHooks:
+    """
+    Base class of instrumentation hooks; override the methods you need.
+
+    Pass an instance (or a list of them) as ``hooks`` to a client. Clients without hooks
+    skip all instrumentation, including the aiohttp trace callbacks.
+    """
+    def before_request(self, event: RequestEvent):
+        pass
+
+    def after_request(self, event: RequestEvent):
+        pass
+
+
+class _HookChain(RequestHooks):
+    def __init__(self, hooks):
+        self.hooks = list(hooks)
+
+    def before_request(self, event: RequestEvent):
+        for hook in self.hooks:
+            hook.before_request(event)
+
+    def after_request(self, event: RequestEvent):
+        for hook in reversed(self.hooks):
+            hook.after_request(event)
+
+
+def _chain(hooks):
+    if isinstance(hooks, (list, tuple)):
+        return _HookChain(hooks) if hooks else None
+    return hooks
+
+
+def _outcome(event: RequestEvent) -> str:
+    if event.status is not None:
+        return str(event.status)
+    return type(event.error).__name__ if event.error is not None else ''
+
+
+class PrometheusHooks(RequestHooks):
+    """
+    Records calls into ``prometheus_client`` metrics. Requires ``pip install prometheus-client``.
+
+    ``<namespace>_request_duration_seconds`` (method, endpoint, status), ``<namespace>_request_phase_seconds``
+    (endpoint, phase), ``<namespace>_request_retries_total`` (method, endpoint) and
+    ``<namespace>_transferred_bytes_total`` (endpoint, direction). The endpoint label is the
+    event's ``route``, e.g. 'payment/{track_id}', so it does not grow with every payment looked up.
+    """
+    def __init__(self, registry=None, namespace: str = 'oxapay', buckets: tuple = None):
+        """
+        :param registry: The ``CollectorRegistry`` to register in. Defaults to the global registry.
+        :param namespace: Prefix of the metric names.
+        :param buckets: Histogram buckets in seconds. Defaults to prometheus_client's.
+        """
+        if prometheus_client is None:
+            raise ImportError('PrometheusHooks requires the prometheus-client package.')
+        options = {}
+        if registry is not None:
+            options['registry'] = registry
+        histogram_options = dict(options, buckets=buckets) if buckets is not None else options
+        self.duration = prometheus_client.Histogram(
+            f'{namespace}_request_duration_seconds', 'OxaPay API call duration, retries included.',
+            ['method', 'endpoint', 'status'], **histogram_options,
+        )
+        self.phases = prometheus_client.Histogram(
+            f'{namespace}_request_phase_seconds', 'Time spent per phase of an OxaPay API call.',
+            ['endpoint', 'phase'], **histogram_options,
+        )
+        self.retries = prometheus_client.Counter(
+            f'{namespace}_request_retries_total', 'Retried OxaPay API attempts.', ['method', 'endpoint'], **options,
+        )
+        self.transferred = prometheus_client.Counter(
+            f'{namespace}_transferred_bytes_total', 'Bytes sent to and received from the OxaPay API.',
+            ['endpoint', 'direction'], **options,
+        )
+
+    def after_request(self, event: RequestEvent):
+        route = event.route or event.endpoint
+        self.duration.labels(event.method, route, _outcome(event)).observe(event.elapsed)
+        for phase, seconds in event.timings.items():
+            self.phases.labels(route, phase).observe(seconds)
+        if event.retries:
+            self.retries.labels(event.method, route).inc(event.retries)
+        if event.request_bytes:
+            self.transferred.labels(route, 'sent').inc(event.request_bytes)
+        if event.response_bytes:
+            self.transferred.labels(route, 'received').inc(event.response_bytes)
+
+
+class OpenTelemetryHooks(RequestHooks):
+    """
+    Wraps every call in an OpenTelemetry client span. Requires ``pip install opentelemetry-api``.
+
+    Spans are named after the method and the event's ``route``, e.g. 'GET payment/{track_id}'; the
+    path actually called is the ``oxapay.path`` attribute. Phase timings, attempts and sizes are added
+    as ``oxapay.*`` span attributes.
+    """
+    def __init__(self, tracer=None):
+        """
+        :param tracer: The tracer to create spans with. Defaults to ``trace.get_tracer('oxapay_api')``.
+        """
+        if otel_trace is None:
+            raise ImportError('OpenTelemetryHooks requires the opentelemetry-api package.')
+        self._tracer = tracer if tracer is not None else otel_trace.get_tracer('oxapay_api')
+
+    def before_request(self, event: RequestEvent):
+        route = event.route or event.endpoint
+        event.context['otel_span'] = self._tracer.start_span(
+            f'{event.method} {route}',
+            kind=otel_trace.SpanKind.CLIENT,
+            attributes={'http.request.method': event.method, 'oxapay.endpoint': route, 'oxapay.path': event.endpoint},
+        )
+
+    def after_request(self, event: RequestEvent):
+        span = event.context.pop('otel_span', None)
+        if span is None:
+            return
+        if event.status is not None:
+            span.set_attribute('http.response.status_code', event.status)
+        span.set_attribute('oxapay.attempts', event.attempts)
+        span.set_attribute('oxapay.request_bytes', event.request_bytes)
+        span.set_attribute('oxapay.response_bytes', event.response_bytes)
+        for phase, seconds in event.timings.items():
+            span.set_attribute(f'oxapay.timing.{phase}', seconds)
+        if event.error is not None:
+            span.record_exception(event.error)
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(event.error)))
+        span.end()
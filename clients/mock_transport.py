@@ -0,0 +1,595 @@
+import itertools
+import random
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+
+from .constants.api_constants import _GENERAL_API_URL, _HEALTH_ENDPOINT, _PAYMENT_URL
+from .serializers import get_serializer
+from .transport import Transport, AsyncTransport, TransportResponse
+
+_CURRENCIES = {
+    'BTC': ('Bitcoin', {'Bitcoin Network': ('Bitcoin', 2)}),
+    'ETH': ('Ethereum', {'Ethereum Network': ('ERC20', 10)}),
+    'USDT': ('Tether', {'Tron Network': ('TRC20', 19), 'Ethereum Network': ('ERC20', 10)}),
+    'TRX': ('Tron', {'Tron Network': ('TRC20', 19)}),
+    'LTC': ('Litecoin', {'Litecoin Network': ('Litecoin', 6)}),
+}
+_PRICES = {'BTC': 67250.12, 'ETH': 3120.5, 'USDT': 1.0, 'TRX': 0.124, 'LTC': 71.3}
+_FIATS = {'USD': ('US Dollar', 1), 'EUR': ('Euro', 0.92), 'GBP': ('British Pound', 0.79)}
+_NETWORKS = sorted({network for _, networks in _CURRENCIES.values() for network, _ in networks.values()})
+_CREATING_PATHS = ('payment/invoice', 'payment/white-label')
+
+
+class MockConnectionError(ConnectionError):
+    """
+    A request the mock transport dropped before it reached the ``MockAPI``, as with a network failure.
+    """
+
+
+def _ok(data) -> tuple:
+    return 200, {'data': data, 'message': 'Operation completed successfully!', 'error': {}, 'status': 200, 'version': '1.0.0'}, {}
+
+
+def _error(status: int, message: str, headers: dict = None) -> tuple:
+    return status, {
+        'data': {}, 'message': message, 'error': {'type': 'mock', 'key': str(status), 'message': message},
+        'status': status, 'version': '1.0.0',
+    }, headers or {}
+
+
+def _synthetic_payment(i: int, now: int) -> dict:
+    return {
+        'track_id': str(200000000 + i),
+        'address': f'T{i:033d}',
+        'type': 'invoice',
+        'amount': 10 + i % 90,
+        'currency': 'USDT',
+        'status': 'paid' if i % 3 else 'expired',
+        'fee_paid_by_payer': 0,
+        'under_paid_coverage': 0,
+        'lifetime': 60,
+        'callback_url': '',
+        'return_url': '',
+        'email': '',
+        'order_id': f'ORD-{i}',
+        'description': '',
+        'thanks_message': '',
+        'mixed_payment': False,
+        'expired_at': now - i * 60 + 3600,
+        'date': now - i * 60,
+        'txs': [],
+    }
+
+
+def _page(query: dict, records: list, render=None) -> tuple:
+    page = int(query.get('page', 1))
+    size = int(query.get('size', 10))
+    if page < 1 or not 1 <= size <= 200:
+        return _error(400, 'Invalid page or size.')
+    last_page = max(1, -(-len(records) // size))
+    chunk = records[(page - 1) * size:page * size]
+    if render is not None:
+        chunk = [render(record) for record in chunk]
+    return _ok({'list': chunk, 'meta': {'page': page, 'last_page': last_page, 'total': len(records)}})
+
+
+def _normalized(value) -> str:
+    return str(value).strip().lower().replace('-', '_').replace(' ', '_')
+
+
+def _usd(symbol: str) -> float:
+    if symbol in _PRICES:
+        return _PRICES[symbol]
+    return 1 / _FIATS[symbol][1]
+
+
+def _amount(value):
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return amount if amount > 0 else None
+
+
+class MockAPI:
+    """
+    An in-process simulation of the OxaPay API, for tests and benchmarks that must not touch the network.
+
+    Payments follow their real lifecycle on a clock: every payment is ``waiting`` until paid and
+    ``expired`` once its lifetime ends. Payments created with ``sandbox=True`` pay themselves
+    ``sandbox_pay_after`` seconds after creation; the others change only through ``pay``,
+    ``deposit``, ``expire`` or ``set_status``. A detected payment is ``paying`` for
+    ``confirm_after`` seconds, then ``paid``. Time can be moved forward with ``advance`` instead
+    of sleeping, so a full lifecycle runs in microseconds.
+
+    The history and static address lists are paginated and filtered like the API. Injected
+    errors, 429s and lost responses are drawn from a seeded generator, so runs are repeatable.
+    Safe to share between threads.
+    """
+    def __init__(
+            self,
+            history_size: int = 0,
+            sandbox_pay_after: float = 5.0,
+            confirm_after: float = 10.0,
+            error_rate: float = 0.0,
+            throttle_rate: float = 0.0,
+            retry_after: float = 1.0,
+            lost_response_rate: float = 0.0,
+            drop_rate: float = 0.0,
+            merchant_api_keys=None,
+            accepted_currencies=None,
+            seed: int = None,
+            clock=time.time,
+    ):
+        """
+        :param history_size: Number of synthetic settled payments the history starts with.
+        :param sandbox_pay_after: Seconds after creation at which a sandbox payment is paid.
+        :param confirm_after: Seconds a detected payment stays ``paying`` before it is ``paid``.
+        :param error_rate: Fraction of requests answered with a 500.
+        :param throttle_rate: Fraction of requests answered with a 429 and a ``Retry-After`` header.
+        :param retry_after: Seconds sent in ``Retry-After`` with the 429s.
+        :param lost_response_rate: Fraction of payment creations that are carried out but answered with a 504,
+            as when a gateway times out after the API committed the payment.
+        :param drop_rate: Fraction of requests failing with ``MockConnectionError`` before they reach the API.
+        :param merchant_api_keys: Keys accepted by the API; others get a 401. None accepts any key.
+        :param accepted_currencies: Currency symbols enabled for the merchant. Defaults to all supported currencies.
+        :param seed: Seed of the error injection and generated addresses, for repeatable runs.
+        :param clock: Callable returning the current Unix time.
+        """
+        self.sandbox_pay_after = sandbox_pay_after
+        self.confirm_after = confirm_after
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.lost_response_rate = lost_response_rate
+        self.drop_rate = drop_rate
+        self.merchant_api_keys = set(merchant_api_keys) if merchant_api_keys is not None else None
+        self.accepted_currencies = list(accepted_currencies) if accepted_currencies is not None else list(_CURRENCIES)
+        self.requests = Counter()
+        self._clock = clock
+        self._offset = 0.0
+        self._rng = random.Random(seed)
+        self._addresses = random.Random(seed)
+        self._track_ids = itertools.count(100000000)
+        self._lock = threading.RLock()
+        now = int(self.now())
+        # Newest first, like the API.
+        self._history = [_synthetic_payment(i, now) for i in range(history_size)]
+        self._payments = {payment['track_id']: payment for payment in self._history}
+        # track_id -> [(unix time, status)], in time order.
+        self._steps = {payment['track_id']: [(payment['date'], payment['status'])] for payment in self._history}
+        self._static_addresses = []
+        self._funded = set()
+        self._routes = {
+            ('GET', 'common/monitor'): self._monitor,
+            ('GET', 'common/currencies'): self._currencies,
+            ('GET', 'common/networks'): self._networks,
+            ('GET', 'common/fiats'): self._fiats,
+            ('GET', 'common/prices'): self._prices,
+            ('POST', 'payment/invoice'): self._create_invoice,
+            ('POST', 'payment/white-label'): self._create_white_label,
+            ('POST', 'payment/static-address'): self._create_static_address,
+            ('POST', 'payment/static-address/revoke'): self._revoke_static_address,
+            ('GET', 'payment/static-address'): self._static_address_list,
+            ('GET', 'payment/accepted-currencies'): self._accepted,
+            ('GET', 'payment'): self._payment_history,
+        }
+
+    def now(self) -> float:
+        """
+        :return: The simulated Unix time.
+        """
+        return self._clock() + self._offset
+
+    def advance(self, seconds: float):
+        """
+        Moves the simulated time forward, progressing every payment as if ``seconds`` had passed.
+        """
+        with self._lock:
+            self._offset += seconds
+
+    def handle(self, method: str, path: str, query: dict = None, body: dict = None, headers: dict = None) -> tuple:
+        """
+        Answers one request.
+
+        :param path: The endpoint path relative to the API root, e.g. 'payment/invoice'.
+        :param query: The query parameters, as strings.
+        :param body: The decoded JSON body.
+        :param headers: The request headers.
+        :return: ``(status, payload, headers)``; the payload is the JSON document to send back.
+        :raises MockConnectionError: When the request is dropped.
+        """
+        query = query or {}
+        with self._lock:
+            self.requests[path] += 1
+            if path != _HEALTH_ENDPOINT:
+                roll = self._rng.random()
+                if roll < self.drop_rate:
+                    raise MockConnectionError(f'Injected connection error on {method} {path}.')
+                roll -= self.drop_rate
+                if roll < self.error_rate:
+                    return _error(500, 'Injected server error.')
+                if roll < self.error_rate + self.throttle_rate:
+                    return _error(429, 'Too many requests.', {'Retry-After': str(self.retry_after)})
+            if self.merchant_api_keys is not None and (headers or {}).get('merchant_api_key') not in self.merchant_api_keys:
+                return _error(401, 'Invalid merchant API key.')
+            route = self._routes.get((method, path))
+            if route is not None:
+                response = route(query, body or {})
+            elif method == 'GET' and path.startswith('payment/') and '/' not in path[len('payment/'):]:
+                response = self._payment_information(path[len('payment/'):])
+            else:
+                return _error(404, f'No endpoint {method} {path}.')
+            if path in _CREATING_PATHS and response[0] == 200 and self._rng.random() < self.lost_response_rate:
+                return _error(504, 'Injected gateway timeout.')
+            return response
+
+    def pay(self, track_id):
+        """
+        Detects the payment of a waiting payment now; it is ``paid`` after ``confirm_after`` seconds.
+
+        :raises ValueError: If the payment is unknown or not waiting.
+        """
+        with self._lock:
+            now = self.now()
+            status = self._status(self._known(track_id), now)
+            if status != 'waiting':
+                raise ValueError(f'Payment {track_id} is {status}, not waiting.')
+            self._pay(str(track_id), now)
+
+    def expire(self, track_id):
+        """
+        Expires a waiting payment now.
+
+        :raises ValueError: If the payment is unknown or not waiting.
+        """
+        with self._lock:
+            now = self.now()
+            status = self._status(self._known(track_id), now)
+            if status != 'waiting':
+                raise ValueError(f'Payment {track_id} is {status}, not waiting.')
+            self._set(str(track_id), now, 'expired')
+
+    def set_status(self, track_id, status: str):
+        """
+        Moves a payment to any status now, e.g. 'refunded' or 'manual_accept'.
+
+        :raises ValueError: If the payment is unknown.
+        """
+        with self._lock:
+            self._known(track_id)
+            self._set(str(track_id), self.now(), status)
+
+    def deposit(self, address: str, amount: float, currency: str = 'USDT') -> str:
+        """
+        Sends a payment to a static address, recorded in the history as detected now.
+
+        :return: The track id of the payment.
+        :raises ValueError: If the address is not an active static address.
+        """
+        with self._lock:
+            static = next((a for a in self._static_addresses if a['address'] == address), None)
+            if static is None:
+                raise ValueError(f'{address} is not an active static address.')
+            now = self.now()
+            payment = self._new_payment({'amount': amount, 'currency': currency, 'email': static['email'],
+                                         'order_id': static['order_id'], 'callback_url': static['callback_url'],
+                                         'description': static['description']}, now,
+                                        type='static_address', address=address, pay_currency=currency,
+                                        network=static['network'], expired_at=0)
+            self._steps[payment['track_id']] = []
+            self._pay(payment['track_id'], now)
+            self._funded.add(address)
+            return payment['track_id']
+
+    def payment(self, track_id) -> dict:
+        """
+        :return: The payment as ``get_payment_information`` reports it now.
+        :raises ValueError: If the payment is unknown.
+        """
+        with self._lock:
+            return self._render(self._known(track_id), self.now())
+
+    def _known(self, track_id) -> dict:
+        payment = self._payments.get(str(track_id))
+        if payment is None:
+            raise ValueError(f'Unknown payment {track_id}.')
+        return payment
+
+    def _set(self, track_id: str, at: float, status: str):
+        steps = [step for step in self._steps[track_id] if step[0] <= at]
+        steps.append((at, status))
+        self._steps[track_id] = steps
+
+    def _pay(self, track_id: str, at: float):
+        self._set(track_id, at, 'paying')
+        self._steps[track_id].append((at + self.confirm_after, 'paid'))
+
+    def _status(self, payment: dict, now: float) -> str:
+        status = payment['status']
+        for at, step in self._steps[payment['track_id']]:
+            if at > now:
+                break
+            status = step
+        return status
+
+    def _paid_at(self, payment: dict, now: float) -> float:
+        return next((at for at, step in self._steps[payment['track_id']] if step == 'paying' and at <= now), None)
+
+    def _render(self, payment: dict, now: float) -> dict:
+        status = self._status(payment, now)
+        paid_at = self._paid_at(payment, now)
+        rendered = dict(payment, status=status)
+        if paid_at is not None:
+            confirmed = status != 'paying'
+            rendered['txs'] = [{
+                'tx_hash': f'{int(payment["track_id"]):064x}',
+                'amount': payment.get('pay_amount', payment['amount']),
+                'currency': payment.get('pay_currency') or payment['currency'],
+                'network': payment.get('network') or 'TRC20',
+                'address': payment.get('address') or '',
+                'status': 'confirmed' if confirmed else 'confirming',
+                'confirmations': 19 if confirmed else 1,
+                'date': int(paid_at),
+            }]
+        return rendered
+
+    def _new_payment(self, body: dict, now: float, **fields) -> dict:
+        track_id = str(next(self._track_ids))
+        lifetime = int(body.get('lifetime') or 60)
+        payment = {
+            'track_id': track_id,
+            'type': 'invoice',
+            'amount': body.get('amount', 0),
+            'currency': body.get('currency') or 'USD',
+            'status': 'waiting',
+            'fee_paid_by_payer': body.get('fee_paid_by_payer') or 0,
+            'under_paid_coverage': body.get('under_paid_coverage') or 0,
+            'lifetime': lifetime,
+            'callback_url': body.get('callback_url') or '',
+            'return_url': body.get('return_url') or '',
+            'email': body.get('email') or '',
+            'order_id': body.get('order_id') or '',
+            'description': body.get('description') or '',
+            'thanks_message': body.get('thanks_message') or '',
+            'mixed_payment': bool(body.get('mixed_payment')),
+            'expired_at': int(now) + lifetime * 60,
+            'date': int(now),
+            'txs': [],
+        }
+        payment.update(fields)
+        self._payments[track_id] = payment
+        self._history.insert(0, payment)
+        self._steps[track_id] = [(now, 'waiting'), (payment['expired_at'], 'expired')]
+        if body.get('sandbox'):
+            paid_at = now + self.sandbox_pay_after
+            if paid_at < payment['expired_at']:
+                self._pay(track_id, paid_at)
+        return payment
+
+    def _random_address(self) -> str:
+        return f'T{self._addresses.getrandbits(132):033x}'[:34]
+
+    @staticmethod
+    def _currency(symbol) -> bool:
+        return str(symbol or '').upper() in _CURRENCIES or str(symbol or '').upper() in _FIATS
+
+    # Endpoints
+
+    def _monitor(self, query, body):
+        return _ok({'status': True})
+
+    def _currencies(self, query, body):
+        return _ok({
+            symbol: {
+                'symbol': symbol,
+                'name': name,
+                'status': True,
+                'networks': {
+                    network: {'network': network, 'name': label, 'required_confirmations': confirmations,
+                              'withdraw_fee': 1, 'withdraw_min': 5, 'deposit_min': 0.5, 'static_fixed_fee': 0}
+                    for label, (network, confirmations) in networks.items()
+                },
+            }
+            for symbol, (name, networks) in _CURRENCIES.items()
+        })
+
+    def _networks(self, query, body):
+        return _ok({'list': _NETWORKS})
+
+    def _fiats(self, query, body):
+        return _ok({symbol: {'symbol': symbol, 'name': name, 'price': price, 'display_precision': 2}
+                    for symbol, (name, price) in _FIATS.items()})
+
+    def _prices(self, query, body):
+        return _ok(_PRICES)
+
+    def _accepted(self, query, body):
+        return _ok({'list': self.accepted_currencies})
+
+    def _create_invoice(self, query, body):
+        if _amount(body.get('amount')) is None:
+            return _error(400, 'The amount must be a positive number.')
+        if body.get('currency') is not None and not self._currency(body['currency']):
+            return _error(400, f'Unsupported currency {body["currency"]}.')
+        payment = self._new_payment(body, self.now())
+        return _ok({
+            'track_id': payment['track_id'],
+            'payment_url': _PAYMENT_URL.format(track_id=payment['track_id']),
+            'expired_at': payment['expired_at'],
+            'date': payment['date'],
+        })
+
+    def _create_white_label(self, query, body):
+        pay_currency = str(body.get('pay_currency') or '').upper()
+        if _amount(body.get('amount')) is None:
+            return _error(400, 'The amount must be a positive number.')
+        if pay_currency not in _CURRENCIES or pay_currency not in self.accepted_currencies:
+            return _error(400, f'Unsupported pay currency {body.get("pay_currency")}.')
+        networks = [network for network, _ in _CURRENCIES[pay_currency][1].values()]
+        network = body.get('network') or networks[0]
+        if network not in networks:
+            return _error(400, f'Network {network} is not available for {pay_currency}.')
+        currency = str(body.get('currency') or pay_currency).upper()
+        if not self._currency(currency):
+            return _error(400, f'Unsupported currency {body["currency"]}.')
+        # Units of ``currency`` per unit of ``pay_currency``.
+        rate = _usd(pay_currency) / _usd(currency)
+        payment = self._new_payment(
+            {**body, 'currency': currency}, self.now(), type='white_label', address=self._random_address(),
+            pay_currency=pay_currency, network=network, pay_amount=round(float(body['amount']) / rate, 8),
+        )
+        return _ok({
+            'track_id': payment['track_id'],
+            'amount': payment['amount'],
+            'currency': payment['currency'],
+            'pay_amount': payment['pay_amount'],
+            'pay_currency': pay_currency,
+            'network': network,
+            'address': payment['address'],
+            'callback_url': payment['callback_url'],
+            'description': payment['description'],
+            'email': payment['email'],
+            'fee_paid_by_payer': payment['fee_paid_by_payer'],
+            'lifetime': payment['lifetime'],
+            'order_id': payment['order_id'],
+            'under_paid_coverage': payment['under_paid_coverage'],
+            'rate': rate,
+            'qr_code': f'https://api.qrserver.com/v1/create-qr-code/?data={payment["address"]}',
+            'expired_at': payment['expired_at'],
+            'date': payment['date'],
+        })
+
+    def _create_static_address(self, query, body):
+        network = body.get('network')
+        if network not in _NETWORKS:
+            return _error(400, f'Unsupported network {network}.')
+        address = {
+            'track_id': str(next(self._track_ids)),
+            'network': network,
+            'address': self._random_address(),
+            'callback_url': body.get('callback_url') or '',
+            'email': body.get('email') or '',
+            'order_id': body.get('order_id') or '',
+            'description': body.get('description') or '',
+            'qr_code': '',
+            'date': int(self.now()),
+        }
+        self._static_addresses.append(address)
+        return _ok(address)
+
+    def _revoke_static_address(self, query, body):
+        before = len(self._static_addresses)
+        self._static_addresses = [a for a in self._static_addresses if a['address'] != body.get('address')]
+        if len(self._static_addresses) == before:
+            return _error(400, 'Address not found.')
+        return _ok({})
+
+    def _static_address_list(self, query, body):
+        # Newest first, like the history.
+        matching = self._static_addresses[::-1]
+        for name in ('track_id', 'network', 'address', 'order_id', 'email'):
+            if name in query:
+                matching = [a for a in matching if str(a[name]) == query[name]]
+        if 'have_tx' in query:
+            funded = query['have_tx'] == 'true'
+            matching = [a for a in matching if (a['address'] in self._funded) == funded]
+        return _page(query, matching)
+
+    def _payment_information(self, track_id: str):
+        payment = self._payments.get(track_id)
+        if payment is None:
+            return _error(400, 'Payment not found.')
+        return _ok(self._render(payment, self.now()))
+
+    def _payment_history(self, query, body):
+        now = self.now()
+        # Only the returned page is rendered; the filters read the stored fields and current status.
+        matching = self._history
+        for name in ('track_id', 'address'):
+            if name in query:
+                matching = [p for p in matching if str(p.get(name, '')) == query[name]]
+        for name in ('type', 'currency', 'pay_currency', 'network'):
+            if name in query:
+                wanted = _normalized(query[name])
+                matching = [p for p in matching if _normalized(p.get(name) or '') == wanted]
+        if 'status' in query:
+            wanted = _normalized(query['status'])
+            matching = [p for p in matching if _normalized(self._status(p, now)) == wanted]
+        for name, field, keep in (('from_date', 'date', float.__le__), ('to_date', 'date', float.__ge__),
+                                  ('from_amount', 'amount', float.__le__), ('to_amount', 'amount', float.__ge__)):
+            if name in query:
+                bound = float(query[name])
+                matching = [p for p in matching if keep(bound, float(p[field]))]
+        sort_by = query.get('sort_by', 'create_date')
+        descending = query.get('sort_type', 'desc') != 'asc'
+        if sort_by == 'amount':
+            matching = sorted(matching, key=lambda p: float(p['amount']), reverse=descending)
+        elif sort_by == 'pay_date':
+            matching = sorted(matching, key=lambda p: self._paid_at(p, now) or 0, reverse=descending)
+        elif not descending:
+            # The history is kept newest first.
+            matching = matching[::-1]
+        return _page(query, matching, lambda payment: self._render(payment, now))
+
+
+def _split(prefix: str, serializer, url: str, body: bytes) -> tuple:
+    if not url.startswith(prefix):
+        raise MockConnectionError(f'{url} is not served by the mock API at {prefix}.')
+    return url[len(prefix):], serializer.loads(body) if body else None
+
+
+def _response(serializer, status: int, payload: dict, headers: dict) -> TransportResponse:
+    return TransportResponse(status, HTTPStatus(status).phrase, headers, serializer.dumps(payload), 'application/json', 0.0)
+
+
+class MockTransport(Transport):
+    """
+    Answers ``SyncClient`` requests from a ``MockAPI`` in the same process: bodies are serialized
+    and parsed as on the wire, but no socket is opened.
+    """
+    errors = (MockConnectionError,)
+    timeout_errors = ()
+
+    def __init__(self, api: MockAPI = None, base_url: str = _GENERAL_API_URL, serializer=None):
+        """
+        :param api: The simulated API. Defaults to a new ``MockAPI()``.
+        :param base_url: The client's ``base_url``; requests to other URLs fail with ``MockConnectionError``.
+        :param serializer: JSON backend of the simulated API, as for the clients.
+        """
+        self.api = api if api is not None else MockAPI()
+        self._prefix = base_url.rstrip('/') + '/'
+        self.serializer = get_serializer(serializer)
+
+    def send(self, method: str, url: str, headers: dict, query_params: dict = None, body: bytes = None,
+             timeout: tuple = None) -> TransportResponse:
+        path, json_data = _split(self._prefix, self.serializer, url, body)
+        query = {key: str(value) for key, value in query_params.items()} if query_params else None
+        return _response(self.serializer, *self.api.handle(method, path, query, json_data, headers))
+
+
+class AsyncMockTransport(AsyncTransport):
+    """
+    Answers ``AsyncClient`` requests from a ``MockAPI`` in the same process: bodies are serialized
+    and parsed as on the wire, but no socket is opened and nothing is awaited.
+    """
+    errors = (MockConnectionError,)
+    timeout_errors = ()
+
+    def __init__(self, api: MockAPI = None, base_url: str = _GENERAL_API_URL, serializer=None):
+        """
+        :param api: The simulated API. Defaults to a new ``MockAPI()``.
+        :param base_url: The client's ``base_url``; requests to other URLs fail with ``MockConnectionError``.
+        :param serializer: JSON backend of the simulated API, as for the clients.
+        """
+        self.api = api if api is not None else MockAPI()
+        self._prefix = base_url.rstrip('/') + '/'
+        self.serializer = get_serializer(serializer)
+
+    async def send(self, method: str, url: str, headers: dict, query_params: dict = None, body: bytes = None,
+                   timeout: tuple = None, trace=None) -> TransportResponse:
+        path, json_data = _split(self._prefix, self.serializer, url, body)
+        query = {key: str(value) for key, value in query_params.items()} if query_params else None
+        return _response(self.serializer, *self.api.handle(method, path, query, json_data, headers))
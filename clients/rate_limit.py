@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class MemoryBackend:
+    """
+    Token buckets kept in process memory; shared by all threads and coroutines of one process.
+    """
+    # Never waits on I/O, so the async client calls it on the event loop.
+    blocking = False
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def reserve(self, key: str, rate: float, burst: float) -> float:
+        """
+        Takes one token from the bucket, going into debt if it is empty.
+
+        :return: Seconds the caller must wait before sending its request.
+        """
+        with self._lock:
+            now = self._clock()
+            self._buckets[key] = tokens = _take(self._buckets.get(key), rate, burst, now)
+            return _wait_for(tokens[0], rate)
+
+
+class FileBackend:
+    """
+    Token buckets stored in a small JSON file guarded by an exclusive ``flock``.
+
+    Every process on the host pointing at the same ``path`` draws from the same budget.
+    Requires a POSIX system. The async client calls it from a worker thread, as ``flock`` may wait
+    for another process.
+    """
+    blocking = True
+
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise RuntimeError('FileBackend requires fcntl, which is not available on this platform.')
+        self.path = path
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rate: float, burst: float) -> float:
+        """
+        Takes one token from the bucket, going into debt if it is empty.
+
+        :return: Seconds the caller must wait before sending its request.
+        """
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                buckets = json.loads(raw) if raw else {}
+                # Wall clock, since monotonic clocks are not comparable between processes.
+                buckets[key] = tokens = _take(buckets.get(key), rate, burst, time.time())
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(buckets))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return _wait_for(tokens[0], rate)
+
+
+def _take(bucket, rate: float, burst: float, now: float) -> list:
+    tokens, updated_at = bucket if bucket is not None else (burst, now)
+    tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+    return [tokens - 1, now]
+
+
+def _wait_for(tokens: float, rate: float) -> float:
+    return 0.0 if tokens >= 0 else -tokens / rate
+
+
+class RateLimiter:
+    """
+    Client-side token-bucket pacing, applied before every request attempt.
+
+    Each request draws one token from the overall budget and, if its endpoint matches an
+    entry of ``endpoint_limits`` (longest prefix wins), one from that endpoint's budget too.
+    Waiting is done by the caller (``time.sleep`` or ``asyncio.sleep``), so one limiter can
+    be shared by threads and coroutines; use a ``FileBackend`` to share it between processes.
+    """
+    def __init__(
+            self,
+            rate: float,
+            burst: float = None,
+            endpoint_limits: dict = None,
+            backend=None,
+            name: str = 'default',
+    ):
+        """
+        :param rate: Requests per second allowed overall.
+        :param burst: Bucket size, i.e. requests allowed back to back. Defaults to ``rate``.
+        :param endpoint_limits: ``{endpoint_prefix: (rate, burst)}`` budgets for specific endpoints, e.g. ``{'payment/invoice': (5, 5)}``.
+        :param backend: Where bucket state lives. Defaults to a ``MemoryBackend``. The async client calls
+            ``reserve`` in a worker thread unless the backend sets ``blocking = False``.
+        :param name: Namespace of the buckets in the backend; processes sharing a merchant key should use the same name.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.endpoint_limits = dict(endpoint_limits or {})
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.name = name
+        self._prefixes = sorted(self.endpoint_limits, key=len, reverse=True)
+
+    @property
+    def blocking(self) -> bool:
+        """
+        Whether ``reserve`` may block on I/O, so async callers should run it in a worker thread.
+        """
+        return getattr(self.backend, 'blocking', True)
+
+    def reserve(self, endpoint: str) -> float:
+        """
+        :return: Seconds to wait before sending a request to ``endpoint``.
+        """
+        delay = self.backend.reserve(f'{self.name}:*', self.rate, self.burst)
+        for prefix in self._prefixes:
+            if endpoint.startswith(prefix):
+                rate, burst = self.endpoint_limits[prefix]
+                delay = max(delay, self.backend.reserve(f'{self.name}:{prefix}', rate, burst))
+                break
+        return delay
@@ -0,0 +1,149 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from .exceptions import CircuitOpenError
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for transient failures.
+
+    Only GET requests are retried. A POST whose response was lost may still have taken effect, and
+    the API does not deduplicate by ``order_id``, so creating calls are retried only by the client's
+    idempotency layer, which first searches the payment history (see ``idempotency_store``).
+    Pass ``max_attempts=1`` to disable retries.
+    """
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 10.0
+    retry_statuses: tuple = (429, 500, 502, 503, 504)
+    respect_retry_after: bool = True
+
+    def is_idempotent(self, method: str, json_data=None) -> bool:
+        return method == 'GET'
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """
+        :param attempt: The number of the attempt that just failed, starting at 1.
+        :param retry_after: The ``Retry-After`` header of the failed response, if any.
+        :return: Seconds to wait before the next attempt.
+        """
+        if self.respect_retry_after and retry_after:
+            seconds = _parse_retry_after(retry_after)
+            if seconds is not None:
+                return min(seconds, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+
+def _parse_retry_after(value: str):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the API looks unhealthy.
+
+    After ``failure_threshold`` consecutive failures (connection errors and 5xx responses) the
+    circuit opens and requests raise ``CircuitOpenError`` without touching the network. Once
+    ``recovery_timeout`` seconds have passed a single probe request is let through; its outcome
+    closes or re-opens the circuit. ``get_api_status`` results are fed in through ``record_health``.
+    Safe to share between threads and coroutines.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_request(self) -> bool:
+        """
+        :return: True if this request is the half-open probe; it must then end with ``record_success``,
+            ``record_failure`` or ``release_probe``.
+        :raises CircuitOpenError: If the circuit is open, or half-open with a probe already in flight.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.OPEN:
+                remaining = self.recovery_timeout - (self._clock() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(f'Circuit open, retrying in {remaining:.1f}s.')
+                self._state = self.HALF_OPEN
+            if self._probe_in_flight:
+                raise CircuitOpenError('Circuit half-open, probe request in flight.')
+            self._probe_in_flight = True
+            return True
+
+    def release_probe(self):
+        """
+        Ends a probe that finished without an outcome, e.g. cancelled or failed before a response
+        arrived, so the next request probes again instead of finding the circuit stuck half-open.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def record_health(self, healthy: bool):
+        """
+        Feeds an out-of-band health check (e.g. ``get_api_status``) into the breaker.
+        An unhealthy report opens the circuit immediately; a healthy one closes it.
+        """
+        if healthy:
+            self.record_success()
+        else:
+            with self._lock:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+
+def _is_healthy(response_data) -> bool:
+    """
+    Interprets a ``common/monitor`` response.
+    """
+    if not isinstance(response_data, dict):
+        return False
+    data = response_data.get('data', response_data)
+    status = data.get('status') if isinstance(data, dict) else None
+    return status is True or str(status).lower() in ('ok', 'true', 'up')
@@ -0,0 +1,105 @@
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+def _encode_default(value):
+    # Models carry amounts as Decimal; the API expects plain JSON numbers.
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class StdlibSerializer:
+    """
+    JSON through the standard library ``json`` module. Always available.
+    """
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(separators=(',', ':'), default=_encode_default)
+        self._decoder = json.JSONDecoder()
+
+    def dumps(self, value) -> bytes:
+        return self._encoder.encode(value).encode()
+
+    def loads(self, data):
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode()
+        return self._decoder.decode(data)
+
+
+class OrjsonSerializer:
+    """
+    JSON through ``orjson``. Requires ``pip install orjson``.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonSerializer requires the orjson package.')
+
+    def dumps(self, value) -> bytes:
+        return orjson.dumps(value, default=_encode_default)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class MsgspecSerializer:
+    """
+    JSON through ``msgspec``. Requires ``pip install msgspec``.
+    """
+    name = 'msgspec'
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError('MsgspecSerializer requires the msgspec package.')
+        self._encoder = msgspec.json.Encoder(decimal_format='number')
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, value) -> bytes:
+        return self._encoder.encode(value)
+
+    def loads(self, data):
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            # The other serializers raise ValueError on malformed input.
+            raise ValueError(str(e)) from e
+
+
+_SERIALIZERS = {
+    'orjson': OrjsonSerializer,
+    'msgspec': MsgspecSerializer,
+    'json': StdlibSerializer,
+}
+
+
+def get_serializer(serializer=None):
+    """
+    :param serializer: A serializer instance, one of 'orjson', 'msgspec' or 'json', or None to pick
+        the fastest installed backend (orjson, then msgspec, then the standard library).
+    :return: An object with ``dumps(value) -> bytes`` and ``loads(data)``.
+    """
+    if serializer is None:
+        if orjson is not None:
+            return OrjsonSerializer()
+        if msgspec is not None:
+            return MsgspecSerializer()
+        return StdlibSerializer()
+    if isinstance(serializer, str):
+        try:
+            return _SERIALIZERS[serializer]()
+        except KeyError:
+            raise ValueError(f'Unknown serializer "{serializer}".') from None
+    return serializer
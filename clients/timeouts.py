@@ -0,0 +1,81 @@
+import time
+from dataclasses import dataclass
+
+from .exceptions import RequestTimeoutError
+
+
+@dataclass(frozen=True)
+class Timeout:
+    """
+    :ivar connect: Seconds allowed to establish a connection.
+    :ivar read: Seconds allowed between bytes of the response.
+    :ivar total: Seconds allowed for the whole call, retries and backoff included. None means no cap.
+    """
+    connect: float = 10.0
+    read: float = 30.0
+    total: float = 60.0
+
+
+class DeadlineExceededError(RequestTimeoutError):
+    """
+    The call's deadline passed before it could complete.
+    """
+
+
+class Deadline:
+    """
+    An absolute point in time by which an operation must finish.
+
+    A deadline passed to a bulk or paginated operation is shared by all its sub-requests,
+    so each one only gets the budget that is left.
+    """
+    __slots__ = ('expires_at',)
+
+    def __init__(self, seconds: float):
+        """
+        :param seconds: Seconds from now until the deadline.
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, value) -> 'Deadline':
+        """
+        Accepts a ``Deadline``, a number of seconds from now, or None.
+        """
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(value)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def earliest(self, other: 'Deadline') -> 'Deadline':
+        if other is None or self.expires_at <= other.expires_at:
+            return self
+        return other
+
+    def __repr__(self):
+        return f'Deadline(remaining={self.remaining():.3f}s)'
+
+
+def _call_deadline(timeout: Timeout, deadline: Deadline) -> Deadline:
+    """
+    The effective deadline of one call: the caller's deadline capped by ``timeout.total``.
+    """
+    if timeout.total is None:
+        return deadline
+    return Deadline(timeout.total).earliest(deadline)
+
+
+def _cap(seconds: float, deadline: Deadline) -> float:
+    """
+    A per-attempt timeout shortened to what is left of the deadline.
+    """
+    if deadline is None:
+        return seconds
+    remaining = deadline.remaining()
+    return remaining if seconds is None else min(seconds, remaining)
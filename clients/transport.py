@@ -0,0 +1,69 @@
+class TransportResponse:
+    """
+    A fully read HTTP response, as returned by a transport's ``send``.
+
+    :ivar status: HTTP status code.
+    :ivar reason: HTTP reason phrase.
+    :ivar headers: Response headers; a case-insensitive mapping, or a dict with canonical header names.
+    :ivar content: The response body.
+    :ivar content_type: The media type without parameters, e.g. 'application/json'.
+    :ivar elapsed: Seconds from sending the request to receiving the response, if the transport measures it.
+    """
+    __slots__ = ('status', 'reason', 'headers', 'content', 'content_type', 'elapsed')
+
+    def __init__(self, status: int, reason: str, headers, content: bytes, content_type: str, elapsed: float = None):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.content_type = content_type
+        self.elapsed = elapsed
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+
+class Transport:
+    """
+    What ``SyncClient`` needs from an HTTP library. The default is ``RequestsTransport``; pass another
+    implementation as ``transport`` to use a different library or ``MockTransport`` to run offline.
+
+    :cvar errors: Exception types meaning no response was received; these are retried when the call is idempotent.
+    :cvar timeout_errors: The subset of ``errors`` that are timeouts.
+    """
+    errors = ()
+    timeout_errors = ()
+
+    def send(self, method: str, url: str, headers: dict, query_params: dict = None, body: bytes = None,
+             timeout: tuple = None) -> TransportResponse:
+        """
+        :param timeout: ``(connect, read, total)`` seconds; any may be None.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class AsyncTransport:
+    """
+    What ``AsyncClient`` needs from an HTTP library. The default is ``AiohttpTransport``; pass another
+    implementation as ``transport`` to use a different library or ``AsyncMockTransport`` to run offline.
+
+    :cvar errors: Exception types meaning no response was received; these are retried when the call is idempotent.
+    :cvar timeout_errors: The subset of ``errors`` that are timeouts.
+    """
+    errors = ()
+    timeout_errors = ()
+
+    async def send(self, method: str, url: str, headers: dict, query_params: dict = None, body: bytes = None,
+                   timeout: tuple = None, trace=None) -> TransportResponse:
+        """
+        :param timeout: ``(connect, read, total)`` seconds; any may be None.
+        :param trace: The call's ``RequestEvent`` when hooks are set, for transports that report phase timings.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
@@ -0,0 +1,54 @@
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.mock_transport import MockAPI, MockTransport
+from ..utils.address_pool import SyncAddressPool
+
+
+def _pool() -> SyncAddressPool:
+    pool = SyncAddressPool(SyncOxaPay('key', transport=MockTransport(MockAPI())), {'TRC20': 3})
+    pool.fill()
+    return pool
+
+
+def test_lease_is_reused_while_active():
+    pool = _pool()
+    assert pool.lease('TRC20', order_id='o-1') is pool.lease('TRC20', order_id='o-1')
+
+
+def test_released_lease_is_not_handed_out_again():
+    pool = _pool()
+    first = pool.lease('TRC20', order_id='o-1')
+    assert pool.release(first.address)
+    assert pool.by_order_id('o-1') is None
+    second = pool.lease('TRC20', order_id='o-1')
+    assert second.address != first.address and not second.is_expired()
+
+
+def test_expired_lease_is_not_handed_out_again():
+    pool = _pool()
+    first = pool.lease('TRC20', order_id='o-1', ttl=0)
+    second = pool.lease('TRC20', order_id='o-1')
+    assert second.address != first.address and not second.is_expired()
+
+
+def test_lease_on_another_network_gets_its_own_address():
+    pool = _pool()
+    tron = pool.lease('TRC20', order_id='o-1')
+    bitcoin = pool.lease('Bitcoin', order_id='o-1')
+    assert bitcoin.network == 'Bitcoin' and bitcoin.address != tron.address
+    assert pool.by_order_id('o-1') is bitcoin
+
+
+class _LosingTransport(MockTransport):
+    """Creates static addresses but answers 504, as when the response is lost."""
+    def send(self, method, url, headers, query_params=None, body=None, timeout=None):
+        response = super().send(method, url, headers, query_params, body, timeout)
+        if url.endswith('payment/static-address') and method == 'POST':
+            response.status, response.reason = 504, 'Gateway Timeout'
+        return response
+
+
+def test_lost_reserve_creation_is_not_retried():
+    api = MockAPI()
+    pool = SyncAddressPool(SyncOxaPay('key', transport=_LosingTransport(api)), {'TRC20': 3})
+    assert pool.fill() == 0
+    assert api.requests['payment/static-address'] == 3
@@ -0,0 +1,96 @@
+import asyncio
+import gc
+import socket
+import warnings
+
+from aiohttp import web
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..benchmarks.stub_server import build_app
+from ..clients.AsyncClient import AiohttpTransport
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+async def _serve(port: int, peers: set = None) -> web.AppRunner:
+    app = build_app()
+    if peers is not None:
+        async def record_peer(request, response):
+            peers.add(request.transport.get_extra_info('peername'))
+        app.on_response_prepare.append(record_peer)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+
+def test_calls_and_copies_share_one_pooled_session():
+    port = _free_port()
+    peers = set()
+
+    async def run():
+        runner = await _serve(port, peers)
+        try:
+            async with AsyncOxaPay('key', base_url=f'http://127.0.0.1:{port}/v1', limit=4) as client:
+                session = await client._client.transport._get()
+                for _ in range(5):
+                    await client.get_prices()
+                await asyncio.gather(*(client.with_options(deadline=5).get_prices() for _ in range(20)))
+                assert await client._client.transport._get() is session
+            return session
+        finally:
+            await runner.cleanup()
+
+    session = asyncio.run(run())
+    # Leaving the context manager closed the pool.
+    assert session.closed
+    assert len(peers) <= 4
+
+
+def test_closed_client_reopens_its_session_on_next_use():
+    port = _free_port()
+
+    async def run():
+        runner = await _serve(port)
+        try:
+            client = AsyncOxaPay('key', base_url=f'http://127.0.0.1:{port}/v1')
+            await client.get_prices()
+            first = client._client.transport._session
+            await client.aclose()
+            await client.get_prices()
+            second = client._client.transport._session
+            await client.aclose()
+            return first, second
+        finally:
+            await runner.cleanup()
+
+    first, second = asyncio.run(run())
+    assert first.closed and second.closed and first is not second
+
+
+def test_session_of_a_finished_loop_is_closed():
+    port = _free_port()
+    transport = AiohttpTransport()
+    client = AsyncOxaPay('key', base_url=f'http://127.0.0.1:{port}/v1', transport=transport)
+
+    async def call():
+        runner = await _serve(port)
+        try:
+            return await client.get_api_status()
+        finally:
+            await runner.cleanup()
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ResourceWarning)
+        asyncio.run(call())
+        first = transport._session
+        asyncio.run(call())
+        assert first.closed and transport._session is not first
+        asyncio.run(transport.close())
+        del first
+        gc.collect()
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning)]
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.mock_transport import MockAPI, MockTransport
+from ..utils.cache import AsyncTTLCache, SyncTTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Fetch:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.calls
+
+
+def test_fresh_value_is_served_from_the_cache():
+    clock = _Clock()
+    cache, fetch = SyncTTLCache({'common/currencies': 60}, clock=clock), _Fetch()
+    assert [cache.get('common/currencies', fetch) for _ in range(3)] == [1, 1, 1]
+    clock.now += 61
+    assert cache.get('common/currencies', fetch) == 2
+    stats = cache.stats('common/currencies')
+    assert (stats.hits, stats.misses) == (2, 2)
+
+
+def test_keys_without_ttl_are_not_cached():
+    cache, fetch = SyncTTLCache({'common/currencies': 0}), _Fetch()
+    assert [cache.get('common/currencies', fetch) for _ in range(2)] == [1, 2]
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache, fetch = SyncTTLCache({'common/currencies': 60}), _Fetch(delay=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('common/currencies', fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 8 and fetch.calls == 1
+
+
+def test_stale_value_is_served_while_refreshing():
+    clock = _Clock()
+    cache, fetch = SyncTTLCache({'common/currencies': 60}, stale_ttl=30, clock=clock), _Fetch()
+    cache.get('common/currencies', fetch)
+    clock.now += 70
+    assert cache.get('common/currencies', fetch) == 1
+    deadline = time.monotonic() + 2
+    while cache.get('common/currencies', fetch) != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.stats('common/currencies').refreshes == 1
+
+
+def test_failed_fetch_is_raised_and_not_cached():
+    cache = SyncTTLCache({'common/currencies': 60})
+
+    def fail():
+        raise RuntimeError('down')
+
+    with pytest.raises(RuntimeError):
+        cache.get('common/currencies', fail)
+    assert cache.get('common/currencies', _Fetch()) == 1
+    assert cache.stats().errors == 1
+
+
+def test_async_concurrent_misses_share_one_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        cache = AsyncTTLCache({'common/currencies': 60})
+        return await asyncio.gather(*(cache.get('common/currencies', fetch) for _ in range(8)))
+
+    assert asyncio.run(run()) == [1] * 8 and len(calls) == 1
+
+
+def test_client_caches_reference_data():
+    api = MockAPI()
+    client = SyncOxaPay('key', transport=MockTransport(api))
+    first = client.get_supported_currencies()
+    assert client.get_supported_currencies() == first
+    assert api.requests['common/currencies'] == 1
+    client.invalidate_cache('common/currencies')
+    client.get_supported_currencies()
+    assert api.requests['common/currencies'] == 2
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import queue
+
+from ..utils.callbacks import CallbackHandler
+
+_SECRET = 'merchant-key'
+_BODY = json.dumps({'track_id': '151811887', 'status': 'Paid', 'type': 'invoice', 'amount': 10, 'currency': 'USDT'}).encode()
+
+
+def _sign(body: bytes, secret: str = _SECRET) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+
+
+def _handler(**options):
+    events = queue.Queue()
+    return CallbackHandler(_SECRET, queue=events, **options), events
+
+
+def test_valid_signature_is_queued():
+    handler, events = _handler()
+    assert handler.handle(_BODY, _sign(_BODY)) == (200, b'ok')
+    event = events.get_nowait()
+    assert (event.track_id, event.status) == ('151811887', 'Paid')
+
+
+def test_tampered_body_is_rejected():
+    handler, events = _handler()
+    tampered = _BODY.replace(b'10', b'99')
+    assert handler.handle(tampered, _sign(_BODY))[0] == 401
+    assert events.empty()
+
+
+def test_other_key_is_rejected():
+    handler, events = _handler()
+    assert handler.handle(_BODY, _sign(_BODY, 'payout-key'))[0] == 401
+
+
+def test_missing_signature_is_rejected():
+    handler, events = _handler()
+    assert handler.handle(_BODY, None)[0] == 401
+    assert events.empty()
+
+
+def test_duplicate_delivery_is_acknowledged_once():
+    handler, events = _handler()
+    assert handler.handle(_BODY, _sign(_BODY)) == (200, b'ok')
+    assert handler.handle(_BODY, _sign(_BODY)) == (200, b'ok')
+    assert events.qsize() == 1
+
+
+def test_non_object_body_is_a_bad_request():
+    handler, events = _handler()
+    for body in (b'[1, 2]', b'"paid"', b'not json'):
+        assert handler.handle(body, _sign(body))[0] == 400
+    assert events.empty()
+
+
+def test_oversize_body_is_rejected_before_reading():
+    handler, events = _handler(max_body_size=16)
+    environ = {'CONTENT_LENGTH': str(len(_BODY)), 'wsgi.input': io.BytesIO(_BODY), 'HTTP_HMAC': _sign(_BODY)}
+    statuses = []
+    handler.wsgi(environ, lambda status, headers: statuses.append(status))
+    assert statuses == ['413 Payload Too Large']
+    assert environ['wsgi.input'].tell() == 0
+
+
+def test_asgi_stops_reading_an_oversize_body():
+    handler, events = _handler(max_body_size=16)
+    chunks = [{'type': 'http.request', 'body': b'x' * 10, 'more_body': True} for _ in range(100)]
+    sent = []
+
+    async def receive():
+        return chunks.pop()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handler.asgi({'type': 'http', 'headers': [(b'hmac', b'00')]}, receive, send))
+    assert sent[0]['status'] == 413
+    assert len(chunks) == 98
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.exceptions import CircuitOpenError, ServerError, TransportError
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+from ..clients.retry import CircuitBreaker, RetryPolicy
+from ..clients.transport import Transport, AsyncTransport
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _half_open(clock: _Clock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+class _HangingTransport(AsyncTransport):
+    async def send(self, method, url, headers, query_params=None, body=None, timeout=None, trace=None):
+        await asyncio.sleep(3600)
+
+
+class _BrokenTransport(Transport):
+    def send(self, method, url, headers, query_params=None, body=None, timeout=None):
+        raise RuntimeError('unexpected')
+
+
+def test_cancelled_probe_releases_the_circuit():
+    breaker = _half_open(_Clock())
+
+    async def run():
+        hanging = AsyncOxaPay('key', circuit_breaker=breaker, transport=_HangingTransport())
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(hanging.get_prices(), 0.01)
+        # The next call probes again instead of failing with "probe request in flight".
+        healthy = AsyncOxaPay('key', circuit_breaker=breaker, transport=AsyncMockTransport(MockAPI()))
+        await healthy.get_prices()
+
+    asyncio.run(run())
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unexpected_error_releases_the_probe():
+    breaker = _half_open(_Clock())
+    broken = SyncOxaPay('key', circuit_breaker=breaker, transport=_BrokenTransport(),
+                        retry_policy=RetryPolicy(max_attempts=1))
+    with pytest.raises(RuntimeError):
+        broken.get_prices()
+    SyncOxaPay('key', circuit_breaker=breaker, transport=MockTransport(MockAPI())).get_prices()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_second_request_waits_for_the_probe():
+    breaker = _half_open(_Clock())
+    assert breaker.before_request() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.before_request() is False
+
+
+class _DownTransport(Transport):
+    errors = (ConnectionError,)
+
+    def send(self, method, url, headers, query_params=None, body=None, timeout=None):
+        raise ConnectionError('refused')
+
+
+def _tripping_client(transport) -> SyncOxaPay:
+    return SyncOxaPay('key', transport=transport, circuit_breaker=CircuitBreaker(failure_threshold=2),
+                      retry_policy=RetryPolicy(max_attempts=3, backoff_base=0))
+
+
+def test_breaker_opened_by_own_retries_reports_the_server_error():
+    with pytest.raises(ServerError) as raised:
+        _tripping_client(MockTransport(MockAPI(error_rate=1.0))).get_prices()
+    assert raised.value.status == 500
+
+
+def test_breaker_opened_by_own_retries_reports_the_transport_error():
+    with pytest.raises(TransportError):
+        _tripping_client(_DownTransport()).get_prices()
+
+
+def test_async_breaker_opened_by_own_retries_reports_the_server_error():
+    async def run():
+        client = AsyncOxaPay('key', transport=AsyncMockTransport(MockAPI(error_rate=1.0)),
+                             circuit_breaker=CircuitBreaker(failure_threshold=2),
+                             retry_policy=RetryPolicy(max_attempts=3, backoff_base=0))
+        await client.get_prices()
+
+    with pytest.raises(ServerError):
+        asyncio.run(run())
@@ -0,0 +1,68 @@
+import inspect
+
+import pytest
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.endpoints import (
+    ENDPOINTS, CREATE_INVOICE, CREATE_WHITE_LABEL_PAYMENT, GET_PAYMENT_INFORMATION, GET_PAYMENT_HISTORY,
+    GET_STATIC_ADDRESS_LIST, GET_PRICES,
+)
+from ..clients.mock_transport import MockAPI, MockTransport
+
+
+def test_post_payload_leaves_out_unset_arguments():
+    method, path, query_params, json_data = CREATE_INVOICE.prepare(10, order_id='order-1')
+    assert (method, path, query_params) == ('POST', 'payment/invoice', None)
+    # ``always`` arguments are sent even when None; others only when set.
+    assert json_data == {'amount': 10, 'lifetime': 60, 'auto_withdrawal': False, 'to_currency': 'USDT',
+                         'order_id': 'order-1', 'sandbox': False}
+    json_data = CREATE_INVOICE.prepare(None, lifetime=None, to_currency=None, sandbox=None)[3]
+    assert json_data == {'amount': None, 'lifetime': None, 'auto_withdrawal': False}
+
+
+def test_send_none_sends_every_argument():
+    json_data = CREATE_WHITE_LABEL_PAYMENT.prepare(10, 'BTC')[3]
+    assert json_data['network'] is None and json_data['pay_currency'] == 'BTC'
+    assert len(json_data) == len(CREATE_WHITE_LABEL_PAYMENT.params)
+
+
+def test_get_arguments_become_query_parameters():
+    assert GET_PAYMENT_INFORMATION.prepare(123) == ('GET', 'payment/123', None, None)
+    _, _, query_params, json_data = GET_PAYMENT_HISTORY.prepare(type_='invoice', status='paid')
+    assert json_data is None
+    assert query_params == {'type': 'invoice', 'status': 'paid', 'sort_by': 'create_date', 'sort_type': 'desc',
+                            'page': 1, 'size': 10}
+    assert GET_STATIC_ADDRESS_LIST.prepare(have_tx=False)[2]['have_tx'] == 'false'
+    assert GET_PRICES.prepare() == ('GET', 'common/prices', None, None)
+
+
+def test_missing_required_argument_raises():
+    with pytest.raises(TypeError):
+        CREATE_WHITE_LABEL_PAYMENT.prepare(10)
+
+
+def test_both_clients_get_the_same_generated_signatures():
+    for endpoint in ENDPOINTS:
+        sync, asynchronous = getattr(SyncOxaPay, endpoint.name), getattr(AsyncOxaPay, endpoint.name)
+        assert inspect.signature(sync) == inspect.signature(asynchronous)
+        assert not inspect.iscoroutinefunction(sync) and inspect.iscoroutinefunction(asynchronous)
+        assert sync.__doc__ == asynchronous.__doc__ and sync._endpoint is endpoint
+
+    signature = inspect.signature(SyncOxaPay.create_invoice)
+    assert list(signature.parameters)[:3] == ['self', 'amount', 'currency']
+    assert signature.parameters['amount'].default is inspect.Parameter.empty
+    assert signature.parameters['lifetime'].default == 60
+    assert signature.parameters['amount'].annotation is float
+    assert list(signature.parameters)[-1] == 'raw_response'
+    assert ':param order_id:' in SyncOxaPay.create_invoice.__doc__
+    assert 'raw_response' not in inspect.signature(SyncOxaPay.get_supported_networks).parameters
+
+
+def test_parse_builds_models_unless_raw():
+    client = SyncOxaPay('key', transport=MockTransport(MockAPI()))
+    raw = client.create_invoice(amount=10, currency='USD', raw_response=True)
+    invoice = CREATE_INVOICE.parse(raw)
+    assert invoice.track_id == raw['data']['track_id']
+    assert CREATE_INVOICE.parse(raw, raw_response=True) is raw
+    assert client.get_payment_information(invoice.track_id).track_id == invoice.track_id
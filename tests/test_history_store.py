@@ -0,0 +1,69 @@
+import asyncio
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+
+
+def _invoice(api: MockAPI) -> str:
+    return api.handle('POST', 'payment/invoice', body={'amount': 10, 'currency': 'USD'})[1]['data']['track_id']
+
+
+def test_first_sync_mirrors_the_whole_history():
+    api = MockAPI(history_size=30)
+    mirror = SyncOxaPay('key', transport=MockTransport(api)).history_mirror()
+    report = mirror.sync(page_size=10)
+    assert report.fetched == len(mirror.store) == 30
+    assert report.watermark == api.payment('200000000')['date']
+
+    page = mirror.query(status='PAID', sort_by='amount', sort_type='asc', size=5)
+    assert page.total == 20 and page.last_page == 4
+    amounts = [payment.amount for payment in page.payments]
+    assert amounts == sorted(amounts) and {payment.status for payment in page.payments} == {'paid'}
+    assert mirror.query(order_id='ORD-7', raw_response=True)['data']['list'][0]['track_id'] == '200000007'
+    assert mirror.store.get('200000003').status == 'expired'
+
+
+def test_later_syncs_fetch_new_and_open_payments_only():
+    api = MockAPI(history_size=30)
+    mirror = SyncOxaPay('key', transport=MockTransport(api)).history_mirror()
+    mirror.sync(page_size=10)
+
+    api.advance(60)
+    track_id = _invoice(api)
+    report = mirror.sync(page_size=10)
+    assert report.fetched < 5 and len(mirror.store) == 31
+    assert mirror.store.get(track_id).status == 'waiting'
+
+    api.pay(track_id)
+    mirror.sync(page_size=10)
+    assert mirror.store.get(track_id).status == 'paying'
+    assert [row[0] for row in mirror.store.open_payments()] == [track_id]
+
+
+def test_open_payments_older_than_the_window_are_looked_up():
+    api = MockAPI()
+    mirror = SyncOxaPay('key', transport=MockTransport(api)).history_mirror(rescan_window=0)
+    track_id = _invoice(api)
+    mirror.sync()
+    api.expire(track_id)
+    report = mirror.sync()
+    assert report.rechecked == 1 and api.requests[f'payment/{track_id}'] == 1
+    assert mirror.store.get(track_id).status == 'expired'
+    assert mirror.store.open_payments() == []
+
+
+def test_async_mirror_syncs_incrementally():
+    api = MockAPI(history_size=30)
+    track_id = _invoice(api)
+
+    async def run():
+        mirror = AsyncOxaPay('key', transport=AsyncMockTransport(api)).history_mirror()
+        first = await mirror.sync(page_size=10)
+        api.pay(track_id)
+        second = await mirror.sync(page_size=10)
+        return mirror, first, second
+
+    mirror, first, second = asyncio.run(run())
+    assert first.fetched == 31 and second.fetched < 5
+    assert mirror.store.get(track_id, raw_response=True)['status'] == 'paying'
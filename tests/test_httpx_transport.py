@@ -0,0 +1,72 @@
+import asyncio
+import importlib.util
+import socket
+
+import pytest
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..benchmarks.stub_server import start_server, start_server_process
+from ..clients.AsyncClient import HttpxTransport
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+@pytest.mark.skipif(importlib.util.find_spec('httpx') is not None, reason='httpx is installed')
+def test_missing_httpx_is_reported():
+    with pytest.raises(ImportError, match='httpx'):
+        HttpxTransport()
+    with pytest.raises(ImportError, match='httpx'):
+        AsyncOxaPay('key', http2=True)
+
+
+def test_http1_calls_and_a_second_loop():
+    pytest.importorskip('httpx')
+    transport = HttpxTransport(http2=False)
+
+    async def call():
+        runner, base_url = await start_server()
+        try:
+            client = AsyncOxaPay('key', base_url=base_url, transport=transport)
+            invoice = await client.create_invoice(amount=10, currency='USD')
+            return (await client.get_payment_information(invoice.track_id)).track_id == invoice.track_id
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(call())
+    first = transport._client
+    assert asyncio.run(call())
+    assert first.is_closed and transport._client is not first
+    asyncio.run(transport.close())
+
+
+def test_http2_calls_are_multiplexed():
+    httpx = pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    pytest.importorskip('hypercorn')
+
+    process, base_url = start_server_process(port=_free_port(), http2=True)
+    try:
+        async def run():
+            async with AsyncOxaPay('key', base_url=base_url, transport=HttpxTransport(http1=False)) as client:
+                await asyncio.gather(*(client.get_prices() for _ in range(50)))
+            async with httpx.AsyncClient() as probe:
+                return (await probe.get(f'{base_url.rsplit("/v1", 1)[0]}/_stub/connections')).json()
+
+        stats = asyncio.run(run())
+    finally:
+        process.terminate()
+    assert stats['requests'] == {'2': 50}
+    assert stats['connections'] < 50
+
+
+def test_http2_benchmark_runs():
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    pytest.importorskip('hypercorn')
+    from ..benchmarks import http2
+
+    http2.main(total=40, concurrency=10, limit=0, port=_free_port())
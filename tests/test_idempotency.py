@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+from ..utils.idempotency import PENDING, IdempotencyRecord, SQLiteIdempotencyStore
+
+
+class _GatedTransport(MockTransport):
+    """Holds invoice creations until ``gate`` is set."""
+    def __init__(self, api):
+        super().__init__(api)
+        self.gate = threading.Event()
+        self.sending = threading.Event()
+
+    def send(self, method, url, headers, query_params=None, body=None, timeout=None):
+        if url.endswith('payment/invoice'):
+            self.sending.set()
+            self.gate.wait(5)
+        return super().send(method, url, headers, query_params, body, timeout)
+
+
+def _claim(owner: str, lease_until: float) -> IdempotencyRecord:
+    return IdempotencyRecord(PENDING, '{}', created=time.time(), owner=owner, lease_until=lease_until)
+
+
+def test_live_claim_is_not_taken_over(tmp_path):
+    path = str(tmp_path / 'idempotency.db')
+    first, second = SQLiteIdempotencyStore(path), SQLiteIdempotencyStore(path)
+    assert first.claim('key', _claim('a', time.time() + 60)) is None
+    assert second.claim('key', _claim('b', time.time() + 60)).owner == 'a'
+    assert first.get('key').owner == 'a'
+
+
+def test_lapsed_claim_is_taken_over(tmp_path):
+    path = str(tmp_path / 'idempotency.db')
+    first, second = SQLiteIdempotencyStore(path), SQLiteIdempotencyStore(path)
+    first.claim('key', _claim('a', time.time() - 1))
+    assert second.claim('key', _claim('b', time.time() + 60)).owner == 'a'
+    assert first.get('key').owner == 'b'
+
+
+def test_clients_sharing_a_store_file_create_once(tmp_path):
+    path = str(tmp_path / 'idempotency.db')
+    api = MockAPI()
+    transport = _GatedTransport(api)
+    first = SyncOxaPay('key', transport=transport, idempotency_store=SQLiteIdempotencyStore(path))
+    second = SyncOxaPay('key', transport=MockTransport(api), idempotency_store=SQLiteIdempotencyStore(path))
+    results = {}
+
+    def create(name, client):
+        results[name] = client.create_invoice(amount=10, currency='USD', order_id='order-1')
+
+    leader = threading.Thread(target=create, args=('first', first))
+    leader.start()
+    assert transport.sending.wait(5)
+    follower = threading.Thread(target=create, args=('second', second))
+    follower.start()
+    time.sleep(0.2)
+    assert 'second' not in results
+    transport.gate.set()
+    leader.join(5)
+    follower.join(5)
+    assert results['first'].track_id == results['second'].track_id
+    assert api.requests['payment/invoice'] == 1
+
+
+def test_async_client_claims_sqlite_off_the_event_loop(tmp_path):
+    store = SQLiteIdempotencyStore(str(tmp_path / 'idempotency.db'))
+    threads = set()
+    claim = store.claim
+
+    def recording_claim(key, record):
+        threads.add(threading.get_ident())
+        return claim(key, record)
+
+    store.claim = recording_claim
+
+    async def run():
+        async with AsyncOxaPay('key', transport=AsyncMockTransport(MockAPI()), idempotency_store=store) as client:
+            invoice = await client.create_invoice(amount=10, currency='USD', order_id='order-1')
+            again = await client.create_invoice(amount=10, currency='USD', order_id='order-1')
+        return invoice, again
+
+    invoice, again = asyncio.run(run())
+    assert invoice.track_id == again.track_id
+    assert threads and threading.get_ident() not in threads
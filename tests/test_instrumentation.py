@@ -0,0 +1,22 @@
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.instrumentation import RequestHooks
+from ..clients.mock_transport import MockAPI, MockTransport
+
+
+class _Recorder(RequestHooks):
+    def __init__(self):
+        self.events = []
+
+    def after_request(self, event):
+        self.events.append(event)
+
+
+def test_events_carry_the_path_template():
+    hooks = _Recorder()
+    client = SyncOxaPay('key', transport=MockTransport(MockAPI()), hooks=hooks)
+    invoice = client.create_invoice(amount=10, currency='USD')
+    client.get_payment_information(int(invoice.track_id))
+    created, looked_up = hooks.events
+    assert (created.endpoint, created.route) == ('payment/invoice', 'payment/invoice')
+    assert looked_up.endpoint == f'payment/{invoice.track_id}'
+    assert looked_up.route == 'payment/{track_id}'
@@ -0,0 +1,52 @@
+import asyncio
+
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+from ..utils.merchant_pool import SyncMerchantPool, AsyncMerchantPool
+
+_MERCHANTS = {'a': 'key-a', 'b': 'key-b'}
+
+
+def _api_with_addresses(count: int) -> MockAPI:
+    api = MockAPI()
+    for i in range(count):
+        api.handle('POST', 'payment/static-address', body={'network': 'TRC20', 'order_id': f'addr-{i}'})
+    return api
+
+
+def test_static_addresses_reads_every_page():
+    # The mock serves every key the same addresses, so each merchant sees all 25.
+    with SyncMerchantPool(_MERCHANTS, transport=MockTransport(_api_with_addresses(25))) as pool:
+        addresses = pool.static_addresses()
+    assert len(addresses) == 50
+    assert {merchant_id for merchant_id, _ in addresses} == {'a', 'b'}
+
+
+def test_async_static_addresses_reads_every_page():
+    async def run():
+        async with AsyncMerchantPool(_MERCHANTS, transport=AsyncMockTransport(_api_with_addresses(25))) as pool:
+            return await pool.static_addresses()
+
+    assert len(asyncio.run(run())) == 50
+
+
+def _pool_with_payments() -> SyncMerchantPool:
+    api = MockAPI()
+    pool = SyncMerchantPool(_MERCHANTS, transport=MockTransport(api))
+    for i in range(3):
+        pool['a'].create_invoice(amount=10 + i, currency='USD', order_id=f'order-{i}')
+        api.advance(60)
+    return pool
+
+
+def test_payment_history_is_merged_newest_first():
+    with _pool_with_payments() as pool:
+        history = pool.payment_history()
+    dates = [payment.date for _, payment in history]
+    assert len(history) == 6 and dates == sorted(dates, reverse=True)
+
+
+def test_payment_history_accepts_raw_rows():
+    with _pool_with_payments() as pool:
+        history = pool.payment_history(raw_response=True, sort_type='asc')
+    dates = [int(row['date']) for _, row in history]
+    assert len(history) == 6 and dates == sorted(dates)
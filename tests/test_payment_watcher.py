@@ -0,0 +1,82 @@
+import asyncio
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..clients.mock_transport import MockAPI, AsyncMockTransport
+
+
+def _invoices(api: MockAPI, count: int) -> list:
+    return [api.handle('POST', 'payment/invoice', body={'amount': 10, 'currency': 'USD'})[1]['data']['track_id']
+            for _ in range(count)]
+
+
+async def _collect(watcher, count: int) -> list:
+    return [await asyncio.wait_for(watcher.__anext__(), 2) for _ in range(count)]
+
+
+def test_changes_are_reported_until_final():
+    api = MockAPI()
+    paid, expired = _invoices(api, 2)
+
+    async def run():
+        client = AsyncOxaPay('key', transport=AsyncMockTransport(api))
+        async with client.watch_payments(min_interval=0.01, max_interval=0.05) as watcher:
+            watcher.watch(paid, status='waiting')
+            watcher.watch(expired, status='waiting')
+            api.pay(paid)
+            api.expire(expired)
+            changes = await _collect(watcher, 2)
+            api.advance(api.confirm_after)
+            changes += await _collect(watcher, 1)
+            return changes, len(watcher)
+
+    changes, remaining = asyncio.run(run())
+    assert {(c.track_id, c.old_status, c.new_status) for c in changes} == {
+        (paid, 'waiting', 'paying'), (expired, 'waiting', 'expired'), (paid, 'paying', 'paid'),
+    }
+    assert [c.is_final for c in changes if c.track_id == paid] == [False, True]
+    assert remaining == 0
+
+
+def test_due_payments_are_coalesced_into_history_pages():
+    api = MockAPI(history_size=50)
+    track_ids = _invoices(api, 5)
+    for track_id in track_ids:
+        api.set_status(track_id, 'paid')
+    seen = []
+
+    async def on_change(change):
+        seen.append(change.track_id)
+
+    async def run():
+        client = AsyncOxaPay('key', transport=AsyncMockTransport(api))
+        async with client.watch_payments(coalesce_threshold=3, on_change=on_change) as watcher:
+            for track_id in track_ids:
+                watcher.watch(track_id, status='waiting')
+            await _collect(watcher, len(track_ids))
+            return len(watcher)
+
+    assert asyncio.run(run()) == 0
+    assert sorted(seen) == sorted(track_ids)
+    assert api.requests['payment'] == 1
+    assert not any(api.requests[f'payment/{track_id}'] for track_id in track_ids)
+
+
+def test_unwatched_payments_are_not_checked():
+    api = MockAPI()
+    kept, dropped = _invoices(api, 2)
+
+    async def run():
+        client = AsyncOxaPay('key', transport=AsyncMockTransport(api))
+        watcher = client.watch_payments(min_interval=0.01, max_interval=0.05)
+        watcher.watch(kept, status='waiting')
+        watcher.watch(dropped, status='waiting')
+        watcher.unwatch(dropped)
+        api.expire(kept)
+        api.expire(dropped)
+        async with watcher:
+            change = await _collect(watcher, 1)
+        return change[0], dropped in watcher
+
+    change, watching = asyncio.run(run())
+    assert change.track_id == kept and not watching
+    assert api.requests[f'payment/{dropped}'] == 0
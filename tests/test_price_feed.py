@@ -0,0 +1,41 @@
+import asyncio
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.exceptions import TransportError
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+from ..clients.retry import RetryPolicy
+
+
+def test_refresh_publishes_a_new_snapshot():
+    feed = SyncOxaPay('key', transport=MockTransport(MockAPI())).price_feed()
+    assert feed.snapshot is None and feed.is_stale and feed.price('BTC') is None
+    first = feed.refresh()
+    second = feed.refresh()
+    assert (first.version, second.version) == (1, 2)
+    assert feed.price('btc') == first['BTC'] and 'usdt' in second
+    assert not feed.is_stale
+
+
+def test_failed_poll_keeps_the_last_snapshot():
+    api = MockAPI()
+    client = SyncOxaPay('key', transport=MockTransport(api), retry_policy=RetryPolicy(max_attempts=1))
+    with client.price_feed(interval=0.01) as feed:
+        assert feed.wait_for_update(timeout=2) is not None
+        api.drop_rate = 1.0
+        version = feed.snapshot.version
+        feed.wait_for_update(timeout=0.1)
+    assert isinstance(feed.last_error, TransportError)
+    assert feed.snapshot.version == version and feed.price('BTC')
+
+
+def test_async_feed_polls_in_the_background():
+    async def run():
+        client = AsyncOxaPay('key', transport=AsyncMockTransport(MockAPI()))
+        async with client.price_feed(interval=0.01) as feed:
+            first = await feed.wait_for_update(timeout=2)
+            second = await feed.wait_for_update(timeout=2)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert second.version > first.version and second['ETH'] > 0
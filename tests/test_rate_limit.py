@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+from ..clients.rate_limit import FileBackend, MemoryBackend, RateLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_paced():
+    clock = _Clock()
+    limiter = RateLimiter(rate=2, burst=2, backend=MemoryBackend(clock))
+    assert [limiter.reserve('payment/invoice') for _ in range(2)] == [0.0, 0.0]
+    assert limiter.reserve('payment/invoice') == 0.5
+    assert limiter.reserve('payment/invoice') == 1.0
+    clock.now += 1.0
+    assert limiter.reserve('payment/invoice') == 0.5
+
+
+def test_endpoint_limit_applies_by_longest_prefix():
+    limiter = RateLimiter(rate=100, endpoint_limits={'payment': (100, 100), 'payment/invoice': (1, 1)},
+                          backend=MemoryBackend(_Clock()))
+    assert limiter.reserve('payment/invoice') == 0.0
+    assert limiter.reserve('payment/invoice') == 1.0
+    assert limiter.reserve('payment/history') == 0.0
+
+
+def test_file_backend_shares_the_budget(tmp_path):
+    path = str(tmp_path / 'buckets.json')
+    first = RateLimiter(rate=1, burst=1, backend=FileBackend(path))
+    second = RateLimiter(rate=1, burst=1, backend=FileBackend(path))
+    assert first.reserve('payment/invoice') == 0.0
+    assert second.reserve('payment/invoice') > 0.9
+
+
+def test_client_waits_for_the_limiter():
+    limiter = RateLimiter(rate=1000, burst=1)
+    client = SyncOxaPay('key', transport=MockTransport(MockAPI()), rate_limiter=limiter)
+    client.create_invoice(amount=10, currency='USD')
+    assert limiter.reserve('payment/invoice') > 0
+
+
+def test_async_client_reserves_file_tokens_off_the_event_loop(tmp_path):
+    backend = FileBackend(str(tmp_path / 'buckets.json'))
+    threads = set()
+    reserve = backend.reserve
+
+    def recording_reserve(*args):
+        threads.add(threading.get_ident())
+        return reserve(*args)
+
+    backend.reserve = recording_reserve
+
+    async def run():
+        limiter = RateLimiter(rate=1000, backend=backend)
+        async with AsyncOxaPay('key', transport=AsyncMockTransport(MockAPI()), rate_limiter=limiter) as client:
+            await client.create_invoice(amount=10, currency='USD')
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert threads and loop_thread not in threads
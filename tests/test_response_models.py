@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+from ..utils.response_models import PaymentStatus, WhiteLabelPayment
+
+
+def test_fee_paid_by_payer_keeps_fractions():
+    assert PaymentStatus.from_dict({'fee_paid_by_payer': 0.5}).fee_paid_by_payer == 0.5
+    assert WhiteLabelPayment.from_dict({'fee_paid_by_payer': '0.25'}).fee_paid_by_payer == 0.25
+
+
+def test_unparseable_numbers_are_kept_as_sent():
+    payment = PaymentStatus.from_dict({'under_paid_coverage': '', 'lifetime': 'n/a', 'amount': 'x'})
+    assert payment.under_paid_coverage == ''
+    assert payment.lifetime == 'n/a'
+    assert payment.amount == 'x'
+
+
+def test_amounts_are_decimals():
+    assert PaymentStatus.from_dict({'amount': 0.1}).amount == Decimal('0.1')
+
+
+def test_amounts_are_converted_on_first_read():
+    payment = PaymentStatus.from_dict({'amount': 12})
+    assert payment._amount == 12
+    assert payment.amount == Decimal('12')
+    assert payment._amount.__class__ is Decimal
+
+
+def test_models_round_trip_through_pickle():
+    import pickle
+
+    payment = PaymentStatus.from_dict({'track_id': '1', 'amount': '1.5', 'txs': [{'amount': 2}]})
+    restored = pickle.loads(pickle.dumps(payment))
+    assert restored == payment
+    assert restored.txs[0].amount == Decimal('2')
@@ -0,0 +1,30 @@
+import pytest
+
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.exceptions import ServerError
+from ..clients.mock_transport import MockAPI, MockTransport
+from ..clients.retry import RetryPolicy
+from ..utils.idempotency import MemoryIdempotencyStore
+
+
+def test_only_get_is_retried_blindly():
+    policy = RetryPolicy()
+    assert policy.is_idempotent('GET')
+    assert not policy.is_idempotent('POST', {'order_id': 'order-1'})
+
+
+def test_lost_creations_are_not_sent_twice_without_a_store():
+    api = MockAPI(lost_response_rate=1.0, seed=1)
+    client = SyncOxaPay('key', transport=MockTransport(api))
+    with pytest.raises(ServerError):
+        client.create_invoice(amount=10, currency='USD', order_id='order-1')
+    assert api.requests['payment/invoice'] == 1
+
+
+def test_lost_creations_are_reconciled_with_a_store():
+    api = MockAPI(lost_response_rate=0.5, seed=1)
+    client = SyncOxaPay('key', transport=MockTransport(api), idempotency_store=MemoryIdempotencyStore(),
+                        retry_policy=RetryPolicy(backoff_base=0.001))
+    for i in range(20):
+        client.create_invoice(amount=10, currency='USD', order_id=f'order-{i}')
+    assert api.requests['payment/invoice'] == 20
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ..SyncOxaPay import SyncOxaPay
+from ..clients import SyncClient as sync_client_module
+from ..clients.mock_transport import MockAPI, MockTransport
+
+_WORKERS = 16
+_ORDERS = 200
+
+
+class _MockAdapter(HTTPAdapter):
+    """An adapter answering from a ``MockTransport`` instead of a socket, counting its instances."""
+    instances = []
+
+    def __init__(self, mock: MockTransport, **options):
+        super().__init__(**options)
+        self.mock = mock
+        self.threads = set()
+        _MockAdapter.instances.append(self)
+
+    def send(self, request, **kwargs):
+        self.threads.add(threading.get_ident())
+        parts = urlsplit(request.url)
+        url = parts._replace(query='').geturl()
+        answer = self.mock.send(request.method, url, dict(request.headers), dict(parse_qsl(parts.query)), request.body)
+        response = requests.Response()
+        response.status_code = answer.status
+        response.reason = answer.reason
+        response.headers = CaseInsensitiveDict(answer.headers, **{'Content-Type': answer.content_type})
+        response._content = answer.content
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def _checkout(client: SyncOxaPay, i: int):
+    order = client.create_invoice(amount=10 + i, currency='USD', order_id=f'order-{i}')
+    return i, client.get_payment_information(int(order.track_id))
+
+
+def _run(client: SyncOxaPay) -> dict:
+    with ThreadPoolExecutor(_WORKERS) as executor:
+        return dict(executor.map(lambda i: _checkout(client, i), range(_ORDERS)))
+
+
+def _check(payments: dict):
+    assert len(payments) == _ORDERS
+    for i, payment in payments.items():
+        assert payment.order_id == f'order-{i}'
+        assert payment.amount == 10 + i
+
+
+def test_shared_client_across_threads():
+    api = MockAPI()
+    transport = MockTransport(api)
+    with SyncOxaPay('key', transport=transport) as client:
+        _check(_run(client))
+        assert client._client.transport is transport
+    assert api.requests['payment/invoice'] == _ORDERS
+    assert sum(api.requests.values()) == 2 * _ORDERS
+
+
+def test_threads_share_one_session(monkeypatch):
+    mock = MockTransport(MockAPI())
+    _MockAdapter.instances = []
+    monkeypatch.setattr(sync_client_module, 'HTTPAdapter', lambda **options: _MockAdapter(mock, **options))
+    with SyncOxaPay('key') as client:
+        _check(_run(client))
+        session = client._client.transport._session
+    adapter, = _MockAdapter.instances
+    assert session.get_adapter('https://api.oxapay.com/') is adapter
+    assert len(adapter.threads) > 1
@@ -0,0 +1,75 @@
+import asyncio
+import socket
+
+import pytest
+from aiohttp import web
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..benchmarks.stub_server import build_app
+from ..clients.exceptions import RateLimitedError, RequestTimeoutError
+from ..clients.mock_transport import MockAPI, MockTransport
+from ..clients.retry import RetryPolicy
+from ..clients.timeouts import Deadline, DeadlineExceededError, Timeout
+
+
+class _RecordingTransport(MockTransport):
+    def __init__(self, api=None):
+        super().__init__(api)
+        self.timeouts = []
+
+    def send(self, method, url, headers, query_params=None, body=None, timeout=None):
+        self.timeouts.append(timeout)
+        return super().send(method, url, headers, query_params, body, timeout)
+
+
+def test_attempt_timeouts_come_from_the_client():
+    transport = _RecordingTransport()
+    SyncOxaPay('key', transport=transport, timeout=Timeout(connect=2, read=5, total=20)).get_api_status()
+    connect, read, total = transport.timeouts[0]
+    assert (connect, read) == (2, 5) and 19 < total <= 20
+
+
+def test_deadline_caps_every_attempt():
+    transport = _RecordingTransport()
+    client = SyncOxaPay('key', transport=transport)
+    client.with_options(deadline=1.5).get_api_status()
+    assert all(0 < value <= 1.5 for value in transport.timeouts[0])
+
+
+def test_expired_deadline_sends_nothing():
+    api = MockAPI()
+    client = SyncOxaPay('key', transport=MockTransport(api))
+    with pytest.raises(DeadlineExceededError):
+        client.with_options(deadline=Deadline(0)).create_invoice(amount=10, currency='USD')
+    assert api.requests['payment/invoice'] == 0
+
+
+def test_backoff_longer_than_the_deadline_is_not_waited():
+    api = MockAPI(throttle_rate=1.0, retry_after=30)
+    client = SyncOxaPay('key', transport=MockTransport(api), retry_policy=RetryPolicy(backoff_max=60))
+    with pytest.raises(RateLimitedError) as raised:
+        client.with_options(deadline=1).get_prices()
+    assert raised.value.status == 429 and raised.value.elapsed < 1
+    assert api.requests['common/prices'] == 1
+
+
+def test_slow_response_times_out():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    async def run():
+        runner = web.AppRunner(build_app(latency=0.5))
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        client = AsyncOxaPay('key', base_url=f'http://127.0.0.1:{port}/v1', timeout=Timeout(read=0.05, total=5),
+                             retry_policy=RetryPolicy(max_attempts=1))
+        try:
+            await client.get_api_status()
+        finally:
+            await client.aclose()
+            await runner.cleanup()
+
+    with pytest.raises(RequestTimeoutError):
+        asyncio.run(run())
@@ -0,0 +1,62 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.AsyncClient import AiohttpTransport
+from ..clients.exceptions import InvalidResponseError, TransportError
+from ..clients.retry import RetryPolicy
+from ..clients.transport import AsyncTransport, Transport, TransportResponse
+
+_TRUNCATED = TransportResponse(200, 'OK', {}, b'{"data": {"track_id": "12', 'application/json')
+
+
+class _TruncatingTransport(Transport):
+    def send(self, method, url, headers, query_params=None, body=None, timeout=None):
+        return _TRUNCATED
+
+
+class _AsyncTruncatingTransport(AsyncTransport):
+    async def send(self, method, url, headers, query_params=None, body=None, timeout=None, trace=None):
+        return _TRUNCATED
+
+
+class _PayloadErrorTransport(AiohttpTransport):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def send(self, method, url, headers, query_params=None, body=None, timeout=None, trace=None):
+        self.calls += 1
+        raise aiohttp.ClientPayloadError('Response payload is not completed')
+
+
+def test_truncated_json_raises_invalid_response():
+    client = SyncOxaPay('key', transport=_TruncatingTransport())
+    with pytest.raises(InvalidResponseError) as raised:
+        client.get_payment_information(12)
+    assert raised.value.status == 200
+
+
+def test_async_truncated_json_raises_invalid_response():
+    async def run():
+        async with AsyncOxaPay('key', transport=_AsyncTruncatingTransport()) as client:
+            await client.get_payment_information(12)
+
+    with pytest.raises(InvalidResponseError):
+        asyncio.run(run())
+
+
+def test_aiohttp_payload_error_is_retried_as_transport_error():
+    transport = _PayloadErrorTransport()
+
+    async def run():
+        policy = RetryPolicy(max_attempts=2, backoff_base=0, backoff_max=0)
+        async with AsyncOxaPay('key', transport=transport, retry_policy=policy) as client:
+            await client.get_payment_information(12)
+
+    with pytest.raises(TransportError):
+        asyncio.run(run())
+    assert transport.calls == 2
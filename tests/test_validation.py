@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+from ..clients.exceptions import ServerError, ValidationError
+from ..clients.mock_transport import MockAPI, MockTransport, AsyncMockTransport
+from ..clients.retry import RetryPolicy
+
+
+def _client(api: MockAPI, **kwargs) -> SyncOxaPay:
+    return SyncOxaPay('key', transport=MockTransport(api), validate=True, **kwargs)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'amount': -1, 'currency': 'USD'},
+    {'amount': 'ten', 'currency': 'USD'},
+    {'amount': 10, 'currency': 'XYZ'},
+    {'amount': 10, 'currency': 'USD', 'to_currency': 'EUR'},
+])
+def test_invalid_invoices_are_not_sent(kwargs):
+    api = MockAPI()
+    with pytest.raises(ValidationError) as raised:
+        _client(api).create_invoice(**kwargs)
+    assert raised.value.endpoint == 'payment/invoice' and 'before sending' in str(raised.value)
+    assert api.requests['payment/invoice'] == 0
+
+
+@pytest.mark.parametrize('kwargs, reason', [
+    ({'amount': 10, 'pay_currency': 'DOGE'}, 'not a supported currency'),
+    ({'amount': 10, 'pay_currency': 'BTC', 'network': 'TRC20'}, 'not available for BTC'),
+    ({'amount': 0.1, 'pay_currency': 'BTC'}, 'deposit minimum'),
+    ({'amount': 10, 'pay_currency': 'LTC'}, 'not enabled for this merchant'),
+])
+def test_invalid_white_label_payments_are_not_sent(kwargs, reason):
+    api = MockAPI(accepted_currencies=['BTC', 'USDT'])
+    with pytest.raises(ValidationError, match=reason):
+        _client(api).create_white_label_payment(**kwargs)
+    assert api.requests['payment/white-label'] == 0
+
+
+def test_valid_payloads_are_sent():
+    api = MockAPI()
+    client = _client(api)
+    client.create_invoice(amount=10, currency='usd')
+    # The deposit minimum does not apply to fiat amounts.
+    client.create_white_label_payment(amount=0.1, pay_currency='usdt', currency='USD', network='TRC20')
+    client.create_static_address(network='TRC20')
+    with pytest.raises(ValidationError, match='not a supported network'):
+        client.create_static_address(network='Solana')
+    assert api.requests['payment/invoice'] == api.requests['payment/white-label'] == 1
+    assert api.requests['payment/static-address'] == 1
+    # The reference data is read once and reused.
+    assert api.requests['common/currencies'] == 1
+
+
+def test_index_follows_the_reference_data_cache():
+    api = MockAPI()
+    client = _client(api)
+    client.create_white_label_payment(amount=10, pay_currency='USDT')
+    api.accepted_currencies = ['BTC']
+    client.invalidate_cache()
+    with pytest.raises(ValidationError, match='not enabled for this merchant'):
+        client.create_white_label_payment(amount=10, pay_currency='USDT')
+
+
+def test_unavailable_reference_data_leaves_the_check_to_the_api():
+    api = MockAPI(error_rate=1.0)
+    client = _client(api, retry_policy=RetryPolicy(max_attempts=1))
+    with pytest.raises(ServerError):
+        client.create_invoice(amount=10, currency='XYZ')
+    assert api.requests['payment/invoice'] == 1
+    assert isinstance(client._validator.last_error, ServerError)
+
+
+def test_async_client_validates_before_sending():
+    api = MockAPI()
+
+    async def run():
+        client = AsyncOxaPay('key', transport=AsyncMockTransport(api), validate=True)
+        with pytest.raises(ValidationError):
+            await client.create_static_address(network='Solana')
+        return await client.create_static_address(network='TRC20')
+
+    assert asyncio.run(run()).address
+    assert api.requests['payment/static-address'] == 1
@@ -0,0 +1,187 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class AddressDiff:
+    """
+    What changed in the static address list since the previous ``sync``.
+
+    :ivar added: ``StaticAddress`` records that appeared.
+    :ivar revoked: ``StaticAddress`` records that disappeared.
+    :ivar total: Number of addresses in the index after the sync.
+    :ivar requests: Number of list pages fetched.
+    :ivar full_scan: Whether the whole list had to be downloaded.
+    :ivar elapsed: Seconds the sync took.
+    """
+    added: list = field(default_factory=list)
+    revoked: list = field(default_factory=list)
+    total: int = 0
+    requests: int = 0
+    full_scan: bool = False
+    elapsed: float = 0.0
+
+    def __bool__(self):
+        return bool(self.added or self.revoked)
+
+
+class _BaseAddressIndex:
+    def __init__(self, oxapay, page_size: int = 200, **filters):
+        """
+        :param oxapay: The ``SyncOxaPay`` or ``AsyncOxaPay`` instance used to list the addresses.
+        :param page_size: Number of addresses per request. Possible values: from 1 to 200.
+        :param filters: ``get_static_address_list`` filters limiting the indexed set, e.g. ``network``.
+        """
+        self._oxapay = oxapay
+        self.page_size = page_size
+        self.filters = filters
+        self._records = {}
+        self._by_order = {}
+        self.synced_at = None
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(list(self._records.values()))
+
+    def get(self, address: str, default=None):
+        """
+        :return: The ``StaticAddress`` of ``address``, or ``default``.
+        """
+        return self._records.get(address, default)
+
+    def by_order_id(self, order_id: str, default=None):
+        """
+        :return: The ``StaticAddress`` created with ``order_id``, or ``default``.
+        """
+        return self._by_order.get(order_id, default)
+
+    def _add(self, record):
+        self._records[record.address] = record
+        if record.order_id:
+            self._by_order[record.order_id] = record
+
+    def _discard(self, address: str):
+        record = self._records.pop(address, None)
+        if record is not None and record.order_id and self._by_order.get(record.order_id) is record:
+            del self._by_order[record.order_id]
+        return record
+
+    def _new_on_page(self, listing) -> tuple:
+        """
+        :return: The page's unknown records, and whether the scan can stop because the page reached known ones.
+        """
+        new = [record for record in listing.addresses if record.address not in self._records]
+        return new, len(new) < len(listing.addresses) or listing.page is None or listing.page >= (listing.last_page or 0)
+
+    def _apply_incremental(self, added: list, total, diff: AddressDiff) -> bool:
+        """
+        Applies the additions found on the newest pages when they account for the whole list.
+
+        :return: False when addresses may have been revoked (or the list is not ordered newest first), so a full scan is needed.
+        """
+        if total is None or total != len(self._records) + len(added):
+            return False
+        for record in added:
+            self._add(record)
+        diff.added = added
+        return True
+
+    def _apply_full(self, records: list, diff: AddressDiff):
+        listed = {record.address: record for record in records}
+        diff.added = [record for address, record in listed.items() if address not in self._records]
+        diff.revoked = [record for address, record in self._records.items() if address not in listed]
+        diff.full_scan = True
+        self._records = {}
+        self._by_order = {}
+        for record in listed.values():
+            self._add(record)
+
+    def _finish(self, diff: AddressDiff, started: float) -> AddressDiff:
+        diff.total = len(self._records)
+        diff.elapsed = time.monotonic() - started
+        self.synced_at = time.time()
+        return diff
+
+
+class SyncAddressIndex(_BaseAddressIndex):
+    """
+    An in-memory index of the merchant's static addresses: O(1) membership and lookup by address
+    or order id, kept up to date by ``sync()``.
+
+    The list is returned newest first, so a sync reads pages only until it reaches addresses it
+    already knows. If the reported total then matches, nothing was revoked and the sync is done,
+    usually in one request. Otherwise the whole list is downloaded once to find what disappeared.
+    Safe to share between threads.
+    """
+    def __init__(self, oxapay, page_size: int = 200, **filters):
+        super().__init__(oxapay, page_size, **filters)
+        self._lock = threading.Lock()
+
+    def sync(self) -> AddressDiff:
+        """
+        Brings the index up to date.
+
+        :return: An ``AddressDiff`` of the addresses added and revoked since the previous sync.
+        """
+        started = time.monotonic()
+        diff = AddressDiff()
+        with self._lock:
+            if self._records:
+                added = []
+                page = 1
+                while True:
+                    listing = self._oxapay.get_static_address_list(page=page, size=self.page_size, **self.filters)
+                    diff.requests += 1
+                    new, done = self._new_on_page(listing)
+                    added += new
+                    if done:
+                        break
+                    page += 1
+                if self._apply_incremental(added, listing.total, diff):
+                    return self._finish(diff, started)
+            records = list(self._oxapay.iter_static_addresses(size=self.page_size, **self.filters))
+            diff.requests += max(1, -(-len(records) // self.page_size))
+            self._apply_full(records, diff)
+            return self._finish(diff, started)
+
+
+class AsyncAddressIndex(_BaseAddressIndex):
+    """
+    An in-memory index of the merchant's static addresses: O(1) membership and lookup by address
+    or order id, kept up to date by ``await sync()``.
+
+    The list is returned newest first, so a sync reads pages only until it reaches addresses it
+    already knows. If the reported total then matches, nothing was revoked and the sync is done,
+    usually in one request. Otherwise the whole list is downloaded once to find what disappeared.
+    """
+    async def sync(self) -> AddressDiff:
+        """
+        Brings the index up to date.
+
+        :return: An ``AddressDiff`` of the addresses added and revoked since the previous sync.
+        """
+        started = time.monotonic()
+        diff = AddressDiff()
+        if self._records:
+            added = []
+            page = 1
+            while True:
+                listing = await self._oxapay.get_static_address_list(page=page, size=self.page_size, **self.filters)
+                diff.requests += 1
+                new, done = self._new_on_page(listing)
+                added += new
+                if done:
+                    break
+                page += 1
+            if self._apply_incremental(added, listing.total, diff):
+                return self._finish(diff, started)
+        records = [record async for record in self._oxapay.iter_static_addresses(size=self.page_size, **self.filters)]
+        diff.requests += max(1, -(-len(records) // self.page_size))
+        self._apply_full(records, diff)
+        return self._finish(diff, started)
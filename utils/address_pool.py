@@ -0,0 +1,528 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from ..clients.exceptions import ValidationError
+from .address_index import SyncAddressIndex, AsyncAddressIndex
+from .response_models import BulkResult, StaticAddress
+
+
+@dataclass
+class Lease:
+    """
+    A static address handed out by an address pool.
+
+    :ivar address: The deposit address.
+    :ivar network: Its blockchain network.
+    :ivar track_id: The static address's track id.
+    :ivar order_id: Your order (or customer) id the address was leased for, if any.
+    :ivar leased_at: Unix time of the lease.
+    :ivar expires_at: Unix time after which the address is revoked, or None to keep it until released.
+    """
+    address: str
+    network: str
+    track_id: str = None
+    order_id: str = None
+    leased_at: float = 0.0
+    expires_at: float = None
+
+    def is_expired(self, now: float = None) -> bool:
+        return self.expires_at is not None and (now if now is not None else time.time()) >= self.expires_at
+
+
+class _BaseAddressPool:
+    def __init__(
+            self,
+            oxapay,
+            reserve: dict,
+            lease_ttl: float = 86400.0,
+            sweep_interval: float = 60.0,
+            concurrency: int = 4,
+            **address_options,
+    ):
+        """
+        :param oxapay: The ``SyncOxaPay`` or ``AsyncOxaPay`` instance used to create and revoke addresses.
+        :param reserve: Number of unleased addresses kept ready per network, e.g. ``{'TRC20': 20, 'Bitcoin': 5}``.
+        :param lease_ttl: Default seconds a lease lasts before its address is revoked. None keeps leases until released.
+        :param sweep_interval: Seconds between background sweeps revoking expired leases.
+        :param concurrency: Maximum number of simultaneous create or revoke requests.
+        :param address_options: ``create_static_address`` arguments used for every address, e.g. ``callback_url`` or ``to_currency``.
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1.')
+        self._oxapay = oxapay
+        self.targets = dict(reserve)
+        self.lease_ttl = lease_ttl
+        self.sweep_interval = sweep_interval
+        self.concurrency = concurrency
+        self.address_options = address_options
+        self._reserve = {network: deque() for network in self.targets}
+        self._leases = {}
+        self._leases_by_order = {}
+        # Address -> Unix time the pool created or leased it.
+        self._known = {}
+        self._creating = {network: 0 for network in self.targets}
+        self.misses = 0
+        self.last_error = None
+
+    def available(self, network: str) -> int:
+        """
+        :return: Number of addresses ready to lease on ``network``.
+        """
+        reserve = self._reserve.get(network)
+        return len(reserve) if reserve is not None else 0
+
+    def get(self, address: str) -> Lease:
+        """
+        :return: The active lease of ``address``, or None.
+        """
+        return self._leases.get(address)
+
+    def by_order_id(self, order_id: str) -> Lease:
+        """
+        :return: The active lease made for ``order_id``, or None.
+        """
+        lease = self._leases_by_order.get(order_id)
+        return lease if lease is not None and not lease.is_expired() else None
+
+    def owns(self, address: str) -> bool:
+        """
+        :return: Whether ``address`` was created by the pool or is in its ``index`` of the merchant's addresses.
+        """
+        return address in self._known or address in self.index
+
+    def leases(self) -> list:
+        return list(self._leases.values())
+
+    def _options(self, network: str, order_id: str = None) -> dict:
+        # Reserve addresses get a pool order id, telling them apart from the merchant's own. As POSTs they
+        # are sent once: the API does not deduplicate, so a retry after a lost response would leak an address.
+        return {**self.address_options, 'network': network, 'order_id': order_id or f'pool-{uuid.uuid4().hex}'}
+
+    def _shortfall(self) -> dict:
+        """
+        :return: Number of addresses to create per network, counting creations already under way.
+        """
+        return {
+            network: target - len(self._reserve[network]) - self._creating[network]
+            for network, target in self.targets.items()
+            if target - len(self._reserve[network]) - self._creating[network] > 0
+        }
+
+    def _reuse(self, network: str, order_id: str) -> Lease:
+        """
+        :return: The active lease already made for ``order_id`` on ``network``, or None. A lease on
+            another network is not handed out; the new lease replaces it in the order id index.
+        """
+        if order_id is None:
+            return None
+        lease = self.by_order_id(order_id)
+        return lease if lease is not None and lease.network == network else None
+
+    def _take(self, network: str, order_id: str, ttl) -> Lease:
+        """
+        :return: A lease on a reserve address, or None when the reserve of ``network`` is empty.
+        """
+        reserve = self._reserve.get(network)
+        if not reserve:
+            return None
+        return self._register(reserve.popleft(), order_id, ttl)
+
+    def _register(self, record: StaticAddress, order_id: str, ttl) -> Lease:
+        now = time.time()
+        ttl = self.lease_ttl if ttl is None else ttl
+        lease = Lease(
+            record.address, record.network, record.track_id, order_id, now,
+            now + ttl if ttl is not None else None,
+        )
+        self._known.setdefault(lease.address, now)
+        self._leases[lease.address] = lease
+        if order_id is not None:
+            self._leases_by_order[order_id] = lease
+        return lease
+
+    def _forget(self, address: str):
+        lease = self._leases.pop(address, None)
+        self._known.pop(address, None)
+        if lease is not None and lease.order_id is not None and self._leases_by_order.get(lease.order_id) is lease:
+            del self._leases_by_order[lease.order_id]
+
+    def _expire(self, address: str) -> bool:
+        lease = self._leases.get(address)
+        if lease is None:
+            return False
+        lease.expires_at = time.time()
+        # The lease stays in ``_leases`` until its address is revoked, but its order id is free again.
+        if lease.order_id is not None and self._leases_by_order.get(lease.order_id) is lease:
+            del self._leases_by_order[lease.order_id]
+        return True
+
+    def _expired(self) -> list:
+        now = time.time()
+        return [lease for lease in self._leases.values() if lease.is_expired(now)]
+
+    def _drop_revoked(self, diff, started: float):
+        """
+        Forgets leases and reserve addresses that were revoked elsewhere. After a full scan that is
+        every address the pool had before the sync started and the list no longer has.
+        """
+        if diff.full_scan:
+            revoked = {address for address, since in self._known.items() if since < started and address not in self.index}
+        else:
+            revoked = {record.address for record in diff.revoked if record.address in self._known}
+        if not revoked:
+            return
+        for address in revoked:
+            self._forget(address)
+        for network, reserve in self._reserve.items():
+            self._reserve[network] = deque(record for record in reserve if record.address not in revoked)
+
+
+class SyncAddressPool(_BaseAddressPool):
+    """
+    Keeps a warm reserve of static addresses per network, so leasing one to a customer takes no
+    request. A daemon thread refills the reserve as addresses are leased and revokes expired leases
+    in concurrent batches. Leases are indexed by address and order id for O(1) lookups. Safe to
+    share between threads.
+
+    Leases and the reserve live in memory: persist the leases you hand out, and call ``stop()``
+    then ``drain()`` when shutting down so unleased addresses are revoked.
+    """
+    def __init__(self, oxapay, reserve: dict, lease_ttl: float = 86400.0, sweep_interval: float = 60.0,
+                 concurrency: int = 4, **address_options):
+        super().__init__(oxapay, reserve, lease_ttl, sweep_interval, concurrency, **address_options)
+        self.index = SyncAddressIndex(oxapay)
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='oxapay-address-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def lease(self, network: str, order_id: str = None, ttl: float = None) -> Lease:
+        """
+        Hands out a reserve address of ``network``. Only when the reserve is empty is one created on the spot.
+
+        :param network: The blockchain network, one of the pool's ``reserve`` keys.
+        :param order_id: Your order (or customer) id; leasing it again on the same network returns the same lease while it is active.
+        :param ttl: Seconds until the lease expires and its address is revoked. Defaults to the pool's ``lease_ttl``.
+        :return: A ``Lease``.
+        """
+        with self._lock:
+            lease = self._reuse(network, order_id)
+            if lease is None:
+                lease = self._take(network, order_id, ttl)
+                if lease is None:
+                    self.misses += 1
+        self._wake.set()
+        if lease is not None:
+            return lease
+        record = self._oxapay.create_static_address(**self._options(network, order_id))
+        with self._lock:
+            return self._register(record, order_id, ttl)
+
+    def release(self, address: str) -> bool:
+        """
+        Ends a lease now; its address is revoked by the next sweep rather than reused.
+
+        :return: False if ``address`` was not leased.
+        """
+        with self._lock:
+            released = self._expire(address)
+        if released:
+            self._wake.set()
+        return released
+
+    def fill(self) -> int:
+        """
+        Creates the addresses missing from the reserve, ``concurrency`` at a time.
+
+        :return: Number of addresses added.
+        """
+        with self._lock:
+            shortfall = self._shortfall()
+            for network, count in shortfall.items():
+                self._creating[network] += count
+        jobs = [network for network, count in shortfall.items() for _ in range(count)]
+        added = 0
+        if not jobs:
+            return added
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(jobs))) as executor:
+            for network, record, error in executor.map(self._create, jobs):
+                with self._lock:
+                    self._creating[network] -= 1
+                    if error is None:
+                        self._known[record.address] = time.time()
+                        self._reserve[network].append(record)
+                        added += 1
+                    else:
+                        self.last_error = error
+        return added
+
+    def _create(self, network: str):
+        try:
+            return network, self._oxapay.create_static_address(**self._options(network)), None
+        except Exception as e:
+            return network, None, e
+
+    def revoke_expired(self) -> list:
+        """
+        Revokes the addresses of expired and released leases, ``concurrency`` at a time.
+        Addresses that fail to revoke stay leased and are retried by the next sweep.
+
+        :return: A ``BulkResult`` per address, with the lease as ``request``.
+        """
+        with self._lock:
+            expired = self._expired()
+        return self._revoke_all(expired)
+
+    def _revoke_all(self, items: list) -> list:
+        """
+        :param items: Leases or ``StaticAddress`` records.
+        """
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(items))) as executor:
+            results = list(executor.map(self._revoke, range(len(items)), items))
+        with self._lock:
+            for result in results:
+                # A 400 means the address is already gone.
+                if result.error is None or isinstance(result.error, ValidationError):
+                    self._forget(result.request.address)
+        return results
+
+    def _revoke(self, index: int, item) -> BulkResult:
+        try:
+            return BulkResult(index, item, self._oxapay.revoke_static_wallet(item.address))
+        except Exception as e:
+            return BulkResult(index, item, error=e)
+
+    def refresh(self):
+        """
+        Syncs ``index`` with the merchant's static address list and drops the leases and reserve
+        addresses that were revoked elsewhere.
+
+        :return: The index's ``AddressDiff``.
+        """
+        started = time.time()
+        diff = self.index.sync()
+        with self._lock:
+            self._drop_revoked(diff, started)
+        return diff
+
+    def drain(self) -> list:
+        """
+        Revokes every unleased reserve address. Stop the pool first, or the worker refills the reserve.
+
+        :return: A ``BulkResult`` per address, with the ``StaticAddress`` as ``request``.
+        """
+        with self._lock:
+            records = [record for reserve in self._reserve.values() for record in reserve]
+            for reserve in self._reserve.values():
+                reserve.clear()
+        return self._revoke_all(records)
+
+    def _run(self):
+        next_sweep = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.fill()
+                if time.monotonic() >= next_sweep:
+                    self.revoke_expired()
+                    next_sweep = time.monotonic() + self.sweep_interval
+            except Exception as e:
+                self.last_error = e
+            self._wake.wait(max(0.0, next_sweep - time.monotonic()))
+
+
+class AsyncAddressPool(_BaseAddressPool):
+    """
+    Keeps a warm reserve of static addresses per network, so leasing one to a customer takes no
+    request. A background task refills the reserve as addresses are leased and revokes expired
+    leases in concurrent batches. Leases are indexed by address and order id for O(1) lookups.
+
+    Leases and the reserve live in memory: persist the leases you hand out, and call
+    ``await stop()`` then ``await drain()`` when shutting down so unleased addresses are revoked.
+    """
+    def __init__(self, oxapay, reserve: dict, lease_ttl: float = 86400.0, sweep_interval: float = 60.0,
+                 concurrency: int = 4, **address_options):
+        super().__init__(oxapay, reserve, lease_ttl, sweep_interval, concurrency, **address_options)
+        self.index = AsyncAddressIndex(oxapay)
+        self._task = None
+        self._wake = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def lease(self, network: str, order_id: str = None, ttl: float = None) -> Lease:
+        """
+        Hands out a reserve address of ``network``. Only when the reserve is empty is one created on the spot.
+
+        :param network: The blockchain network, one of the pool's ``reserve`` keys.
+        :param order_id: Your order (or customer) id; leasing it again on the same network returns the same lease while it is active.
+        :param ttl: Seconds until the lease expires and its address is revoked. Defaults to the pool's ``lease_ttl``.
+        :return: A ``Lease``.
+        """
+        lease = self._reuse(network, order_id)
+        if lease is None:
+            lease = self._take(network, order_id, ttl)
+        self._notify()
+        if lease is not None:
+            return lease
+        self.misses += 1
+        record = await self._oxapay.create_static_address(**self._options(network, order_id))
+        return self._register(record, order_id, ttl)
+
+    def release(self, address: str) -> bool:
+        """
+        Ends a lease now; its address is revoked by the next sweep rather than reused.
+
+        :return: False if ``address`` was not leased.
+        """
+        released = self._expire(address)
+        if released:
+            self._notify()
+        return released
+
+    async def fill(self) -> int:
+        """
+        Creates the addresses missing from the reserve, ``concurrency`` at a time.
+
+        :return: Number of addresses added.
+        """
+        shortfall = self._shortfall()
+        for network, count in shortfall.items():
+            self._creating[network] += count
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def create(network):
+            try:
+                async with semaphore:
+                    record = await self._oxapay.create_static_address(**self._options(network))
+            except Exception as e:
+                self.last_error = e
+                return 0
+            finally:
+                self._creating[network] -= 1
+            self._known[record.address] = time.time()
+            self._reserve[network].append(record)
+            return 1
+
+        return sum(await asyncio.gather(*(
+            create(network) for network, count in shortfall.items() for _ in range(count)
+        )))
+
+    async def _revoke_all(self, items: list) -> list:
+        """
+        :param items: Leases or ``StaticAddress`` records.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def revoke(index, item):
+            async with semaphore:
+                try:
+                    return BulkResult(index, item, await self._oxapay.revoke_static_wallet(item.address))
+                except Exception as e:
+                    return BulkResult(index, item, error=e)
+
+        results = await asyncio.gather(*(revoke(index, item) for index, item in enumerate(items)))
+        for result in results:
+            # A 400 means the address is already gone.
+            if result.error is None or isinstance(result.error, ValidationError):
+                self._forget(result.request.address)
+        return results
+
+    async def revoke_expired(self) -> list:
+        """
+        Revokes the addresses of expired and released leases, ``concurrency`` at a time.
+        Addresses that fail to revoke stay leased and are retried by the next sweep.
+
+        :return: A ``BulkResult`` per address, with the lease as ``request``.
+        """
+        return await self._revoke_all(self._expired())
+
+    async def refresh(self):
+        """
+        Syncs ``index`` with the merchant's static address list and drops the leases and reserve
+        addresses that were revoked elsewhere.
+
+        :return: The index's ``AddressDiff``.
+        """
+        started = time.time()
+        diff = await self.index.sync()
+        self._drop_revoked(diff, started)
+        return diff
+
+    async def drain(self) -> list:
+        """
+        Revokes every unleased reserve address. Stop the pool first, or the worker refills the reserve.
+
+        :return: A ``BulkResult`` per address, with the ``StaticAddress`` as ``request``.
+        """
+        records = [record for reserve in self._reserve.values() for record in reserve]
+        for reserve in self._reserve.values():
+            reserve.clear()
+        return await self._revoke_all(records)
+
+    async def _run(self):
+        next_sweep = time.monotonic()
+        while True:
+            self._wake.clear()
+            try:
+                await self.fill()
+                if time.monotonic() >= next_sweep:
+                    await self.revoke_expired()
+                    next_sweep = time.monotonic() + self.sweep_interval
+            except Exception as e:
+                self.last_error = e
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(0.0, next_sweep - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
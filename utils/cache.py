@@ -0,0 +1,225 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    errors: int = 0
+
+    def __add__(self, other: 'CacheStats') -> 'CacheStats':
+        return CacheStats(
+            self.hits + other.hits,
+            self.stale_hits + other.stale_hits,
+            self.misses + other.misses,
+            self.refreshes + other.refreshes,
+            self.errors + other.errors,
+        )
+
+
+class _Entry:
+    __slots__ = ('value', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class _BaseTTLCache:
+    def __init__(self, ttls: dict, stale_ttl: float = 0, clock=time.monotonic):
+        """
+        :param ttls: Seconds a value stays fresh, per key. Keys without a positive TTL are not cached.
+        :param stale_ttl: Seconds an expired value may still be served while it is refreshed in the background.
+        :param clock: Monotonic time source.
+        """
+        self._ttls = dict(ttls)
+        self._stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries = {}
+        self._in_flight = {}
+        self._stats = {}
+
+    def _counters(self, key) -> CacheStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = CacheStats()
+        return stats
+
+    def _store(self, key, value):
+        now = self._clock()
+        fresh_until = now + self._ttls[key]
+        self._entries[key] = _Entry(value, fresh_until, fresh_until + self._stale_ttl)
+
+    def _lookup(self, key):
+        """
+        :return: ``(entry, is_fresh)``; ``entry`` is None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        now = self._clock()
+        if now < entry.fresh_until:
+            return entry, True
+        if now < entry.stale_until:
+            return entry, False
+        return None, False
+
+    def empty_copy(self):
+        """
+        :return: A new, empty cache of the same type with the same TTLs.
+        """
+        return type(self)(self._ttls, self._stale_ttl, self._clock)
+
+    def invalidate(self, key=None):
+        """
+        Drops one cached value, or all of them when ``key`` is None.
+        Requests already in flight are not affected.
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self, key=None) -> CacheStats:
+        """
+        :return: A snapshot of the counters for one key, or the totals when ``key`` is None.
+        """
+        if key is not None:
+            return CacheStats() + self._counters(key)
+        total = CacheStats()
+        for stats in list(self._stats.values()):
+            total = total + stats
+        return total
+
+
+class SyncTTLCache(_BaseTTLCache):
+    """
+    Thread-safe TTL cache with single-flight loading and stale-while-revalidate.
+
+    Concurrent misses for the same key wait on a single ``fetch`` call. Once a value
+    expires it is still served for ``stale_ttl`` seconds while a daemon thread refreshes it.
+    """
+    def __init__(self, ttls: dict, stale_ttl: float = 0, clock=time.monotonic):
+        super().__init__(ttls, stale_ttl, clock)
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """
+        :param key: Cache key, usually the endpoint path.
+        :param fetch: Callable returning a fresh value.
+        :return: The cached or freshly fetched value. It is shared between callers and must not be mutated.
+        """
+        if not self._ttls.get(key):
+            return fetch()
+
+        with self._lock:
+            stats = self._counters(key)
+            entry, fresh = self._lookup(key)
+            if entry is not None:
+                if fresh:
+                    stats.hits += 1
+                else:
+                    stats.stale_hits += 1
+                    if key not in self._in_flight:
+                        stats.refreshes += 1
+                        self._in_flight[key] = Future()
+                        threading.Thread(target=self._load, args=(key, fetch), daemon=True).start()
+                return entry.value
+
+            stats.misses += 1
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = Future()
+
+        if leader:
+            self._load(key, fetch)
+        return flight.result()
+
+    def _load(self, key, fetch):
+        flight = self._in_flight[key]
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._counters(key).errors += 1
+                del self._in_flight[key]
+            flight.set_exception(e)
+        else:
+            with self._lock:
+                self._store(key, value)
+                del self._in_flight[key]
+            flight.set_result(value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            super().invalidate(key)
+
+    def stats(self, key=None) -> CacheStats:
+        with self._lock:
+            return super().stats(key)
+
+
+class AsyncTTLCache(_BaseTTLCache):
+    """
+    Asyncio TTL cache with single-flight loading and stale-while-revalidate.
+
+    Concurrent misses for the same key await a single ``fetch`` task, which is shielded so a
+    cancelled caller does not cancel the load for the others. Once a value expires it is
+    still served for ``stale_ttl`` seconds while a background task refreshes it.
+    """
+    async def get(self, key, fetch):
+        """
+        :param key: Cache key, usually the endpoint path.
+        :param fetch: Callable returning an awaitable that resolves to a fresh value.
+        :return: The cached or freshly fetched value. It is shared between callers and must not be mutated.
+        """
+        if not self._ttls.get(key):
+            return await fetch()
+
+        stats = self._counters(key)
+        entry, fresh = self._lookup(key)
+        if entry is not None:
+            if fresh:
+                stats.hits += 1
+            else:
+                stats.stale_hits += 1
+                if key not in self._in_flight:
+                    stats.refreshes += 1
+                    self._start_load(key, fetch).add_done_callback(_consume_exception)
+            return entry.value
+
+        stats.misses += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._start_load(key, fetch)
+        return await asyncio.shield(task)
+
+    def _start_load(self, key, fetch) -> asyncio.Task:
+        task = self._in_flight[key] = asyncio.ensure_future(self._load(key, fetch))
+        return task
+
+    async def _load(self, key, fetch):
+        try:
+            value = await fetch()
+        except BaseException:
+            self._counters(key).errors += 1
+            raise
+        else:
+            self._store(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+
+def _consume_exception(task: asyncio.Task):
+    # Background refresh failures are counted in the stats; the stale value keeps being served.
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,182 @@
+import hashlib
+import hmac
+import json
+import threading
+from collections import OrderedDict
+
+from .response_models import PaymentCallback
+
+
+class InvalidSignatureError(ValueError):
+    pass
+
+
+class CallbackVerifier:
+    """
+    Verifies the ``HMAC`` header OxaPay sends with every callback: the hex HMAC-SHA512 of the
+    raw request body, keyed with the merchant API key (or the payout API key for payouts).
+    """
+    def __init__(self, secret: str):
+        self._key = secret.encode()
+
+    def is_valid(self, raw_body: bytes, signature) -> bool:
+        if not signature:
+            return False
+        if isinstance(signature, str):
+            signature = signature.encode()
+        expected = hmac.new(self._key, raw_body, hashlib.sha512).hexdigest().encode()
+        return hmac.compare_digest(expected, signature.strip().lower())
+
+    def parse(self, raw_body: bytes, signature) -> PaymentCallback:
+        """
+        Verifies the signature and parses the body.
+
+        :raises InvalidSignatureError: If the signature does not match the body.
+        """
+        if not self.is_valid(raw_body, signature):
+            raise InvalidSignatureError('Callback signature does not match the request body.')
+        return parse_callback(raw_body)
+
+
+def parse_callback(raw_body: bytes) -> PaymentCallback:
+    """
+    Parses a callback body into a ``PaymentCallback``; fields it does not know are kept in ``raw``.
+    Does not verify the signature.
+
+    :raises ValueError: If the body is not a JSON object.
+    """
+    data = json.loads(raw_body)
+    if not isinstance(data, dict):
+        raise ValueError('Callback body is not a JSON object.')
+    return PaymentCallback.from_dict(data)
+
+
+class DedupStore:
+    """
+    Remembers the most recent ``max_size`` callback keys so redeliveries are acknowledged but not reprocessed.
+    Thread-safe.
+    """
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key) -> bool:
+        """
+        :return: True if the key is new, False if it was already seen.
+        """
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return False
+            self._keys[key] = None
+            if len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+            return True
+
+    def discard(self, key):
+        with self._lock:
+            self._keys.pop(key, None)
+
+
+class CallbackHandler:
+    """
+    Receives OxaPay callbacks: verifies, parses, deduplicates by ``track_id`` + ``status`` and
+    hands each new event to ``queue`` (or ``on_event``), then acknowledges immediately so the
+    real work happens off the request path.
+
+    Mount ``handler.wsgi`` in a WSGI server or ``handler.asgi`` in an ASGI server. An
+    ``asyncio.Queue`` must only be used with the ASGI app, on the server's event loop.
+    """
+    def __init__(self, secret: str, queue=None, on_event=None, dedup: DedupStore = None,
+                 max_body_size: int = 64 * 1024):
+        """
+        :param secret: The merchant API key (or payout API key) the callbacks are signed with.
+        :param queue: A ``queue.Queue`` or ``asyncio.Queue`` receiving ``PaymentCallback`` objects.
+        :param on_event: Alternatively, a callable invoked with each new ``PaymentCallback``. It should return quickly.
+        :param dedup: Store of already processed callbacks. Defaults to a ``DedupStore()``.
+        :param max_body_size: Larger bodies are rejected with a 413 before being read in full or hashed.
+        """
+        if (queue is None) == (on_event is None):
+            raise ValueError('Pass exactly one of queue or on_event.')
+        self._verifier = CallbackVerifier(secret)
+        self._queue = queue
+        self._on_event = on_event
+        self.dedup = dedup if dedup is not None else DedupStore()
+        self.max_body_size = max_body_size
+
+    def handle(self, raw_body: bytes, signature) -> tuple:
+        """
+        Processes one callback independently of any web framework.
+
+        :return: An ``(http_status, response_body)`` tuple to send back to OxaPay.
+        """
+        if len(raw_body) > self.max_body_size:
+            return 413, b'payload too large'
+        try:
+            event = self._verifier.parse(raw_body, signature)
+        except InvalidSignatureError:
+            return 401, b'invalid signature'
+        except (ValueError, TypeError):
+            return 400, b'invalid payload'
+
+        key = (event.track_id, event.status)
+        if not self.dedup.add(key):
+            return 200, b'ok'
+        try:
+            if self._queue is not None:
+                self._queue.put_nowait(event)
+            else:
+                self._on_event(event)
+        except Exception:
+            # Not accepted, so let OxaPay redeliver it later.
+            self.dedup.discard(key)
+            return 503, b'busy'
+        return 200, b'ok'
+
+    def wsgi(self, environ, start_response):
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > self.max_body_size:
+            status, body = 413, b'payload too large'
+        else:
+            raw_body = environ['wsgi.input'].read(length) if length else b''
+            status, body = self.handle(raw_body, environ.get('HTTP_HMAC'))
+        start_response(_STATUS_LINES[status], [('Content-Type', 'text/plain'), ('Content-Length', str(len(body)))])
+        return [body]
+
+    async def asgi(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body and size <= self.max_body_size:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            size += len(chunks[-1])
+            more_body = message.get('more_body', False)
+        signature = None
+        for name, value in scope.get('headers', ()):
+            if name.lower() == b'hmac':
+                signature = value
+                break
+        # An oversize body is rejected by ``handle`` without reading the rest of it.
+        status, body = self.handle(b''.join(chunks), signature)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+_STATUS_LINES = {
+    200: '200 OK',
+    400: '400 Bad Request',
+    401: '401 Unauthorized',
+    413: '413 Payload Too Large',
+    503: '503 Service Unavailable',
+}
@@ -0,0 +1,335 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from .payment_watcher import _FINAL_STATUSES
+from .response_models import PaymentHistory, PaymentStatus
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payments (
+    track_id TEXT PRIMARY KEY,
+    order_id TEXT,
+    type TEXT COLLATE NOCASE,
+    status TEXT COLLATE NOCASE,
+    currency TEXT COLLATE NOCASE,
+    pay_currency TEXT COLLATE NOCASE,
+    network TEXT COLLATE NOCASE,
+    address TEXT,
+    amount REAL,
+    date INTEGER,
+    pay_date INTEGER,
+    final INTEGER NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payments_order_id ON payments (order_id);
+CREATE INDEX IF NOT EXISTS payments_status ON payments (status, date);
+CREATE INDEX IF NOT EXISTS payments_currency ON payments (currency, date);
+CREATE INDEX IF NOT EXISTS payments_address ON payments (address, date);
+CREATE INDEX IF NOT EXISTS payments_date ON payments (date);
+CREATE INDEX IF NOT EXISTS payments_open ON payments (final, date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# get_payment_history filter name -> (column, operator)
+_FILTERS = {
+    'track_id': ('track_id', '='),
+    'order_id': ('order_id', '='),
+    'type_': ('type', '='),
+    'status': ('status', '='),
+    'pay_currency': ('pay_currency', '='),
+    'currency': ('currency', '='),
+    'network': ('network', '='),
+    'address': ('address', '='),
+    'from_date': ('date', '>='),
+    'to_date': ('date', '<='),
+    'from_amount': ('amount', '>='),
+    'to_amount': ('amount', '<='),
+}
+
+_SORT_COLUMNS = {
+    'create_date': 'date',
+    'pay_date': 'pay_date',
+    'amount': 'amount',
+}
+
+
+def _is_final(status) -> bool:
+    return str(status).lower() in _FINAL_STATUSES
+
+
+def _row(record: dict) -> tuple:
+    txs = record.get('txs') or []
+    if isinstance(txs, dict):
+        txs = list(txs.values())
+    first_tx = txs[0] if txs else {}
+    pay_date = max((tx.get('date') or 0 for tx in txs), default=None) or None
+    amount = record.get('amount')
+    try:
+        amount = float(amount) if amount is not None else None
+    except (TypeError, ValueError):
+        amount = None
+    return (
+        str(record.get('track_id')),
+        record.get('order_id'),
+        record.get('type'),
+        record.get('status'),
+        record.get('currency'),
+        record.get('pay_currency', first_tx.get('currency')),
+        record.get('network', first_tx.get('network')),
+        record.get('address', first_tx.get('address')),
+        amount,
+        record.get('date'),
+        pay_date,
+        int(_is_final(record.get('status'))),
+        json.dumps(record, separators=(',', ':')),
+    )
+
+
+@dataclass
+class SyncReport:
+    """
+    :ivar fetched: Records received from the API during the sync.
+    :ivar rechecked: Open payments looked up one by one because they were older than the rescan window.
+    :ivar watermark: Creation date of the newest mirrored payment after the sync.
+    :ivar elapsed: Seconds the sync took.
+    """
+    fetched: int = 0
+    rechecked: int = 0
+    watermark: int = None
+    elapsed: float = 0.0
+
+
+class HistoryStore:
+    """
+    A local SQLite copy of the payment history.
+
+    Records are kept as received and indexed by track id, order id, status, currency, address
+    and date, so ``query`` answers ``get_payment_history``-style filters without a round-trip.
+    The store is filled by ``SyncHistoryMirror``/``AsyncHistoryMirror``. Safe to share between threads.
+    """
+    def __init__(self, path: str = ':memory:'):
+        """
+        :param path: SQLite database file. The default keeps the mirror in memory for the life of the process.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM payments').fetchone()[0]
+
+    def upsert(self, records) -> int:
+        """
+        Inserts or replaces payment records (raw dicts as returned by the API) in one transaction.
+
+        :return: Number of records written.
+        """
+        rows = [_row(record) for record in records]
+        if not rows:
+            return 0
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany(f'INSERT OR REPLACE INTO payments VALUES ({", ".join("?" * 13)})', rows)
+                self._db.execute("INSERT OR REPLACE INTO sync_state VALUES ('watermark', (SELECT MAX(date) FROM payments))")
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+        return len(rows)
+
+    @property
+    def watermark(self) -> int:
+        """
+        Creation date of the newest mirrored payment, or None while the store is empty.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT value FROM sync_state WHERE key = 'watermark'").fetchone()
+        return row[0] if row is not None else None
+
+    def open_payments(self) -> list:
+        """
+        :return: ``(track_id, date)`` pairs of the mirrored payments not yet in a final status, oldest first.
+        """
+        with self._lock:
+            return self._db.execute('SELECT track_id, date FROM payments WHERE final = 0 ORDER BY date').fetchall()
+
+    def get(self, track_id, raw_response: bool = False):
+        """
+        :return: The mirrored payment as a ``PaymentStatus`` (or raw dict), or None if it is unknown.
+        """
+        with self._lock:
+            row = self._db.execute('SELECT record FROM payments WHERE track_id = ?', (str(track_id),)).fetchone()
+        if row is None:
+            return None
+        record = json.loads(row[0])
+        return record if raw_response else PaymentStatus.from_dict(record)
+
+    def query(
+            self,
+            sort_by: str = 'create_date',
+            sort_type: str = 'desc',
+            page: int = 1,
+            size: int = 10,
+            raw_response: bool = False,
+            **filters,
+    ):
+        """
+        Answers a ``get_payment_history`` query from the mirror.
+
+        :param sort_by: 'create_date', 'pay_date' or 'amount'. Default: 'create_date'.
+        :param sort_type: 'asc' or 'desc'. Default: 'desc'.
+        :param page: The page number of the results to retrieve, from 1.
+        :param size: Number of records per page.
+        :param raw_response: Return the API's response shape (``{'data': {'list': ..., 'meta': ...}}``) instead of a ``PaymentHistory``.
+        :param filters: ``track_id``, ``order_id``, ``type_``, ``status``, ``pay_currency``, ``currency``, ``network``,
+            ``address``, ``from_date``, ``to_date``, ``from_amount``, ``to_amount``; None values are ignored.
+        :return: One page of matching payments.
+        """
+        if sort_by not in _SORT_COLUMNS:
+            raise ValueError(f'Unsupported sort_by "{sort_by}".')
+        if sort_type not in ('asc', 'desc'):
+            raise ValueError(f'Unsupported sort_type "{sort_type}".')
+        clauses, params = [], []
+        for name, value in filters.items():
+            if name not in _FILTERS:
+                raise TypeError(f'Unknown filter "{name}".')
+            if value is not None:
+                column, operator = _FILTERS[name]
+                clauses.append(f'{column} {operator} ?')
+                params.append(str(value) if name == 'track_id' else value)
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        order = f'{_SORT_COLUMNS[sort_by]} {sort_type.upper()}, track_id {sort_type.upper()}'
+
+        with self._lock:
+            total = self._db.execute(f'SELECT COUNT(*) FROM payments {where}', params).fetchone()[0]
+            rows = self._db.execute(
+                f'SELECT record FROM payments {where} ORDER BY {order} LIMIT ? OFFSET ?',
+                params + [size, (page - 1) * size],
+            ).fetchall()
+        data = {
+            'list': [json.loads(row[0]) for row in rows],
+            'meta': {'page': page, 'last_page': max(1, -(-total // size)), 'total': total},
+        }
+        return {'data': data} if raw_response else PaymentHistory.from_dict(data)
+
+
+class _BaseHistoryMirror:
+    def __init__(self, oxapay, store: HistoryStore, rescan_window: float = 86400.0, concurrency: int = 10):
+        """
+        :param oxapay: The ``SyncOxaPay`` or ``AsyncOxaPay`` instance used to read the history.
+        :param store: The ``HistoryStore`` the history is mirrored into.
+        :param rescan_window: Seconds back from now within which open payments are re-checked by rescanning the
+            history. Older open payments are looked up one by one instead of widening the scan.
+        :param concurrency: Maximum number of simultaneous individual lookups (``AsyncHistoryMirror`` only).
+        """
+        self._oxapay = oxapay
+        self.store = store
+        self.rescan_window = rescan_window
+        self.concurrency = concurrency
+
+    def query(self, **kwargs):
+        """
+        Same as ``HistoryStore.query``.
+        """
+        return self.store.query(**kwargs)
+
+    def _plan(self):
+        """
+        :return: The ``from_date`` of the incremental scan (None for a full one) and the track ids to re-check individually.
+        """
+        watermark = self.store.watermark
+        if watermark is None:
+            return None, []
+        # Payments created in the watermark's second may have been cut off by the last page; rescan it.
+        from_date = watermark
+        horizon = time.time() - self.rescan_window
+        recheck = []
+        for track_id, date in self.store.open_payments():
+            if date is None or date < horizon:
+                recheck.append(track_id)
+            else:
+                from_date = min(from_date, date)
+        return from_date, recheck
+
+    @staticmethod
+    def _scan_filters(from_date) -> dict:
+        filters = {'sort_by': 'create_date', 'sort_type': 'asc'}
+        if from_date is not None:
+            filters['from_date'] = from_date
+        return filters
+
+
+class SyncHistoryMirror(_BaseHistoryMirror):
+    """
+    Keeps a ``HistoryStore`` in step with the API through ``SyncOxaPay``.
+
+    Each ``sync()`` pages through the payments created since the newest mirrored one, oldest first,
+    and re-checks payments that were not yet in a final status: recent ones through the same scan,
+    older ones with ``get_payment_information``.
+    """
+    def sync(self, page_size: int = 200) -> SyncReport:
+        started = time.monotonic()
+        from_date, recheck = self._plan()
+        report = SyncReport()
+        batch = []
+        for record in self._oxapay.iter_payment_history(size=page_size, raw_response=True, **self._scan_filters(from_date)):
+            batch.append(record)
+            if len(batch) >= page_size:
+                report.fetched += self.store.upsert(batch)
+                batch = []
+        report.fetched += self.store.upsert(batch)
+        for track_id in recheck:
+            response = self._oxapay.get_payment_information(track_id, raw_response=True)
+            report.rechecked += self.store.upsert([response['data']])
+        report.watermark = self.store.watermark
+        report.elapsed = time.monotonic() - started
+        return report
+
+
+class AsyncHistoryMirror(_BaseHistoryMirror):
+    """
+    Keeps a ``HistoryStore`` in step with the API through ``AsyncOxaPay``.
+
+    Each ``await sync()`` pages through the payments created since the newest mirrored one, oldest
+    first, and re-checks payments that were not yet in a final status: recent ones through the same
+    scan, older ones with concurrent ``get_payment_information`` calls.
+    """
+    async def sync(self, page_size: int = 200) -> SyncReport:
+        started = time.monotonic()
+        from_date, recheck = self._plan()
+        report = SyncReport()
+        batch = []
+        async for record in self._oxapay.iter_payment_history(size=page_size, raw_response=True, **self._scan_filters(from_date)):
+            batch.append(record)
+            if len(batch) >= page_size:
+                report.fetched += self.store.upsert(batch)
+                batch = []
+        report.fetched += self.store.upsert(batch)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def lookup(track_id):
+            async with semaphore:
+                response = await self._oxapay.get_payment_information(track_id, raw_response=True)
+            return response['data']
+
+        if recheck:
+            report.rechecked = self.store.upsert(await asyncio.gather(*(lookup(track_id) for track_id in recheck)))
+        report.watermark = self.store.watermark
+        report.elapsed = time.monotonic() - started
+        return report
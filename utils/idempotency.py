@@ -0,0 +1,507 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from ..clients.constants.api_constants import _PAYMENT_URL
+from ..clients.exceptions import OxaPayError, TransportError, ServerError, RateLimitedError, InvalidResponseError
+from ..clients.timeouts import DeadlineExceededError
+
+PENDING = 'pending'
+CREATED = 'created'
+
+# Seconds subtracted from the first attempt's time when searching the history, for clock skew.
+_CLOCK_SKEW = 300
+
+# Seconds between looks at an order id another owner is creating.
+_POLL_INTERVAL = 0.5
+
+# Endpoint path -> payment type as reported by the payment history.
+_PAYMENT_TYPES = {
+    'payment/invoice': 'invoice',
+    'payment/white-label': 'white_label',
+}
+
+
+@dataclass
+class IdempotencyRecord:
+    """
+    :ivar state: ``PENDING`` while the outcome of the creating call is unknown, then ``CREATED``.
+    :ivar request: Canonical JSON of the request payload, to detect an order id reused with other parameters.
+    :ivar response: The raw API response once created.
+    :ivar created: Unix time of the first attempt.
+    :ivar owner: Id of the idempotency layer (client) creating the payment while it is pending.
+    :ivar lease_until: Unix time until which the owner is presumed to be working on it. Past it,
+        or once set to 0 by an owner that gave up, the next call claims the record and reconciles.
+    """
+    state: str
+    request: str
+    response: dict = None
+    created: float = 0.0
+    owner: str = None
+    lease_until: float = 0.0
+
+
+def _fingerprint(json_data: dict) -> str:
+    return json.dumps(json_data, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def _claimable(current: IdempotencyRecord, claim: IdempotencyRecord) -> bool:
+    """
+    :return: Whether ``claim`` may take ``current`` over: a pending record of the same request whose
+        owner is the claimer itself or let its lease lapse.
+    """
+    return (
+        current.state == PENDING and current.request == claim.request
+        and (current.owner == claim.owner or current.lease_until <= claim.created)
+    )
+
+
+class MemoryIdempotencyStore:
+    """
+    Keeps the most recently used ``maxsize`` records in memory. Safe to share between threads.
+    """
+    # Never waits on I/O, so the async clients call it on the event loop.
+    blocking = False
+
+    def __init__(self, maxsize: int = 10000, lease: float = 60.0):
+        """
+        :param maxsize: Number of order ids remembered; the least recently used are forgotten first.
+        :param lease: Seconds a client may work on a pending order id before another may take it over.
+            Renewed before every attempt, so it must exceed one request's timeout plus its backoff.
+        """
+        self.maxsize = maxsize
+        self.lease = lease
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, key: str) -> IdempotencyRecord:
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                self._records.move_to_end(key)
+            return record
+
+    def put(self, key: str, record: IdempotencyRecord):
+        with self._lock:
+            self._put(key, record)
+
+    def claim(self, key: str, record: IdempotencyRecord) -> IdempotencyRecord:
+        """
+        Atomically stores ``record`` if ``key`` has none, or takes over a pending record whose owner is gone.
+
+        :return: The record found, or None if ``record`` was stored.
+        """
+        with self._lock:
+            current = self._records.get(key)
+            if current is None:
+                self._put(key, record)
+            elif _claimable(current, record):
+                self._put(key, IdempotencyRecord(
+                    PENDING, current.request, created=current.created, owner=record.owner, lease_until=record.lease_until,
+                ))
+            else:
+                self._records.move_to_end(key)
+            return current
+
+    def _put(self, key: str, record: IdempotencyRecord):
+        self._records[key] = record
+        self._records.move_to_end(key)
+        while len(self._records) > self.maxsize:
+            self._records.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class SQLiteIdempotencyStore:
+    """
+    Keeps the records in an SQLite database, so they survive restarts and can be shared by processes
+    on the same host. Claims are atomic across processes. Safe to share between threads.
+    The async clients call it from worker threads, as a claim may wait for another process's lock.
+    """
+    blocking = True
+
+    def __init__(self, path: str, lease: float = 60.0):
+        """
+        :param path: SQLite database file.
+        :param lease: Seconds a client may work on a pending order id before another may take it over.
+            Renewed before every attempt, so it must exceed one request's timeout plus its backoff.
+        """
+        self.path = path
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS idempotency '
+            '(key TEXT PRIMARY KEY, state TEXT NOT NULL, request TEXT NOT NULL, response TEXT, created REAL NOT NULL, '
+            'owner TEXT, lease_until REAL NOT NULL DEFAULT 0)'
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM idempotency').fetchone()[0]
+
+    def get(self, key: str) -> IdempotencyRecord:
+        with self._lock:
+            return self._get(key)
+
+    def put(self, key: str, record: IdempotencyRecord):
+        response = json.dumps(record.response, separators=(',', ':'), default=str) if record.response is not None else None
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO idempotency (key, state, request, response, created, owner, lease_until) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, record.state, record.request, response, record.created, record.owner, record.lease_until),
+            )
+
+    def claim(self, key: str, record: IdempotencyRecord) -> IdempotencyRecord:
+        """
+        Atomically stores ``record`` if ``key`` has none, or takes over a pending record whose owner is gone.
+        The write lock is taken before reading, so two processes cannot both claim an order id.
+
+        :return: The record found, or None if ``record`` was stored.
+        """
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                current = self._get(key)
+                if current is None:
+                    self._db.execute(
+                        'INSERT INTO idempotency (key, state, request, created, owner, lease_until) VALUES (?, ?, ?, ?, ?, ?)',
+                        (key, record.state, record.request, record.created, record.owner, record.lease_until),
+                    )
+                elif _claimable(current, record):
+                    self._db.execute(
+                        'UPDATE idempotency SET owner = ?, lease_until = ? WHERE key = ?',
+                        (record.owner, record.lease_until, key),
+                    )
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+        return current
+
+    def _get(self, key: str) -> IdempotencyRecord:
+        row = self._db.execute(
+            'SELECT state, request, response, created, owner, lease_until FROM idempotency WHERE key = ?', (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        state, request, response, created, owner, lease_until = row
+        return IdempotencyRecord(state, request, json.loads(response) if response is not None else None, created, owner, lease_until)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute('DELETE FROM idempotency WHERE key = ?', (key,))
+
+    def prune(self, before: float) -> int:
+        """
+        Forgets the records whose first attempt is older than ``before`` (Unix time).
+
+        :return: Number of records removed.
+        """
+        with self._lock:
+            return self._db.execute('DELETE FROM idempotency WHERE created < ?', (before,)).rowcount
+
+
+class _BaseIdempotency:
+    """
+    Makes the creating endpoints idempotent per ``order_id``.
+
+    The first call for an order id is recorded as pending and sent without the client's blind
+    retries. When its outcome is unknown (connection error, timeout, 5xx) the payment history is
+    searched for the order id before the request is sent again, so a payment that did land is
+    never created twice. Created results are kept in the store and returned without a round-trip,
+    and concurrent calls for the same order id share one request.
+
+    Order ids are claimed atomically in the store with a lease. A call finding another client's
+    live claim, e.g. another process sharing an ``SQLiteIdempotencyStore``, waits for its result
+    instead of sending the request too; a lapsed claim is taken over and reconciled.
+    """
+    def __init__(self, store):
+        """
+        :param store: A ``MemoryIdempotencyStore``, ``SQLiteIdempotencyStore`` or an object with the same
+            ``lease`` and ``get``/``put``/``claim``/``delete``. ``AsyncIdempotency`` runs its calls in a worker
+            thread unless it sets ``blocking = False``.
+        """
+        self.store = store
+        self.owner = uuid.uuid4().hex
+        self._in_flight = {}
+
+    @staticmethod
+    def _key(oxapay, endpoint, order_id) -> str:
+        # Order ids are unique per merchant; the key itself is not stored.
+        merchant = hashlib.sha256(oxapay.merchant_api_key.encode()).hexdigest()[:16]
+        return f'{merchant}:{endpoint.path}:{order_id}'
+
+    def _begin(self, key: str, order_id, fingerprint: str):
+        """
+        Claims the order id in the store.
+
+        :return: The order id's record, and whether an earlier call left it pending, so its request may have landed.
+            A pending record with another ``owner`` is another client's live claim, not ours.
+        """
+        now = time.time()
+        claim = IdempotencyRecord(PENDING, fingerprint, created=now, owner=self.owner, lease_until=now + self.store.lease)
+        current = self.store.claim(key, claim)
+        if current is None:
+            return claim, False
+        if current.request != fingerprint:
+            raise ValueError(f'order_id {order_id!r} was already used with other parameters.')
+        if not _claimable(current, claim):
+            return current, False
+        claim.created = current.created
+        return claim, True
+
+    def _waiting(self, record: IdempotencyRecord) -> bool:
+        return record.state == PENDING and record.owner != self.owner
+
+    def _wait_delay(self, client, endpoint, order_id, record: IdempotencyRecord) -> float:
+        """
+        :return: Seconds to wait before looking at another client's claim again.
+        :raises DeadlineExceededError: If the client's deadline passes first.
+        """
+        delay = min(_POLL_INTERVAL, max(0.0, record.lease_until - time.time()))
+        if client.deadline is not None and delay >= client.deadline.remaining():
+            raise DeadlineExceededError(
+                f'order_id {order_id!r} is still being created by another client.',
+                endpoint=endpoint.path, method=endpoint.method,
+            )
+        return delay
+
+    def _renew(self, key: str, record: IdempotencyRecord):
+        record.lease_until = time.time() + self.store.lease
+        self.store.put(key, record)
+
+    def _finish(self, key: str, record: IdempotencyRecord, response: dict) -> dict:
+        record.state = CREATED
+        record.response = response
+        record.lease_until = 0.0
+        self.store.put(key, record)
+        return response
+
+    def _abandon(self, key: str, record: IdempotencyRecord, forget: bool):
+        """
+        Deletes the record when the request surely did not land, else ends the lease so the next
+        call, from any client, claims it and reconciles at once.
+        """
+        if forget:
+            self.store.delete(key)
+        else:
+            record.lease_until = 0.0
+            self.store.put(key, record)
+
+    @staticmethod
+    def _search_filters(record: IdempotencyRecord) -> dict:
+        return {'from_date': int(record.created) - _CLOCK_SKEW, 'sort_type': 'desc', 'size': 200}
+
+    @staticmethod
+    def _match(endpoint, order_id, payment: dict) -> dict:
+        """
+        :return: The create response rebuilt from a history record, or None if the record is another payment.
+        """
+        if str(payment.get('order_id')) != str(order_id):
+            return None
+        payment_type = str(payment.get('type', '')).lower().replace('-', '_').replace(' ', '_')
+        if payment_type != _PAYMENT_TYPES.get(endpoint.path, payment_type):
+            return None
+        data = dict(payment)
+        if endpoint.path == 'payment/invoice':
+            data.setdefault('payment_url', _PAYMENT_URL.format(track_id=payment['track_id']))
+        return {'data': data, 'reconciled': True}
+
+    @staticmethod
+    def _retry_delay(policy, attempt: int, error: OxaPayError) -> float:
+        retry_after = getattr(error, 'retry_after', None)
+        return policy.delay(attempt, str(retry_after) if retry_after is not None else None)
+
+    @staticmethod
+    def _outcome_unknown(error: OxaPayError) -> bool:
+        return isinstance(error, (TransportError, ServerError, InvalidResponseError))
+
+
+class SyncIdempotency(_BaseIdempotency):
+    """
+    The idempotency layer of ``SyncOxaPay``; concurrent threads creating the same order id wait for one request.
+    """
+    def __init__(self, store):
+        super().__init__(store)
+        self._lock = threading.Lock()
+
+    def create(self, oxapay, endpoint, order_id, path: str, json_data: dict) -> dict:
+        """
+        Sends a creating call through the store; see ``_BaseIdempotency``.
+
+        :return: The raw API response, or one rebuilt from the payment history.
+        """
+        key = self._key(oxapay, endpoint, order_id)
+        fingerprint = _fingerprint(json_data)
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = (fingerprint, Future())
+        if not leader:
+            if flight[0] != fingerprint:
+                raise ValueError(f'order_id {order_id!r} is being created with other parameters.')
+            return flight[1].result()
+
+        try:
+            response = self._create(oxapay, endpoint, order_id, key, fingerprint, path, json_data)
+        except BaseException as e:
+            flight[1].set_exception(e)
+            raise
+        else:
+            flight[1].set_result(response)
+            return response
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _create(self, oxapay, endpoint, order_id, key, fingerprint, path, json_data) -> dict:
+        client = oxapay._client
+        record, uncertain = self._begin(key, order_id, fingerprint)
+        while self._waiting(record):
+            time.sleep(self._wait_delay(client, endpoint, order_id, record))
+            record, uncertain = self._begin(key, order_id, fingerprint)
+        if record.state == CREATED:
+            return record.response
+        policy = client.retry_policy
+        attempt = 0
+        forget = False
+        try:
+            while True:
+                if uncertain:
+                    found = self._reconcile(oxapay, endpoint, order_id, record)
+                    if found is not None:
+                        return self._finish(key, record, found)
+                attempt += 1
+                self._renew(key, record)
+                try:
+                    response = client.request(endpoint.method, path, json_data=json_data, idempotent=False)
+                except OxaPayError as e:
+                    unknown = self._outcome_unknown(e)
+                    retryable = unknown or isinstance(e, RateLimitedError)
+                    if not retryable or attempt >= policy.max_attempts or not self._sleep(client, policy, attempt, e):
+                        forget = not uncertain and not unknown
+                        raise
+                    uncertain = uncertain or unknown
+                    continue
+                return self._finish(key, record, response)
+        except BaseException:
+            self._abandon(key, record, forget)
+            raise
+
+    @staticmethod
+    def _sleep(client, policy, attempt: int, error: OxaPayError) -> bool:
+        delay = _BaseIdempotency._retry_delay(policy, attempt, error)
+        if client.deadline is not None and delay >= client.deadline.remaining():
+            return False
+        time.sleep(delay)
+        return True
+
+    def _reconcile(self, oxapay, endpoint, order_id, record: IdempotencyRecord) -> dict:
+        for payment in oxapay.iter_payment_history(prefetch=0, raw_response=True, **self._search_filters(record)):
+            found = self._match(endpoint, order_id, payment)
+            if found is not None:
+                return found
+        return None
+
+
+class AsyncIdempotency(_BaseIdempotency):
+    """
+    The idempotency layer of ``AsyncOxaPay``; concurrent tasks creating the same order id await one request.
+    Calls to a blocking store run in a worker thread, off the event loop.
+    """
+    async def _offload(self, method, *args):
+        if getattr(self.store, 'blocking', True):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def create(self, oxapay, endpoint, order_id, path: str, json_data: dict) -> dict:
+        """
+        Sends a creating call through the store; see ``_BaseIdempotency``. The shared request is
+        shielded, so a cancelled caller does not cancel it for the others.
+
+        :return: The raw API response, or one rebuilt from the payment history.
+        """
+        key = self._key(oxapay, endpoint, order_id)
+        fingerprint = _fingerprint(json_data)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(self._create(oxapay, endpoint, order_id, key, fingerprint, path, json_data))
+            flight = self._in_flight[key] = (fingerprint, task)
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        elif flight[0] != fingerprint:
+            raise ValueError(f'order_id {order_id!r} is being created with other parameters.')
+        return await asyncio.shield(flight[1])
+
+    async def _create(self, oxapay, endpoint, order_id, key, fingerprint, path, json_data) -> dict:
+        client = oxapay._client
+        record, uncertain = await self._offload(self._begin, key, order_id, fingerprint)
+        while self._waiting(record):
+            await asyncio.sleep(self._wait_delay(client, endpoint, order_id, record))
+            record, uncertain = await self._offload(self._begin, key, order_id, fingerprint)
+        if record.state == CREATED:
+            return record.response
+        policy = client.retry_policy
+        attempt = 0
+        forget = False
+        try:
+            while True:
+                if uncertain:
+                    found = await self._reconcile(oxapay, endpoint, order_id, record)
+                    if found is not None:
+                        return await self._offload(self._finish, key, record, found)
+                attempt += 1
+                await self._offload(self._renew, key, record)
+                try:
+                    response = await client.request(endpoint.method, path, json_data=json_data, idempotent=False)
+                except OxaPayError as e:
+                    unknown = self._outcome_unknown(e)
+                    retryable = unknown or isinstance(e, RateLimitedError)
+                    if not retryable or attempt >= policy.max_attempts or not await self._sleep(client, policy, attempt, e):
+                        forget = not uncertain and not unknown
+                        raise
+                    uncertain = uncertain or unknown
+                    continue
+                return await self._offload(self._finish, key, record, response)
+        except BaseException:
+            await self._offload(self._abandon, key, record, forget)
+            raise
+
+    @staticmethod
+    async def _sleep(client, policy, attempt: int, error: OxaPayError) -> bool:
+        delay = _BaseIdempotency._retry_delay(policy, attempt, error)
+        if client.deadline is not None and delay >= client.deadline.remaining():
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+    async def _reconcile(self, oxapay, endpoint, order_id, record: IdempotencyRecord) -> dict:
+        payments = oxapay.iter_payment_history(prefetch=0, raw_response=True, **self._search_filters(record))
+        try:
+            async for payment in payments:
+                found = self._match(endpoint, order_id, payment)
+                if found is not None:
+                    return found
+        finally:
+            await payments.aclose()
+        return None
@@ -0,0 +1,250 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from ..AsyncOxaPay import AsyncOxaPay
+from ..SyncOxaPay import SyncOxaPay
+
+
+@dataclass
+class MerchantResult:
+    merchant_id: str
+    result: object = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _date(row) -> int:
+    # Rows are models, or dicts with ``raw_response=True``.
+    date = row.get('date') if isinstance(row, dict) else row.date
+    try:
+        return int(date or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _merge_by_date(results: list, sort_type: str) -> list:
+    for result in results:
+        if result.error is not None:
+            raise result.error
+    merged = [(result.merchant_id, item) for result in results for item in result.result]
+    merged.sort(key=lambda pair: _date(pair[1]), reverse=sort_type != 'asc')
+    return merged
+
+
+class _BaseMerchantPool:
+    def __init__(self, root, merchants: dict = None, rate_limiter_factory=None, concurrency: int = 10):
+        """
+        :param root: The client whose connection pool, retry policy, breaker and timeouts all merchants share.
+        :param merchants: ``{merchant_id: merchant_api_key}``.
+        :param rate_limiter_factory: Optional callable building the ``RateLimiter`` of a merchant id; without it keys are not paced.
+        :param concurrency: Maximum number of merchants queried at once by the fan-out methods.
+        """
+        self._root = root
+        self._keys = dict(merchants or {})
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.rate_limiter_factory = rate_limiter_factory
+        self.concurrency = concurrency
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def __contains__(self, merchant_id) -> bool:
+        return merchant_id in self._keys
+
+    def __getitem__(self, merchant_id):
+        return self.client(merchant_id)
+
+    def add(self, merchant_id, merchant_api_key: str):
+        """
+        Registers a merchant, or replaces its key. Its client is built on first use.
+        """
+        with self._lock:
+            if self._keys.get(merchant_id) != merchant_api_key:
+                self._clients.pop(merchant_id, None)
+            self._keys[merchant_id] = merchant_api_key
+
+    def remove(self, merchant_id):
+        with self._lock:
+            self._keys.pop(merchant_id, None)
+            self._clients.pop(merchant_id, None)
+
+    def client(self, merchant_id):
+        """
+        :return: The merchant's client, created on first use with its own cache and rate limiter.
+        :raises KeyError: If the merchant id is not registered.
+        """
+        client = self._clients.get(merchant_id)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(merchant_id)
+                if client is None:
+                    key = self._keys[merchant_id]
+                    limiter = self.rate_limiter_factory(merchant_id) if self.rate_limiter_factory is not None else None
+                    client = self._clients[merchant_id] = self._root.for_merchant(key, rate_limiter=limiter)
+        return client
+
+    def _targets(self, merchant_ids) -> list:
+        return list(self._keys) if merchant_ids is None else list(merchant_ids)
+
+
+class SyncMerchantPool(_BaseMerchantPool):
+    """
+    Routes calls for many merchant keys through one ``requests`` connection pool.
+
+    ``pool['storefront-1'].create_invoice(...)`` uses that merchant's key, cache and rate limiter.
+    ``fan_out`` and the merged read methods query several merchants concurrently on worker threads.
+    """
+    def __init__(self, merchants: dict = None, rate_limiter_factory=None, concurrency: int = 10, **options):
+        """
+        :param merchants: ``{merchant_id: merchant_api_key}``.
+        :param rate_limiter_factory: Optional callable building the ``RateLimiter`` of a merchant id; without it keys are not paced.
+        :param concurrency: Maximum number of merchants queried at once by the fan-out methods.
+        :param options: ``SyncOxaPay`` options shared by all merchants (``pool_maxsize``, ``retry_policy``, ``timeout``...).
+            ``pool_maxsize`` defaults to ``concurrency``.
+        """
+        options.setdefault('pool_maxsize', concurrency)
+        super().__init__(SyncOxaPay('', **options), merchants, rate_limiter_factory, concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Closes the shared connection pool.
+        """
+        self._root.close()
+
+    def fan_out(self, call, merchant_ids=None) -> list:
+        """
+        Runs ``call(client)`` for every merchant concurrently.
+
+        :param call: Callable taking a merchant's ``SyncOxaPay`` and returning a result.
+        :param merchant_ids: Merchants to query. Defaults to all.
+        :return: One ``MerchantResult`` per merchant, in the order of ``merchant_ids``. Failures are captured, not raised.
+        """
+        targets = self._targets(merchant_ids)
+
+        def run(merchant_id):
+            try:
+                return MerchantResult(merchant_id, result=call(self.client(merchant_id)))
+            except Exception as e:
+                return MerchantResult(merchant_id, error=e)
+
+        if not targets:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(targets))) as executor:
+            return list(executor.map(run, targets))
+
+    def payment_history(self, merchant_ids=None, **filters) -> list:
+        """
+        Collects every payment matching the filters from each merchant and merges them by creation date.
+
+        :param merchant_ids: Merchants to query. Defaults to all.
+        :param filters: Any ``iter_payment_history`` argument; ``sort_type='asc'`` puts the oldest first.
+        :return: ``(merchant_id, PaymentStatus)`` pairs (dicts with ``raw_response=True``), newest first by default.
+        :raises OxaPayError: The first merchant's failure; use ``fan_out`` to keep partial results.
+        """
+        results = self.fan_out(lambda client: list(client.iter_payment_history(**filters)), merchant_ids)
+        return _merge_by_date(results, filters.get('sort_type', 'desc'))
+
+    def static_addresses(self, merchant_ids=None, **filters) -> list:
+        """
+        Collects every static address matching the filters from each merchant, all pages included.
+
+        :param merchant_ids: Merchants to query. Defaults to all.
+        :param filters: Any ``iter_static_addresses`` argument, e.g. ``network``.
+        :return: ``(merchant_id, StaticAddress)`` pairs of every merchant, newest first.
+        :raises OxaPayError: The first merchant's failure; use ``fan_out`` to keep partial results.
+        """
+        results = self.fan_out(lambda client: list(client.iter_static_addresses(**filters)), merchant_ids)
+        return _merge_by_date(results, 'desc')
+
+
+class AsyncMerchantPool(_BaseMerchantPool):
+    """
+    Routes calls for many merchant keys through one ``aiohttp`` session.
+
+    ``pool['storefront-1'].create_invoice(...)`` uses that merchant's key, cache and rate limiter.
+    ``fan_out`` and the merged read methods query several merchants concurrently.
+    """
+    def __init__(self, merchants: dict = None, rate_limiter_factory=None, concurrency: int = 10, **options):
+        """
+        :param merchants: ``{merchant_id: merchant_api_key}``.
+        :param rate_limiter_factory: Optional callable building the ``RateLimiter`` of a merchant id; without it keys are not paced.
+        :param concurrency: Maximum number of merchants queried at once by the fan-out methods.
+        :param options: ``AsyncOxaPay`` options shared by all merchants (``limit``, ``retry_policy``, ``timeout``...).
+        """
+        super().__init__(AsyncOxaPay('', **options), merchants, rate_limiter_factory, concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Closes the shared session and its connection pool.
+        """
+        await self._root.aclose()
+
+    async def fan_out(self, call, merchant_ids=None) -> list:
+        """
+        Awaits ``call(client)`` for every merchant concurrently.
+
+        :param call: Callable taking a merchant's ``AsyncOxaPay`` and returning an awaitable.
+        :param merchant_ids: Merchants to query. Defaults to all.
+        :return: One ``MerchantResult`` per merchant, in the order of ``merchant_ids``. Failures are captured, not raised.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(merchant_id):
+            async with semaphore:
+                try:
+                    return MerchantResult(merchant_id, result=await call(self.client(merchant_id)))
+                except Exception as e:
+                    return MerchantResult(merchant_id, error=e)
+
+        return list(await asyncio.gather(*(run(merchant_id) for merchant_id in self._targets(merchant_ids))))
+
+    async def payment_history(self, merchant_ids=None, **filters) -> list:
+        """
+        Collects every payment matching the filters from each merchant and merges them by creation date.
+
+        :param merchant_ids: Merchants to query. Defaults to all.
+        :param filters: Any ``iter_payment_history`` argument; ``sort_type='asc'`` puts the oldest first.
+        :return: ``(merchant_id, PaymentStatus)`` pairs (dicts with ``raw_response=True``), newest first by default.
+        :raises OxaPayError: The first merchant's failure; use ``fan_out`` to keep partial results.
+        """
+        async def collect(client):
+            return [record async for record in client.iter_payment_history(**filters)]
+
+        results = await self.fan_out(collect, merchant_ids)
+        return _merge_by_date(results, filters.get('sort_type', 'desc'))
+
+    async def static_addresses(self, merchant_ids=None, **filters) -> list:
+        """
+        Collects every static address matching the filters from each merchant, all pages included.
+
+        :param merchant_ids: Merchants to query. Defaults to all.
+        :param filters: Any ``iter_static_addresses`` argument, e.g. ``network``.
+        :return: ``(merchant_id, StaticAddress)`` pairs of every merchant, newest first.
+        :raises OxaPayError: The first merchant's failure; use ``fan_out`` to keep partial results.
+        """
+        async def addresses(client):
+            return [record async for record in client.iter_static_addresses(**filters)]
+
+        results = await self.fan_out(addresses, merchant_ids)
+        return _merge_by_date(results, 'desc')
@@ -0,0 +1,17 @@
+def _parse_page(response_data: dict, page: int, size: int):
+    """
+    Splits a raw paginated response (``get_payment_history``, ``get_static_address_list``) into its
+    records and the last page number.
+
+    When the response carries no pagination metadata, a full page is taken to mean
+    that at least one more page may follow.
+
+    :return: A ``(records, last_page)`` tuple.
+    """
+    data = response_data.get('data') or {}
+    records = data.get('list') or []
+    meta = data.get('meta') or {}
+    last_page = meta.get('last_page')
+    if last_page is None:
+        last_page = page + 1 if len(records) >= size else page
+    return records, last_page
@@ -0,0 +1,232 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+
+# Statuses after which a payment can no longer change.
+_FINAL_STATUSES = frozenset({'paid', 'manual_accept', 'refunded', 'expired'})
+
+
+@dataclass
+class StatusChange:
+    track_id: str
+    old_status: str
+    new_status: str
+    payment: dict
+
+    @property
+    def is_final(self) -> bool:
+        return str(self.new_status).lower() in _FINAL_STATUSES
+
+
+class _Watched:
+    __slots__ = ('track_id', 'status', 'expired_at', 'date', 'added_at', 'due_at')
+
+    def __init__(self, track_id: str, status: str, expired_at: int, date: int, now: float):
+        self.track_id = track_id
+        self.status = status
+        self.expired_at = expired_at
+        self.date = date
+        self.added_at = now
+        self.due_at = now
+
+
+class PaymentWatcher:
+    """
+    Tracks many open payments from a single scheduler instead of one polling loop per invoice.
+
+    Each payment is re-checked on an adaptive interval: often while it is close to ``expired_at``,
+    rarely when it is long-lived or far from expiring. When at least ``coalesce_threshold``
+    payments are due at once they are looked up through ``get_payment_history`` pages instead
+    of one ``get_payment_information`` call each. Status changes are delivered through
+    ``async for change in watcher`` and/or the ``on_change`` callbacks. Payments reaching a final
+    status (paid, manual_accept, refunded, expired) are dropped automatically.
+    """
+    def __init__(
+            self,
+            oxapay,
+            min_interval: float = 5.0,
+            max_interval: float = 300.0,
+            coalesce_threshold: int = 10,
+            max_history_pages: int = 5,
+            concurrency: int = 10,
+            on_change=None,
+            max_pending_changes: int = 10000,
+    ):
+        """
+        :param oxapay: The ``AsyncOxaPay`` instance used for the lookups.
+        :param min_interval: Shortest delay in seconds between two checks of one payment.
+        :param max_interval: Longest delay in seconds between two checks of one payment.
+        :param coalesce_threshold: Number of due payments from which history pages are scanned instead of individual lookups.
+        :param max_history_pages: Upper bound of 200-record history pages scanned per coalesced check.
+        :param concurrency: Maximum number of simultaneous individual lookups.
+        :param on_change: Optional callable (plain or async) invoked with each ``StatusChange``.
+        :param max_pending_changes: Changes kept for ``async for`` consumers; the oldest are dropped beyond it.
+        """
+        self._oxapay = oxapay
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.coalesce_threshold = coalesce_threshold
+        self.max_history_pages = max_history_pages
+        self.concurrency = concurrency
+        self._callbacks = [on_change] if on_change is not None else []
+        self._watched = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._changes = asyncio.Queue(max_pending_changes)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.last_error = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> StatusChange:
+        return await self._changes.get()
+
+    def __len__(self):
+        return len(self._watched)
+
+    def __contains__(self, track_id) -> bool:
+        return str(track_id) in self._watched
+
+    def add_callback(self, on_change):
+        self._callbacks.append(on_change)
+
+    def watch(self, track_id, status: str = None, expired_at: int = None, date: int = None):
+        """
+        Starts tracking a payment; its first check is scheduled immediately.
+
+        :param track_id: The payment's track id.
+        :param status: The status already known to the caller, so only later changes are reported.
+        :param expired_at: Unix time the payment expires at, if known. Sharpens the polling schedule.
+        :param date: Unix time the payment was created at, if known. Narrows coalesced history scans.
+        """
+        track_id = str(track_id)
+        now = time.monotonic()
+        self._watched[track_id] = watched = _Watched(track_id, status, expired_at, date, now)
+        heapq.heappush(self._schedule, (watched.due_at, next(self._sequence), track_id))
+        self._wakeup.set()
+
+    def unwatch(self, track_id):
+        self._watched.pop(str(track_id), None)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _interval(self, watched: _Watched, now: float) -> float:
+        if watched.expired_at is not None:
+            # Poll a tenth of the remaining lifetime, so checks get denser towards expiry.
+            remaining = watched.expired_at - time.time()
+            interval = remaining / 10 if remaining > 0 else self.min_interval
+        else:
+            # Without an expiry the payment may live for days; back off as it ages.
+            interval = (now - watched.added_at) / 10
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            due = {}
+            while self._schedule and self._schedule[0][0] <= now:
+                _, _, track_id = heapq.heappop(self._schedule)
+                watched = self._watched.get(track_id)
+                # Entries left behind by a reschedule or unwatch are skipped.
+                if watched is not None and watched.due_at <= now:
+                    due[track_id] = watched
+            if due:
+                try:
+                    await self._check(list(due.values()))
+                except Exception as e:
+                    self.last_error = e
+                now = time.monotonic()
+                for watched in due.values():
+                    if self._watched.get(watched.track_id) is watched:
+                        watched.due_at = now + self._interval(watched, now)
+                        heapq.heappush(self._schedule, (watched.due_at, next(self._sequence), watched.track_id))
+                continue
+
+            self._wakeup.clear()
+            timeout = self._schedule[0][0] - now if self._schedule else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check(self, due: list):
+        pending = {watched.track_id: watched for watched in due}
+        if len(due) >= self.coalesce_threshold:
+            try:
+                await self._check_history(pending)
+            except Exception as e:
+                # Whatever the scan did not resolve falls back to individual lookups.
+                self.last_error = e
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check_one(watched):
+            async with semaphore:
+                response = await self._oxapay.get_payment_information(watched.track_id, raw_response=True)
+            await self._update(watched, response['data'])
+
+        results = await asyncio.gather(*(check_one(w) for w in pending.values()), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.last_error = result
+
+    async def _check_history(self, pending: dict):
+        """
+        Resolves as many pending payments as possible from history pages, removing them from ``pending``.
+        """
+        dates = [watched.date for watched in pending.values()]
+        filters = {'from_date': min(dates)} if None not in dates else {}
+        budget = self.max_history_pages * 200
+        records = self._oxapay.iter_payment_history(size=200, prefetch=1, raw_response=True, **filters)
+        try:
+            async for record in records:
+                watched = pending.pop(str(record.get('track_id')), None)
+                if watched is not None:
+                    await self._update(watched, record)
+                budget -= 1
+                if not pending or budget <= 0:
+                    break
+        finally:
+            await records.aclose()
+
+    async def _update(self, watched: _Watched, payment: dict):
+        status = payment.get('status')
+        if watched.expired_at is None and payment.get('expired_at'):
+            watched.expired_at = payment['expired_at']
+        if watched.date is None and payment.get('date'):
+            watched.date = payment['date']
+        if status == watched.status:
+            return
+        change = StatusChange(watched.track_id, watched.status, status, payment)
+        watched.status = status
+        if change.is_final:
+            self.unwatch(watched.track_id)
+        if self._changes.full():
+            self._changes.get_nowait()
+        self._changes.put_nowait(change)
+        for callback in self._callbacks:
+            result = callback(change)
+            if asyncio.iscoroutine(result):
+                await result
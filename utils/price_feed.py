@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from types import MappingProxyType
+
+from .response_models import _parse_prices
+
+
+class PriceSnapshot:
+    """
+    An immutable view of the price table at one point in time.
+
+    Symbols are looked up case-insensitively in O(1); ``snapshot['BTC']`` or ``snapshot.get('btc')``.
+    """
+    __slots__ = ('prices', 'fetched_at', 'version', '_monotonic')
+
+    def __init__(self, prices: dict, version: int):
+        self.prices = MappingProxyType(prices)
+        self.fetched_at = time.time()
+        self.version = version
+        self._monotonic = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the prices were fetched.
+        """
+        return time.monotonic() - self._monotonic
+
+    def get(self, symbol: str, default=None):
+        return self.prices.get(symbol.upper(), default)
+
+    def __getitem__(self, symbol: str):
+        return self.prices[symbol.upper()]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self.prices
+
+    def __repr__(self):
+        return f'PriceSnapshot(symbols={len(self.prices)}, version={self.version}, age={self.age:.1f}s)'
+
+
+class _BasePriceFeed:
+    def __init__(self, oxapay, interval: float = 10.0, stale_after: float = None):
+        """
+        :param oxapay: The ``SyncOxaPay`` or ``AsyncOxaPay`` instance used to call ``get_prices``.
+        :param interval: Seconds between polls.
+        :param stale_after: Age in seconds after which the snapshot counts as stale. Defaults to three intervals.
+        """
+        self._oxapay = oxapay
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+        self._snapshot = None
+        self.last_error = None
+
+    @property
+    def snapshot(self) -> PriceSnapshot:
+        """
+        The latest snapshot, or None before the first successful poll.
+        """
+        return self._snapshot
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the latest snapshot was fetched, or None before the first successful poll.
+        """
+        snapshot = self._snapshot
+        return snapshot.age if snapshot is not None else None
+
+    @property
+    def is_stale(self) -> bool:
+        snapshot = self._snapshot
+        return snapshot is None or snapshot.age > self.stale_after
+
+    def price(self, symbol: str, default=None):
+        """
+        :return: The latest price of ``symbol``, or ``default`` if it is unknown.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return default
+        return snapshot.get(symbol, default)
+
+    def _swap(self, response_data) -> PriceSnapshot:
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        # A single reference assignment, so readers see either the old or the new table, never a mix.
+        self._snapshot = PriceSnapshot(_parse_prices(response_data), version)
+        self.last_error = None
+        return self._snapshot
+
+
+class SyncPriceFeed(_BasePriceFeed):
+    """
+    Polls ``get_prices`` on a daemon thread and keeps the latest ``PriceSnapshot`` in memory.
+
+    Failed polls keep the previous snapshot and are recorded in ``last_error``.
+    """
+    def __init__(self, oxapay, interval: float = 10.0, stale_after: float = None):
+        super().__init__(oxapay, interval, stale_after)
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='oxapay-price-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self) -> PriceSnapshot:
+        """
+        Fetches the prices immediately and publishes a new snapshot.
+        """
+        snapshot = self._swap(self._oxapay.get_prices(raw_response=True))
+        with self._condition:
+            self._condition.notify_all()
+        return snapshot
+
+    def wait_for_update(self, timeout: float = None) -> PriceSnapshot:
+        """
+        Blocks until a snapshot newer than the current one is published.
+
+        :return: The new snapshot, or None on timeout.
+        """
+        current = self._snapshot.version if self._snapshot is not None else 0
+        with self._condition:
+            updated = self._condition.wait_for(
+                lambda: self._snapshot is not None and self._snapshot.version > current, timeout
+            )
+        return self._snapshot if updated else None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = e
+            self._stop.wait(self.interval)
+
+
+class AsyncPriceFeed(_BasePriceFeed):
+    """
+    Polls ``get_prices`` in a background asyncio task and keeps the latest ``PriceSnapshot`` in memory.
+
+    Failed polls keep the previous snapshot and are recorded in ``last_error``.
+    """
+    def __init__(self, oxapay, interval: float = 10.0, stale_after: float = None):
+        super().__init__(oxapay, interval, stale_after)
+        self._task = None
+        self._next_update = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def refresh(self) -> PriceSnapshot:
+        """
+        Fetches the prices immediately and publishes a new snapshot.
+        """
+        snapshot = self._swap(await self._oxapay.get_prices(raw_response=True))
+        waiter, self._next_update = self._next_update, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(snapshot)
+        return snapshot
+
+    async def wait_for_update(self, timeout: float = None) -> PriceSnapshot:
+        """
+        Waits until a snapshot newer than the current one is published.
+
+        :return: The new snapshot, or None on timeout.
+        """
+        if self._next_update is None:
+            self._next_update = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._next_update), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.last_error = e
+            await asyncio.sleep(self.interval)
@@ -1,21 +1,208 @@
 from dataclasses import dataclass
+from decimal import Decimal
+from typing import List
 
-@dataclass
-class OrderStatus:
+
+def _to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    try:
+        # Going through str keeps floats like 0.1 from turning into 0.1000000000000000055...
+        return Decimal(str(value))
+    except ArithmeticError:
+        return value
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def _list_of(model):
+    def convert(value):
+        if isinstance(value, dict):
+            value = value.values()
+        return [item if isinstance(item, model) else model.from_dict(item) for item in value]
+    return convert
+
+
+class _LazyDecimal:
+    """
+    A ``Decimal`` field converted on first read. Amounts are stored as parsed from the JSON, so
+    records whose amounts are never read (most of a large history page) skip the conversion and
+    do not keep a ``Decimal`` alive.
+    """
+    __slots__ = ('slot',)
+
+    def __init__(self, slot: str):
+        self.slot = slot
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        if value is not None and value.__class__ is not Decimal:
+            value = _to_decimal(value)
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
+_CONVERTERS = {
+    Decimal: _to_decimal,
+    int: _to_int,
+    float: _to_float,
+    str: str,
+    bool: _to_bool,
+}
+
+
+def _converter(annotation):
+    """
+    :return: A ``(converter, expression)`` pair, where the expression is the generated code
+        applying ``_convert`` to ``value`` only when it is needed. ``(None, 'value')`` keeps the value as is.
+    """
+    if annotation in _CONVERTERS:
+        if annotation is float:
+            # Integers are kept: they compute and compare like the floats they would become.
+            return _CONVERTERS[annotation], 'value if value.__class__ is float or value.__class__ is int or value is None else _convert(value)'
+        # Skipping the call when the JSON value already has the right type is the common, fast path.
+        return _CONVERTERS[annotation], f'value if value.__class__ is {annotation.__name__} or value is None else _convert(value)'
+    if getattr(annotation, '__origin__', None) in (list, List):
+        item = annotation.__args__[0]
+        if isinstance(item, _ModelMeta):
+            return _list_of(item), 'value if not value else _convert(value)'
+    if isinstance(annotation, _ModelMeta):
+        return (lambda value: value if isinstance(value, annotation) else annotation.from_dict(value),
+                'value if value is None else _convert(value)')
+    return None, 'value'
+
+
+class _ModelMeta(type):
+    """
+    Turns the annotated fields of a model class into ``__slots__`` and generates
+    ``__init__`` and ``from_dict`` for them.
+
+    The generated code reads each field with one ``dict.get``, converts it according to its
+    annotation (``int``, ``float``, ``str``, ``bool``, nested models) and ignores keys it
+    does not know, so new fields added by OxaPay do not break parsing. ``Decimal`` fields are
+    stored as sent and converted on first read.
+    """
+    def __new__(mcs, name, bases, namespace):
+        annotations = namespace.get('__annotations__', {})
+        fields = tuple(annotations)
+        defaults = {field: namespace.pop(field) for field in fields if field in namespace}
+        lazy = [field for field, annotation in annotations.items() if annotation is Decimal]
+        namespace['__slots__'] = tuple(f'_{field}' if field in lazy else field for field in fields)
+        for field in lazy:
+            namespace[field] = _LazyDecimal(f'_{field}')
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._fields = fields
+        if fields:
+            mcs._generate(cls, annotations, defaults)
+        return cls
+
+    @staticmethod
+    def _generate(cls, annotations: dict, defaults: dict):
+        env = {'_defaults': defaults}
+        init_args = []
+        init_body = []
+        parse_body = []
+        for field, annotation in annotations.items():
+            default = f'_defaults[{field!r}]' if field in defaults else 'None'
+            init_args.append(f'{field}={default}')
+            if annotation is Decimal:
+                init_body.append(f'    self._{field} = {field}')
+                parse_body.append(f'    self._{field} = get({field!r}, {default})')
+                continue
+            convert, expression = _converter(annotation)
+            if convert is not None:
+                env[f'_convert_{field}'] = convert
+                expression = expression.replace('_convert', f'_convert_{field}')
+            init_body.append(f'    value = {field}\n    self.{field} = {expression}')
+            parse_body.append(f'    value = get({field!r}, {default})\n    self.{field} = {expression}')
+
+        source = (
+            f'def __init__(self, {", ".join(init_args)}, **_unknown):\n' + '\n'.join(init_body) + '\n\n'
+            'def from_dict(cls, data):\n'
+            '    self = cls.__new__(cls)\n'
+            '    get = data.get\n' + '\n'.join(parse_body) + '\n'
+            '    return self\n'
+        )
+        exec(source, env)
+        cls.__init__ = env['__init__']
+        cls._parse = classmethod(env['from_dict'])
+        if 'from_dict' not in cls.__dict__:
+            cls.from_dict = cls._parse
+
+
+class _Model(metaclass=_ModelMeta):
+    """
+    Base of the response models: slotted, tolerant of unknown fields, built with ``from_dict``.
+    """
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self._fields}
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self._fields)
+
+    def __repr__(self):
+        args = ', '.join(f'{field}={getattr(self, field)!r}' for field in self._fields)
+        return f'{self.__class__.__name__}({args})'
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in self._fields)
+
+    def __setstate__(self, state):
+        for field, value in zip(self._fields, state):
+            setattr(self, field, value)
+
+
+class Transaction(_Model):
+    tx_hash: str
+    amount: Decimal
+    currency: str
+    network: str
+    address: str
+    status: str
+    confirmations: int
+    date: int
+
+
+class OrderStatus(_Model):
     track_id: str
     payment_url: str
     expired_at: int
     date: int
 
-@dataclass
-class PaymentStatus:
+
+class PaymentStatus(_Model):
     track_id: str
     type: str
-    amount: int
+    amount: Decimal
     currency: str
     status: str
     mixed_payment: bool
-    fee_paid_by_payer: int
+    fee_paid_by_payer: float
     under_paid_coverage: float
     lifetime: int
     callback_url: str
@@ -26,4 +213,143 @@ class PaymentStatus:
     thanks_message: str
     expired_at: int
     date: int
-    txs: list
\ No newline at end of file
+    txs: List[Transaction]
+    address: str
+
+
+class WhiteLabelPayment(_Model):
+    track_id: str
+    amount: Decimal
+    currency: str
+    pay_amount: Decimal
+    pay_currency: str
+    network: str
+    address: str
+    callback_url: str
+    description: str
+    email: str
+    fee_paid_by_payer: float
+    lifetime: int
+    order_id: str
+    under_paid_coverage: float
+    rate: Decimal
+    qr_code: str
+    expired_at: int
+    date: int
+
+
+class StaticAddress(_Model):
+    track_id: str
+    network: str
+    address: str
+    callback_url: str
+    email: str
+    order_id: str
+    description: str
+    qr_code: str
+    date: int
+
+
+class PaymentHistory(_Model):
+    payments: List[PaymentStatus]
+    page: int
+    last_page: int
+    total: int
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PaymentHistory':
+        meta = data.get('meta') or {}
+        return cls(data.get('list') or [], meta.get('page'), meta.get('last_page'), meta.get('total'))
+
+
+class StaticAddressList(_Model):
+    addresses: List[StaticAddress]
+    page: int
+    last_page: int
+    total: int
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StaticAddressList':
+        meta = data.get('meta') or {}
+        return cls(data.get('list') or [], meta.get('page'), meta.get('last_page'), meta.get('total'))
+
+
+class CurrencyNetwork(_Model):
+    network: str
+    name: str
+    required_confirmations: int
+    withdraw_fee: Decimal
+    withdraw_min: Decimal
+    deposit_min: Decimal
+    static_fixed_fee: Decimal
+
+
+class Currency(_Model):
+    symbol: str
+    name: str
+    status: bool
+    networks: List[CurrencyNetwork]
+
+
+class FiatCurrency(_Model):
+    symbol: str
+    name: str
+    price: Decimal
+    display_precision: int
+
+
+def _by_symbol(model, data) -> dict:
+    """
+    Builds ``{symbol: model}`` from either a symbol-keyed mapping or a list of records.
+    """
+    items = data.items() if isinstance(data, dict) else ((item.get('symbol'), item) for item in data)
+    result = {}
+    for symbol, item in items:
+        if 'symbol' not in item:
+            item = {**item, 'symbol': symbol}
+        result[symbol] = model.from_dict(item)
+    return result
+
+
+def _parse_prices(response_data) -> dict:
+    """
+    Normalizes a ``get_prices`` response into a ``{symbol: Decimal}`` dict.
+
+    Accepts both a symbol to price mapping and a list of ``{'symbol': ..., 'price': ...}`` records.
+    """
+    data = response_data.get('data', response_data) if isinstance(response_data, dict) else response_data
+    if isinstance(data, dict):
+        return {symbol.upper(): _to_decimal(price) for symbol, price in data.items()}
+    return {item['symbol'].upper(): _to_decimal(item['price']) for item in data}
+
+
+@dataclass
+class BulkResult:
+    index: int
+    request: dict
+    result: object = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class PaymentCallback(_Model):
+    track_id: str
+    status: str
+    type: str
+    amount: Decimal
+    currency: str
+    order_id: str
+    email: str
+    description: str
+    date: int
+    txs: List[Transaction]
+    raw: dict
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PaymentCallback':
+        event = cls._parse(data)
+        event.raw = data
+        return event
@@ -0,0 +1,205 @@
+from decimal import Decimal, InvalidOperation
+
+from ..clients.exceptions import OxaPayError, ValidationError
+
+
+def _upper(value) -> str:
+    return str(value).strip().upper()
+
+
+def _list(response_data) -> list:
+    data = response_data.get('data', response_data) if isinstance(response_data, dict) else response_data
+    if isinstance(data, dict):
+        data = data.get('list', data)
+    return list(data or [])
+
+
+class ReferenceIndex:
+    """
+    The supported currencies, networks, fiat currencies and accepted currencies, indexed by
+    upper-cased symbol and network for O(1) checks. Built from the clients' cached reference data.
+    """
+    __slots__ = ('currencies', 'networks', 'fiats', 'accepted', 'sources')
+
+    def __init__(self, currencies: dict, networks, fiats: dict, accepted, sources: tuple = ()):
+        """
+        :param currencies: ``get_supported_currencies()`` result, ``{symbol: Currency}``.
+        :param networks: ``get_supported_networks()`` response.
+        :param fiats: ``get_supported_fiat_currencies()`` result, ``{symbol: FiatCurrency}``.
+        :param accepted: ``get_accepted_currencies()`` response, or None to skip the accepted check.
+        :param sources: The objects the index was built from, to tell when it is out of date.
+        """
+        # symbol -> {network or network name -> CurrencyNetwork}, None for disabled currencies.
+        self.currencies = {}
+        self.networks = {_upper(network) for network in _list(networks)}
+        for symbol, currency in currencies.items():
+            by_network = {}
+            for network in currency.networks or []:
+                for key in (network.network, network.name):
+                    if key:
+                        by_network[_upper(key)] = network
+                        self.networks.add(_upper(key))
+            self.currencies[_upper(symbol)] = by_network if currency.status is not False else None
+        self.fiats = {_upper(symbol) for symbol in fiats}
+        self.accepted = {_upper(symbol) for symbol in _list(accepted)} if accepted is not None else None
+        self.sources = sources
+
+    def _crypto(self, field: str, symbol, accepted_only: bool = False) -> dict:
+        symbol = _upper(symbol)
+        if symbol not in self.currencies:
+            raise _invalid(f'{field} "{symbol}" is not a supported currency.')
+        networks = self.currencies[symbol]
+        if networks is None:
+            raise _invalid(f'{field} "{symbol}" is currently disabled.')
+        if accepted_only and self.accepted and symbol not in self.accepted:
+            raise _invalid(f'{field} "{symbol}" is not enabled for this merchant.')
+        return networks
+
+    def _any_currency(self, field: str, symbol):
+        symbol = _upper(symbol)
+        if symbol not in self.currencies and symbol not in self.fiats:
+            raise _invalid(f'{field} "{symbol}" is neither a supported currency nor a supported fiat currency.')
+
+    def check_invoice(self, payload: dict):
+        _check_amount(payload.get('amount'))
+        if payload.get('currency') is not None:
+            self._any_currency('currency', payload['currency'])
+        if payload.get('to_currency') is not None:
+            self._crypto('to_currency', payload['to_currency'])
+
+    def check_white_label(self, payload: dict):
+        amount = _check_amount(payload.get('amount'))
+        pay_currency = payload.get('pay_currency')
+        networks = self._crypto('pay_currency', pay_currency, accepted_only=True)
+        network = None
+        if payload.get('network') is not None:
+            network = networks.get(_upper(payload['network']))
+            if network is None:
+                raise _invalid(f'network "{payload["network"]}" is not available for {_upper(pay_currency)}; '
+                               f'use one of {sorted({n.network for n in networks.values()})}.')
+        elif len({id(n) for n in networks.values()}) == 1:
+            network = next(iter(networks.values()))
+        if payload.get('currency') is not None:
+            self._any_currency('currency', payload['currency'])
+        if payload.get('to_currency') is not None:
+            self._crypto('to_currency', payload['to_currency'])
+        # The minimum is in the paid currency, so it only applies when the amount is too.
+        same_currency = payload.get('currency') is None or _upper(payload['currency']) == _upper(pay_currency)
+        if network is not None and same_currency and amount is not None and network.deposit_min and amount < network.deposit_min:
+            raise _invalid(f'amount {amount} is below the {network.network} deposit minimum of {network.deposit_min} {_upper(pay_currency)}.')
+
+    def check_static_address(self, payload: dict):
+        network = payload.get('network')
+        if network is None or _upper(network) not in self.networks:
+            raise _invalid(f'network "{network}" is not a supported network.')
+        if payload.get('to_currency') is not None:
+            self._crypto('to_currency', payload['to_currency'])
+
+
+def _check_amount(amount):
+    try:
+        value = Decimal(str(amount))
+    except (InvalidOperation, ValueError):
+        raise _invalid(f'amount {amount!r} is not a number.') from None
+    if not value.is_finite() or value <= 0:
+        raise _invalid(f'amount {amount!r} must be positive.')
+    return value
+
+
+def _invalid(message: str) -> ValidationError:
+    return ValidationError(message)
+
+
+# Endpoint path -> ReferenceIndex check.
+_CHECKS = {
+    'payment/invoice': ReferenceIndex.check_invoice,
+    'payment/white-label': ReferenceIndex.check_white_label,
+    'payment/static-address': ReferenceIndex.check_static_address,
+}
+
+
+class _BaseValidator:
+    """
+    Rejects invalid creation payloads before they are sent, from the cached reference data.
+
+    Reference data that cannot be loaded disables the checks for that call rather than failing it;
+    the API stays the authority.
+    """
+    def __init__(self):
+        self._index = None
+        self.last_error = None
+
+    def _indexed(self, sources: tuple) -> ReferenceIndex:
+        index = self._index
+        # The cache hands out the same objects until it refreshes, so identity tells when to rebuild.
+        if index is None or any(a is not b for a, b in zip(index.sources, sources)):
+            index = self._index = ReferenceIndex(*sources, sources=sources)
+        return index
+
+    @staticmethod
+    def _check(index: ReferenceIndex, endpoint, payload: dict):
+        check = _CHECKS.get(endpoint.path)
+        if check is not None:
+            try:
+                check(index, payload)
+            except ValidationError as e:
+                raise ValidationError(
+                    f'{endpoint.method} {endpoint.path} rejected before sending: {e}',
+                    endpoint=endpoint.path, method=endpoint.method,
+                ) from None
+
+
+class SyncValidator(_BaseValidator):
+    """
+    The pre-flight validation of ``SyncOxaPay``; see ``_BaseValidator``.
+    """
+    def index(self, oxapay) -> ReferenceIndex:
+        """
+        :param oxapay: The ``SyncOxaPay`` whose reference data cache is read.
+        :return: The index of the current reference data, fetching it if the cache is empty.
+        """
+        return self._indexed((
+            oxapay.get_supported_currencies(),
+            oxapay.get_supported_networks(),
+            oxapay.get_supported_fiat_currencies(),
+            oxapay.get_accepted_currencies(),
+        ))
+
+    def check(self, oxapay, endpoint, payload: dict):
+        """
+        :raises ValidationError: If the payload cannot succeed.
+        """
+        try:
+            index = self.index(oxapay)
+        except OxaPayError as e:
+            self.last_error = e
+            return
+        self._check(index, endpoint, payload)
+
+
+class AsyncValidator(_BaseValidator):
+    """
+    The pre-flight validation of ``AsyncOxaPay``; see ``_BaseValidator``.
+    """
+    async def index(self, oxapay) -> ReferenceIndex:
+        """
+        :param oxapay: The ``AsyncOxaPay`` whose reference data cache is read.
+        :return: The index of the current reference data, fetching it if the cache is empty.
+        """
+        return self._indexed((
+            await oxapay.get_supported_currencies(),
+            await oxapay.get_supported_networks(),
+            await oxapay.get_supported_fiat_currencies(),
+            await oxapay.get_accepted_currencies(),
+        ))
+
+    async def check(self, oxapay, endpoint, payload: dict):
+        """
+        :raises ValidationError: If the payload cannot succeed.
+        """
+        try:
+            index = await self.index(oxapay)
+        except OxaPayError as e:
+            self.last_error = e
+            return
+        self._check(index, endpoint, payload)